@@ -0,0 +1,5 @@
+"""
+Benchmarks of easyhtml. Run them with
+
+python -m benchmarks [--output results.json] [--baseline baseline.json]
+"""
@@ -0,0 +1,106 @@
+import random
+
+__all__ = ('kinds', 'generate')
+
+words = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur',
+         'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor',
+         'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua')
+
+entities = ('&amp;', '&lt;', '&gt;', '&quot;', '&nbsp;', '&copy;', '&#169;',
+            '&#x263A;', '&mdash;', '&unknown;')
+
+
+def get_text(rnd, count):
+    return ' '.join(rnd.choice(words) for _ in range(count))
+
+
+def get_attrs(n):
+    """
+    Returns attributes used by searches in benchmarks.
+    """
+    return 'id="n{}" class="item c{}"'.format(n, n % 10)
+
+
+def generate_deep(rnd, size):
+    # chains of nested tags, each chain is up to 100 tags deep
+    parts = []
+    for chain in range(0, size, 100):
+        depth = min(size - chain, 100)
+        for n in range(chain, chain + depth):
+            parts.append('<div {}>{} '.format(get_attrs(n), get_text(rnd, 3)))
+        parts.append('</div>' * depth)
+    return parts
+
+
+def generate_wide(rnd, size):
+    return ['<p {}>{}</p>'.format(get_attrs(n), get_text(rnd, 8))
+            for n in range(size)]
+
+
+def generate_entities(rnd, size):
+    parts = []
+    for n in range(size):
+        text = ' '.join(rnd.choice(words + entities) for _ in range(12))
+        parts.append('<p {}>{}</p>'.format(get_attrs(n), text))
+    return parts
+
+
+def generate_attributes(rnd, size):
+    parts = []
+    for n in range(size):
+        attrs = ' '.join('data-{}="{}"'.format(i, rnd.choice(words))
+                         for i in range(rnd.randint(5, 20)))
+        parts.append('<span {} {} hidden>{}</span>'.format(
+            get_attrs(n), attrs, get_text(rnd, 2)))
+    return parts
+
+
+def generate_malformed(rnd, size):
+    parts = []
+    for n in range(size):
+        choice = rnd.randrange(5)
+        if choice == 0:
+            # unclosed tags closed by the end tag of their parent
+            parts.append('<div {}><p>{}<li>{}</div>'.format(
+                get_attrs(n), get_text(rnd, 4), get_text(rnd, 2)))
+        elif choice == 1:
+            # stray end tags
+            parts.append('</span><div {}>{}</b></div></i>'.format(
+                get_attrs(n), get_text(rnd, 4)))
+        elif choice == 2:
+            # misnested tags
+            parts.append('<b {}><i>{}</b></i>'.format(
+                get_attrs(n), get_text(rnd, 4)))
+        elif choice == 3:
+            # unquoted attributes and a bare ampersand
+            parts.append('<a id=n{} class=c{} href=/x?a=1&b=2>{} & {}</a>'
+                         .format(n, n % 10, get_text(rnd, 2),
+                                 get_text(rnd, 2)))
+        else:
+            parts.append('<div {}><!-- {} --><br>{}</div>'.format(
+                get_attrs(n), get_text(rnd, 2), get_text(rnd, 4)))
+    return parts
+
+
+kinds = {
+    'deep': generate_deep,
+    'wide': generate_wide,
+    'entities': generate_entities,
+    'attributes': generate_attributes,
+    'malformed': generate_malformed,
+}
+
+
+def generate(kind, size=1000, seed=0):
+    """
+    Returns an HTML document of specified kind. The same
+    arguments always produce the same document.
+
+    :kind: a kind of the document, one of keys of kinds, type str
+    :size: a count of main elements of the document, type int
+    :seed: a seed of the random generator, type int
+    """
+    rnd = random.Random(seed)
+    parts = kinds[kind](rnd, size)
+    return ('<!DOCTYPE html><html><head><title>{}</title></head><body>{}'
+            '</body></html>'.format(kind, '\n'.join(parts)))
@@ -0,0 +1,250 @@
+from contextlib import contextmanager
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import easyhtml
+from easyhtml import dom, parser, serializer
+
+from . import corpus
+
+__all__ = ('run', 'compare', 'main')
+
+# names of the most common tags in documents of each kind
+tag_names = {
+    'deep': 'div',
+    'wide': 'p',
+    'entities': 'p',
+    'attributes': 'span',
+    'malformed': 'div',
+}
+
+# a query that matches every tenth tag
+query = 'class=c3'
+
+
+@contextmanager
+def cache_disabled():
+    """
+    Disables caching of str() and raw_html, so each
+    call builds them from scratch.
+    """
+    enabled = dom.ElementTagContainer.cache_enabled
+    dom.ElementTagContainer.cache_enabled = False
+    try:
+        yield
+    finally:
+        dom.ElementTagContainer.cache_enabled = enabled
+
+
+def parse(text, **options):
+    html_parser = parser.DOMParser(**options)
+    html_parser.feed(text)
+    html_parser.close()
+    return html_parser.get_dom()
+
+
+def get_cases(kind, size):
+    """
+    Returns pairs (name, func) of benchmarks of the
+    document kind. Functions are called without arguments.
+    """
+    text = corpus.generate(kind, size)
+    document = parse(text)
+    indexed = parse(text, index=True, text_index=True)
+    with_source = parse(text, keep_source=True)
+    all_tags = list(document.get_all_tags())
+    name = tag_names[kind]
+    e_id = 'n{}'.format(size - 1)
+
+    def to_str():
+        with cache_disabled():
+            return str(document)
+
+    def to_raw_html():
+        with cache_disabled():
+            return document.raw_html
+
+    def to_file():
+        return serializer.write(document, io.StringIO())
+
+    return (
+        ('parse', lambda: parse(text)),
+        ('parse_indexed', lambda: parse(text, index=True, text_index=True)),
+        ('get_all_tags', lambda: list(document.get_all_tags())),
+        ('get_tags_by_name', lambda: document.get_tags_by_name(name)),
+        ('check_attrs', lambda: [t for t in all_tags if t.check_attrs(query)]),
+        ('get_children', lambda: document.get_children(query)),
+        ('get_children_indexed', lambda: indexed.get_children(query)),
+        ('get_element_by_id', lambda: document.get_element_by_id(e_id)),
+        ('get_element_by_id_indexed',
+         lambda: indexed.get_element_by_id(e_id)),
+        ('find_text', lambda: document.find_text('dolore magna')),
+        ('find_text_indexed', lambda: indexed.find_text('dolore magna')),
+        ('get_tags_containing',
+         lambda: document.get_tags_containing('tempor')),
+        ('str', to_str),
+        ('raw_html', to_raw_html),
+        ('minified', lambda: serializer.serialize(document)),
+        ('compact', lambda: serializer.serialize(with_source, 'compact')),
+        ('write_minified', to_file),
+    )
+
+
+def get_parser_cases():
+    """
+    Returns benchmarks of creating a new parser
+    for a small document and taking one from the pool.
+    """
+    text = corpus.generate('wide', 10)
+    return (
+        ('new', lambda: parse(text)),
+        ('pool', lambda: parser.parse(text)),
+    )
+
+
+def measure(func, repeat, number):
+    """
+    Returns a dictionary with the best and the median time of
+    a call of the function and the peak of allocated memory.
+
+    :func: a function to measure, type callable
+    :repeat: a count of measurements, type int
+    :number: a count of calls in each measurement, type int
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    # memory is measured separately since tracemalloc slows down the code
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'peak_memory': peak,
+    }
+
+
+def run(kinds=None, size=1000, repeat=5, pattern=None, log=None):
+    """
+    Runs benchmarks and returns the results as a dictionary.
+
+    :kinds: kinds of documents, all kinds by default, type a list of str
+    :size: a count of main elements of documents, type int
+    :repeat: a count of measurements of each benchmark, type int
+    :pattern: a substring of names of benchmarks to run, type str
+    :log: a stream to print progress to, type a text file object
+    """
+    cases = [('parser/' + name, func, 100)
+             for name, func in get_parser_cases()]
+    for kind in kinds or corpus.kinds:
+        cases.extend(('{}/{}'.format(kind, name), func, 1)
+                     for name, func in get_cases(kind, size))
+    results = {}
+    for name, func, number in cases:
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(func, repeat, number)
+        if log is not None:
+            print(format_result(name, results[name]), file=log)
+    return {
+        'meta': {
+            'easyhtml': easyhtml.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'size': size,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def format_result(name, result):
+    return '{:<40} {:>10.3f} ms {:>10.3f} ms {:>10.1f} KB'.format(
+        name, result['min'] * 1000, result['median'] * 1000,
+        result['peak_memory'] / 1024)
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compares results with the baseline and returns a list of tuples
+    (name, ratio, regressed) for benchmarks present in both of them,
+    where ratio is the best time divided by the best time of the
+    baseline and regressed is True if the ratio exceeds 1 + tolerance.
+
+    :results: results returned by run(), type dict
+    :baseline: previously saved results, type dict
+    :tolerance: an allowed relative slowdown, type float
+    """
+    comparison = []
+    old_results = baseline['results']
+    for name, result in results['results'].items():
+        if name not in old_results:
+            continue
+        ratio = result['min'] / max(old_results[name]['min'], 1e-12)
+        comparison.append((name, ratio, ratio > 1 + tolerance))
+    return comparison
+
+
+def main(argv=None):
+    """
+    Runs benchmarks from the command line and returns an exit
+    status that is 1 if any benchmark regressed.
+
+    :argv: command line arguments, sys.argv is used by default,
+           type a list of str
+    """
+    args_parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Runs benchmarks of easyhtml on generated documents.')
+    args_parser.add_argument('-k', '--kind', action='append',
+                             choices=sorted(corpus.kinds), dest='kinds',
+                             help='a kind of documents, all by default')
+    args_parser.add_argument('-s', '--size', type=int, default=1000,
+                             help='a count of main elements of documents '
+                                  '(default: %(default)s)')
+    args_parser.add_argument('-r', '--repeat', type=int, default=5,
+                             help='a count of measurements '
+                                  '(default: %(default)s)')
+    args_parser.add_argument('-m', '--match',
+                             help='run benchmarks which names contain it')
+    args_parser.add_argument('-o', '--output',
+                             help='a file to save results to as JSON')
+    args_parser.add_argument('-b', '--baseline',
+                             help='a file with results to compare with')
+    args_parser.add_argument('-t', '--tolerance', type=float, default=0.25,
+                             help='an allowed relative slowdown '
+                                  '(default: %(default)s)')
+    args = args_parser.parse_args(argv)
+
+    print('{:<40} {:>13} {:>13} {:>13}'.format(
+        'benchmark', 'best', 'median', 'peak memory'))
+    results = run(args.kinds, args.size, args.repeat, args.match, sys.stdout)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print()
+    status = 0
+    for name, ratio, regressed in compare(results, baseline, args.tolerance):
+        print('{:<40} {:>8.2f}x{}'.format(
+            name, ratio, '  REGRESSION' if regressed else ''))
+        if regressed:
+            status = 1
+    return status
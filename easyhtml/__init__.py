@@ -1,3 +1,7 @@
 __version__ = '1.2.0'
 
-__all__ = ('parser', 'dom')
+__all__ = (
+    'parser', 'dom', 'index', 'aio', 'source', 'corpus', 'cli', 'tracing',
+    'memory', 'lazy', 'frozen', 'parallel', 'shared', 'serializer', 'diff',
+    'incremental', 'features', 'query',
+)
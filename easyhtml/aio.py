@@ -0,0 +1,119 @@
+import asyncio
+import codecs
+
+from .parser import DOMParser
+
+__all__ = ('parse_async', 'iter_events')
+
+
+class EventParser(DOMParser):
+    """
+    A DOMParser that collects events of opened and closed tags.
+    """
+
+    def __init__(self, **kwargs):
+        DOMParser.__init__(self, **kwargs)
+        # a list of pairs (event, tag) not processed yet
+        self.events = []
+
+    def handle_tag_open(self, tag):
+        self.events.append(('start', tag))
+
+    def handle_tag_close(self, tag):
+        self.events.append(('end', tag))
+
+
+async def read_stream(stream, chunk_size):
+    """
+    Reads a stream until the end of file and yields read data.
+
+    :stream: a stream to read, type asyncio.StreamReader
+    :chunk_size: a maximum size of read data, type int
+    """
+    while True:
+        data = await stream.read(chunk_size)
+        if not data:
+            return
+        yield data
+
+
+async def iter_chunks(source, encoding='utf-8', chunk_size=65536):
+    """
+    Reads a source and yields decoded chunks of it
+    that are not longer than chunk_size.
+
+    :source: a source to read, type asyncio.StreamReader or
+             an asynchronous iterable of bytes or str
+    :encoding: an encoding of bytes, type str
+    :chunk_size: a maximum length of a chunk, type int
+    """
+    # a decoder keeps bytes of characters split between chunks
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    if hasattr(source, 'read'):
+        source = read_stream(source, chunk_size)
+    async for data in source:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = decoder.decode(data)
+        # split large chunks to limit the time spent
+        # by the parser without yielding to the event loop
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+    data = decoder.decode(b'', True)
+    if data:
+        yield data
+
+
+async def parse_async(source, encoding='utf-8', chunk_size=65536,
+                      parser=None, **kwargs):
+    """
+    Reads a source, parses it and returns an HTMLDocument object.
+
+    :source: a source to read, type asyncio.StreamReader or
+             an asynchronous iterable of bytes or str
+    :encoding: an encoding of bytes, type str
+    :chunk_size: a maximum length of a chunk fed to the parser
+                 at once, type int
+    :parser: a parser to use, type DOMParser
+
+    Other keyword arguments are passed to DOMParser if the parser
+    is not specified. The control returns to the event loop after
+    each chunk, so parsing of a large document does not block
+    other tasks.
+    """
+    if parser is None:
+        parser = DOMParser(**kwargs)
+    async for chunk in iter_chunks(source, encoding, chunk_size):
+        parser.feed(chunk)
+        await asyncio.sleep(0)
+    parser.close()
+    return parser.get_dom()
+
+
+async def iter_events(source, encoding='utf-8', chunk_size=65536, **kwargs):
+    """
+    Reads a source, parses it and yields pairs (event, tag) where
+    event is 'start' when the tag is appended to the DOM and 'end'
+    when the tag is closed and its content is complete. The last
+    pair is ('end', document) where document is an HTMLDocument.
+
+    :source: a source to read, type asyncio.StreamReader or
+             an asynchronous iterable of bytes or str
+    :encoding: an encoding of bytes, type str
+    :chunk_size: a maximum length of a chunk fed to the parser
+                 at once, type int
+
+    Other keyword arguments are passed to DOMParser.
+    """
+    parser = EventParser(**kwargs)
+    async for chunk in iter_chunks(source, encoding, chunk_size):
+        parser.feed(chunk)
+        # yield events of the chunk
+        events, parser.events = parser.events, []
+        for event in events:
+            yield event
+        await asyncio.sleep(0)
+    parser.close()
+    document = parser.get_dom()
+    for event in parser.events:
+        yield event
+    yield 'end', document
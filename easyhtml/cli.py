@@ -0,0 +1,195 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+
+from . import source
+from .query import find_tags, parse_query
+
+__all__ = ('main',)
+
+outputs = ('attrs', 'text', 'html')
+
+
+def extract(path, queries, output, encoding=None):
+    """
+    Parses a file and returns a tuple of its path, its size
+    and a list of records for all found tags. The list is None
+    if the file could not be read.
+
+    :path: a path of the file, type str
+    :queries: queries to search tags, type a list of str
+    :output: a type of records: 'attrs', 'text' or 'html', type str
+    :encoding: an encoding of the file, type str
+
+    It's executed by worker processes.
+    """
+    try:
+        size = os.path.getsize(path)
+        document = source.parse_file(path, encoding)
+    except (OSError, LookupError) as e:
+        # skip files that could not be read
+        print('{}: {}'.format(path, e), file=sys.stderr)
+        return path, 0, None
+    records = []
+    for spec in queries:
+        for tag in find_tags(document, spec):
+            record = {'file': path, 'query': spec, 'tag': tag.tag_name}
+            if output == 'attrs':
+                record['attrs'] = dict(tag.get_attr_items())
+            elif output == 'text':
+                record['text'] = str(tag)
+            else:
+                record['html'] = tag.raw_html
+            records.append(record)
+    return path, size, records
+
+
+def extract_files(paths, queries, output, encoding=None):
+    """
+    Returns a list of results of extract() for several files.
+    It's executed by worker processes that get files in chunks.
+    """
+    return [extract(path, queries, output, encoding) for path in paths]
+
+
+def iter_chunks(files, size):
+    """
+    Yields lists of at most size paths of files.
+
+    :files: paths of files, type an iterable of str
+    :size: a count of files in a chunk, type int
+    """
+    files = iter(files)
+    while True:
+        chunk = list(islice(files, max(size, 1)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_results(executor, files, arguments, workers, chunk_size):
+    """
+    Yields results of extract() for files processed by worker
+    processes in the order of files.
+
+    :executor: a pool of worker processes, type ProcessPoolExecutor
+    :files: paths of files, type an iterable of str
+    :arguments: other arguments of extract(), type tuple
+    :workers: a count of worker processes, type int
+    :chunk_size: a count of files sent to a worker at once, type int
+    """
+    # limit a count of submitted chunks to keep in memory
+    # only results of those being processed
+    limit = 2 * workers
+    futures = deque()
+    for chunk in iter_chunks(files, chunk_size):
+        futures.append(executor.submit(extract_files, chunk, *arguments))
+        if len(futures) >= limit:
+            yield from futures.popleft().result()
+    while futures:
+        yield from futures.popleft().result()
+
+
+def iter_files(paths, pattern):
+    """
+    Yields paths of files and files in directories
+    that match the pattern.
+
+    :paths: paths of files and directories, type a list of str
+    :pattern: a pattern of names of files in directories, type str
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if fnmatch.fnmatch(name, pattern):
+                    yield os.path.join(root, name)
+
+
+def get_arguments_parser():
+    """
+    Returns a parser of command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m easyhtml',
+        description='Extracts tags from HTML documents and prints them '
+                    'as JSON lines.')
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help='files or directories with documents')
+    parser.add_argument('-q', '--query', action='append', required=True,
+                        dest='queries',
+                        help='a query: "tag", "tag(attr=value; ...)", '
+                             '"(attr=value; ...)" or "#id", '
+                             'could be specified several times')
+    parser.add_argument('-o', '--output', choices=outputs, default='attrs',
+                        help='what to print for found tags '
+                             '(default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help='a count of worker processes '
+                             '(default: %(default)s)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=16,
+                        help='a count of files sent to a worker at once '
+                             '(default: %(default)s)')
+    parser.add_argument('-p', '--pattern', default='*.htm*',
+                        help='a pattern of names of files in directories '
+                             '(default: %(default)s)')
+    parser.add_argument('-e', '--encoding',
+                        help='an encoding of documents, detected by default')
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the command line extractor and returns an exit status.
+
+    :argv: command line arguments, sys.argv is used by default,
+           type a list of str
+    """
+    args = get_arguments_parser().parse_args(argv)
+    for spec in args.queries:
+        try:
+            parse_query(spec)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    files = iter_files(args.paths, args.pattern)
+    arguments = (args.queries, args.output, args.encoding)
+    status = count = size = 0
+    start = time.monotonic()
+    if args.workers > 1:
+        executor = ProcessPoolExecutor(args.workers)
+        # results are returned in order of files as soon as they are ready
+        results = iter_results(executor, files, arguments,
+                               args.workers, args.chunk_size)
+    else:
+        executor = None
+        results = (extract(path, *arguments) for path in files)
+    try:
+        for path, file_size, records in results:
+            if records is None:
+                status = 1
+                continue
+            count += 1
+            size += file_size
+            for record in records:
+                sys.stdout.write(json.dumps(record, ensure_ascii=False))
+                sys.stdout.write('\n')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    sys.stdout.flush()
+    elapsed = max(time.monotonic() - start, 1e-9)
+    megabytes = size / 2 ** 20
+    print('{} documents, {:.2f} MB in {:.2f} s: {:.1f} docs/s, {:.2f} MB/s'
+          .format(count, megabytes, elapsed, count / elapsed,
+                  megabytes / elapsed), file=sys.stderr)
+    return status
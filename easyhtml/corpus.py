@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import gzip
+import io
+import os
+import tarfile
+import zipfile
+
+from . import parser as html_parser
+from . import source
+
+__all__ = ('iter_members', 'iter_documents', 'iter_results')
+
+
+def iter_members(path):
+    """
+    Yields pairs (name, stream) for all files in an archive.
+    Streams are binary file objects that decompress data
+    while they are read and are valid until the next pair
+    is yielded.
+
+    :path: a path of the archive, type str
+
+    Supported archives are tar (including compressed ones),
+    zip and gzip. Any other file is considered as a single
+    uncompressed document.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as stream:
+                    yield info.filename, stream
+    elif tarfile.is_tarfile(path):
+        # open the archive in the stream mode to read
+        # members one by one without seeking
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                yield member.name, archive.extractfile(member)
+    else:
+        name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            is_gzip = f.read(2) == b'\x1f\x8b'
+        if is_gzip:
+            # a name of the document is a name of the file
+            # without the extension of the archive
+            name = os.path.splitext(name)[0]
+            opener = gzip.open
+        else:
+            opener = open
+        with opener(path, 'rb') as stream:
+            yield name, stream
+
+
+def iter_documents(path, encoding=None, chunk_size=65536, **options):
+    """
+    Parses all documents in an archive and yields
+    pairs (name, document) where document is an
+    HTMLDocument object.
+
+    :path: a path of the archive, type str
+    :encoding: an encoding of documents, it's detected for
+               each document if not specified, type str
+    :chunk_size: a size of chunks fed to the parser, type int
+
+    Other keyword arguments are passed to DOMParser. The same
+    parser is used for all documents.
+    """
+    with html_parser.default_pool.parser(**options) as parser:
+        for name, stream in iter_members(path):
+            try:
+                document = source.parse_stream(stream, encoding,
+                                               chunk_size, parser)
+            except Exception:
+                # prepare the parser for the next document
+                parser.reset()
+                raise
+            yield name, document
+
+
+def process_document(func, name, data, encoding, options):
+    """
+    Parses a document and returns a result of the function
+    called with its name and the HTMLDocument object.
+
+    It's executed by worker processes of iter_results.
+    """
+    document = source.parse_stream(io.BytesIO(data), encoding, **options)
+    return func(name, document)
+
+
+def iter_results(path, func, workers=None, encoding=None, **options):
+    """
+    Parses all documents in an archive in worker processes
+    and yields pairs (name, result) where result is the value
+    returned by func(name, document) in the order of documents
+    in the archive.
+
+    :path: a path of the archive, type str
+    :func: a function to process a document, it should be
+           defined at the top level of a module, type callable
+    :workers: a count of worker processes, by default
+              the count of processors is used, type int
+    :encoding: an encoding of documents, it's detected for
+               each document if not specified, type str
+
+    Other keyword arguments are passed to DOMParser. Documents
+    are not returned from workers, so func should extract all
+    necessary data and return a picklable result.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        # limit a count of submitted documents to keep
+        # in memory only those being processed
+        limit = 2 * (workers or os.cpu_count() or 1)
+        futures = deque()
+        for name, stream in iter_members(path):
+            futures.append((name, executor.submit(
+                process_document, func, name, stream.read(),
+                encoding, options)))
+            if len(futures) >= limit:
+                name, future = futures.popleft()
+                yield name, future.result()
+        while futures:
+            name, future = futures.popleft()
+            yield name, future.result()
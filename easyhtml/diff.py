@@ -0,0 +1,211 @@
+from collections import namedtuple
+from difflib import SequenceMatcher
+import hashlib
+
+from . import dom
+
+__all__ = ('Change', 'content_hash', 'diff')
+
+# a change found by diff:
+# kind - 'inserted', 'removed' or 'changed'
+# old  - an element of the old document or None if it's inserted
+# new  - an element of the new document or None if it's removed
+Change = namedtuple('Change', 'kind old new')
+
+
+def _digest(kind, *parts):
+    """
+    Returns a hex digest of a kind of the element and parts
+    of its content. Parts are separated, so different
+    sequences of parts give different digests.
+    """
+    h = hashlib.blake2b(kind.encode(), digest_size=16)
+    for part in parts:
+        data = part.encode('utf-8', 'surrogatepass')
+        h.update(len(data).to_bytes(8, 'little'))
+        h.update(data)
+    return h.hexdigest()
+
+
+def _get_cached_hash(container):
+    """
+    Returns a cached hash of the container or None.
+    """
+    cache = container._cache
+    if cache is not None:
+        return cache.get('hash')
+    return None
+
+
+def _hash_element(element, hashes):
+    """
+    Returns a hash of an element of a container.
+
+    :element: an element, type HTMLElement
+    :hashes: hashes of tags computed by the current walk,
+             type dict {id: str}
+    """
+    if isinstance(element, dom.HTMLTag):
+        value = _get_cached_hash(element)
+        return value if value is not None else hashes[id(element)]
+    if isinstance(element, dom.TextNode):
+        return _digest('text', dom.HTMLElementMixin.raw_html.fget(element))
+    if isinstance(element, dom.OpaqueText):
+        return _digest('opaque', element._raw_html)
+    return _digest('hidden', element._raw_html)
+
+
+def _hash_container(container, hashes):
+    """
+    Returns a hash of a container whose nested tags are hashed.
+    """
+    if isinstance(container, dom.HTMLTag):
+        parts = ['<' + container.tag_name]
+        # the order of attributes does not matter
+        for name, value in sorted(container.get_attr_items(),
+                                  key=lambda item: item[0]):
+            parts.append(name)
+            parts.append('\0' if value is None else '=' + value)
+    else:
+        doctype = container.doctype
+        parts = ['' if doctype is None else doctype._raw_html]
+    parts.extend(_hash_element(e, hashes) for e in container.elements)
+    return _digest('tag', *parts)
+
+
+def content_hash(container):
+    """
+    Returns a structural hash of the container as a hex string.
+
+    :container: a document or a tag, type HTMLDocument or HTMLTag
+
+    The hash is computed bottom-up over the name and attributes
+    of each tag and hashes of its elements, so equal subtrees
+    have equal hashes regardless of white space between tags
+    in the source and of the order of attributes. Hashes are cached the same
+    way as raw_html and are dropped when the content changes.
+    Nested tags are walked without recursion.
+    """
+    value = _get_cached_hash(container)
+    if value is not None:
+        return value
+    # hashes of tags computed by this walk, they are
+    # not cached by containers if the cache is disabled
+    hashes = {}
+    stack = [(container, False)]
+    while stack:
+        element, ready = stack.pop()
+        if not ready:
+            if _get_cached_hash(element) is None:
+                # hash nested tags first
+                stack.append((element, True))
+                stack.extend((tag, False) for tag in element.tags)
+            continue
+        value = _hash_container(element, hashes)
+        hashes[id(element)] = element._get_cached('hash', lambda: value)
+    return hashes[id(container)]
+
+
+def _get_key(element):
+    """
+    Returns a key to compare elements of two containers.
+    """
+    if isinstance(element, dom.HTMLTag):
+        return content_hash(element)
+    return _hash_element(element, None)
+
+
+def _same_kind(old, new):
+    """
+    Checks whether the old element could be compared
+    with the new one instead of replacing it.
+    """
+    if isinstance(old, dom.HTMLTag):
+        return isinstance(new, dom.HTMLTag) and old.tag_name == new.tag_name
+    return type(old) is type(new)
+
+
+def _get_attrs(tag):
+    """
+    Returns attributes of the tag sorted by names.
+    """
+    return sorted(tag.get_attr_items(), key=lambda item: item[0])
+
+
+def _get_doctype(document):
+    """
+    Returns a code of the doctype declaration of the document.
+    """
+    doctype = document.doctype
+    return None if doctype is None else doctype._raw_html
+
+
+def _compare(old, new):
+    """
+    Returns a list of changes and pairs of tags to compare
+    further in the document order for two containers with
+    different content hashes.
+    """
+    items = []
+    if isinstance(old, dom.HTMLTag):
+        if _get_attrs(old) != _get_attrs(new):
+            items.append(Change('changed', old, new))
+    elif _get_doctype(old) != _get_doctype(new):
+        items.append(Change('changed', old.doctype, new.doctype))
+    old_elements = list(old.elements)
+    new_elements = list(new.elements)
+    matcher = SequenceMatcher(None, [_get_key(e) for e in old_elements],
+                              [_get_key(e) for e in new_elements],
+                              autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == 'equal':
+            continue
+        olds = old_elements[i1:i2]
+        news = new_elements[j1:j2]
+        # compare elements of the same kind in pairs,
+        # the rest are removed or inserted
+        while olds and news and _same_kind(olds[0], news[0]):
+            o, n = olds.pop(0), news.pop(0)
+            if isinstance(o, dom.HTMLTag):
+                items.append((o, n))
+            else:
+                items.append(Change('changed', o, n))
+        items.extend(Change('removed', o, None) for o in olds)
+        items.extend(Change('inserted', None, n) for n in news)
+    return items
+
+
+def diff(old_doc, new_doc):
+    """
+    Returns a list of Change tuples that turn the old document
+    (or tag) into the new one in the document order.
+
+    :old_doc: an old version, type HTMLDocument or HTMLTag
+    :new_doc: a new version, type HTMLDocument or HTMLTag
+
+    Subtrees with equal content hashes are skipped. Elements of
+    containers that differ are matched by their hashes; unmatched
+    tags with the same name at the same place are compared
+    further, so a change deep in the document is reported as
+    a change of the smallest element that contains it:
+
+    'changed'  - a text, a comment or a doctype is changed, or
+                 attributes of a tag are changed (its elements are
+                 compared separately)
+    'inserted' - an element is added to the new version
+    'removed'  - an element is missing in the new version
+    """
+    changes = []
+    # the stack contains found changes and pairs of tags to
+    # compare, it's used instead of recursion and keeps
+    # the document order of changes
+    stack = [(old_doc, new_doc)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Change):
+            changes.append(item)
+            continue
+        old, new = item
+        if content_hash(old) != content_hash(new):
+            stack.extend(reversed(_compare(old, new)))
+    return changes
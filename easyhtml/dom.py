@@ -1,15 +1,31 @@
 from abc import ABCMeta, abstractproperty, abstractmethod
 from html.entities import name2codepoint
 import textwrap
-import itertools
 import re
 
 __all__ = (
     'HTMLTag', 'HTMLDocument', 'PlainText',
-    'NumEntity', 'NamedEntity', 'HTMLComment',
+    'NumEntity', 'NamedEntity', 'HTMLComment', 'OpaqueText',
 )
 
 
+def parse_query(query):
+    """
+    Splits a query into conditions and returns a list of tuples
+    with the name and the value of each attribute in the query.
+
+    :query: a query to check attributes of tags, type str
+
+    A query should have following format:
+
+    attr1=value1; attr2=value2; attr3=value3 ...
+    """
+    # attributes could be separated by ; with several spaces, so
+    # strip spaces before splitting a query component into name and value
+    return list(map(lambda item: tuple(item.strip(' ').split('=')),
+                query.split(';')))
+
+
 class HTMLElement(metaclass=ABCMeta):
 
     # returns a raw HTML code of an element
@@ -21,6 +37,47 @@ class HTMLElement(metaclass=ABCMeta):
     def __str__(self): pass
 
 
+class SourceElement:
+    """
+    A base class for elements that know their position in
+    the source of the document. Offsets are set by the parser
+    if it keeps the source of the document.
+    """
+
+    # offsets of the element in the source of the document
+    source_start = None
+    source_end = None
+    # a container the element is appended to
+    parent = None
+    # whether white space dropped by the parser precedes the element
+    space_before = False
+
+    def _get_source(self, start, end):
+        """
+        Returns a part of the source of the document
+        between specified offsets or None if the source
+        or offsets are unknown.
+        """
+        if start is None or end is None:
+            return None
+        element = self
+        # go up to the document
+        while element.parent is not None:
+            element = element.parent
+        if not isinstance(element, HTMLDocument) or element.source is None:
+            return None
+        return element.source[start:end]
+
+    @property
+    def outer_source(self):
+        """
+        Returns an original HTML code of the element as it is
+        in the source of the document or None if the source
+        is not kept.
+        """
+        return self._get_source(self.source_start, self.source_end)
+
+
 class HTMLSimpleElement(HTMLElement):
     """
     A base class for simple HTML elements.
@@ -60,14 +117,18 @@ class PlainText(HTMLText):
     special characters in the document.
     """
 
-    def __init__(self, text):
+    def __init__(self, text, raw_html=None):
         """
         :text: a text of the element, type str
+        :raw_html: a raw HTML code of the text if it differs from the text
+                   (e.g. contains codes of entities), type str
         """
         # replace sequenses of space symbols
         # with single spaces (as it looks in web browsers)
         data = re.sub('\s+', ' ', text)
-        HTMLText.__init__(self, text, data)
+        if raw_html is None:
+            raw_html = text
+        HTMLText.__init__(self, raw_html, data)
 
 
 class NamedEntity(HTMLText):
@@ -107,7 +168,7 @@ class NumEntity(HTMLText):
         HTMLText.__init__(self, raw_html, data)
 
 
-class HTMLHiddenElement(HTMLSimpleElement):
+class HTMLHiddenElement(SourceElement, HTMLSimpleElement):
     """
     A base class for hidden HTML elements that are not visible
     on the page such as comments of doctype declaration.
@@ -161,6 +222,27 @@ class DoctypeDeclaration(HTMLHiddenElement):
         HTMLHiddenElement.__init__(self, raw_html)
 
 
+class OpaqueText(HTMLHiddenElement):
+    """
+    The content of a raw text element such as <script> or <style>
+    kept as it is. It's not a part of the text of the document.
+    """
+
+    def __init__(self, text):
+        """
+        :text: the content of the element, type str
+        """
+        # the content is stored once and is not normalized
+        HTMLHiddenElement.__init__(self, text)
+
+    @property
+    def text(self):
+        """
+        Returns the content of the element.
+        """
+        return self._raw_html
+
+
 class HTMLElementMixin(HTMLElement):
 
     def __str__(self):
@@ -193,9 +275,17 @@ class HTMLContainer(metaclass=ABCMeta):
     def __init__(self):
         # a list of contained elements
         self.elements = []
+        # a container this one is appended to
+        self.parent = None
+        # indicates whether any data derived from the content
+        # of the container (e.g. an index) is stored in the container
+        # or its ancestors, see ElementTagContainer._invalidate
+        self._cached = False
+        # cached raw HTML code and text of the container
+        self._cache = None
 
 
-class TextNode(HTMLElementMixin, HTMLContainer):
+class TextNode(SourceElement, HTMLElementMixin, HTMLContainer):
     """
     A container for HTMLText elements.
     """
@@ -221,6 +311,10 @@ class TextNode(HTMLElementMixin, HTMLContainer):
         :element: an element to add, type HTMLText
         """
         self.elements.append(element)
+        # a text of the node is changed, so all data
+        # derived from it are not valid anymore
+        if self.parent is not None:
+            self.parent._invalidate()
 
 
 class TagContainer(HTMLContainer):
@@ -257,7 +351,47 @@ class TagContainer(HTMLContainer):
     def get_element_by_id(self, e_id): pass
 
 
-class ElementTagContainer(HTMLElementMixin, TagContainer):
+class ElementTagContainer(SourceElement, HTMLElementMixin, TagContainer):
+
+    # whether white space dropped by the parser
+    # follows the last element of the container
+    space_at_end = False
+    # whether to cache raw HTML code and text of containers,
+    # could be switched off to save memory
+    cache_enabled = True
+
+    def _get_cached(self, key, func):
+        """
+        Returns a cached value with specified key. If the value
+        is not cached, gets it from the function and caches it.
+
+        :key: a key of the value, type str
+        :func: a function that returns the value, type callable
+
+        Cached values are dropped when the content of the container
+        or of any nested container is changed.
+
+        It's safe for concurrent readers: the cache is read once, so
+        a value could be computed twice but it's never lost while read.
+        """
+        cache = self._cache
+        if cache is not None and key in cache:
+            return cache[key]
+        value = func()
+        if self.cache_enabled:
+            cache = self._cache
+            if cache is None:
+                cache = self._cache = {}
+            cache[key] = value
+            self._cached = True
+        return value
+
+    def __str__(self):
+        """
+        A text of the container consists of text of all
+        contained elements.
+        """
+        return self._get_cached('str', lambda: HTMLElementMixin.__str__(self))
 
     @property
     def inner_html(self):
@@ -276,16 +410,30 @@ class ElementTagContainer(HTMLElementMixin, TagContainer):
         # filters all elements and yields HTMLTag objects only
         return filter(lambda e: isinstance(e, HTMLTag), self.elements)
 
+    @property
+    def owner_document(self):
+        """
+        Returns an HTMLDocument object the container belongs to
+        or None if the container is not appended to a document.
+        """
+        element = self
+        # go up to the topmost container
+        while element.parent is not None:
+            element = element.parent
+        if isinstance(element, HTMLDocument):
+            return element
+        return None
+
     def get_all_tags(self):
         """
-        Returns a generator that recursively yields all nested tags.
+        Returns a generator that recursively yields all nested tags
+        in the document order.
         """
-        tags = self.tags  # tags of THIS object
-        # recursively add to the result all
-        # children tags including their children
+        # each tag is followed by all its
+        # nested tags and then by the next tag
         for tag in self.tags:
-            tags = itertools.chain(tags, tag.get_all_tags())
-        return tags
+            yield tag
+            yield from tag.get_all_tags()
 
     def append(self, element):
         """
@@ -300,12 +448,206 @@ class ElementTagContainer(HTMLElementMixin, TagContainer):
                not isinstance(self.elements[-1], TextNode):
                 # if the last added element is not
                 # a TextNode - create it
-                self.elements.append(TextNode())
+                text_node = TextNode()
+                text_node.parent = self
+                self.elements.append(text_node)
             # add an HTMLText object to the last element
             self.elements[-1].append(element)
         else:
             # another objects just append to the list
+            element.parent = self
             self.elements.append(element)
+        # the content has been changed, so all data
+        # derived from it are not valid anymore
+        self._invalidate()
+
+    def _invalidate(self):
+        """
+        Drops data derived from the content of the container
+        in the container itself and in all its ancestors.
+        """
+        element = self
+        # if a container does not store derived data,
+        # its ancestors do not store them as well,
+        # so stop at the first such container
+        while element is not None and element._cached:
+            element._clear_cache()
+            element = element.parent
+
+    def _clear_cache(self):
+        """
+        Drops data derived from the content of the container.
+        """
+        self._cached = False
+        self._cache = None
+
+    def _get_index(self):
+        """
+        Returns an AttributeIndex of the document the container
+        belongs to or None if the document is not indexed.
+        """
+        document = self.owner_document
+        if document is None:
+            return None
+        return document.get_index()
+
+    def _get_text_index(self):
+        """
+        Returns a TextIndex of the document the container
+        belongs to or None if the document is not indexed.
+        """
+        document = self.owner_document
+        if document is None:
+            return None
+        return document.get_text_index()
+
+    def memory_footprint(self, heaviest=0):
+        """
+        Returns a MemoryFootprint object with an estimated size
+        of the container and its content.
+
+        :heaviest: a count of the heaviest nested tags to report
+                   in the heaviest field of the footprint, type int
+        """
+        # import here to avoid a circular import
+        from .memory import measure
+        return measure(self, heaviest)
+
+    def freeze(self):
+        """
+        Returns an immutable copy of the container and its content
+        that caches raw HTML code, text and results of searches.
+        """
+        # import here to avoid a circular import
+        from .frozen import freeze
+        return freeze(self)
+
+    @property
+    def content_hash(self):
+        """
+        Returns a structural hash of the container and its content
+        as a hex string, see easyhtml.diff.content_hash.
+        """
+        # import here to avoid a circular import
+        from .diff import content_hash
+        return content_hash(self)
+
+    def node_features(self):
+        """
+        Returns a NodeFeatures tuple with NumPy arrays of features
+        of nested tags, see easyhtml.features.node_features.
+        """
+        # import here to avoid a circular import
+        from .features import node_features
+        return node_features(self)
+
+    def serialize(self, mode='minified'):
+        """
+        Returns an HTML code of the container in specified mode.
+
+        :mode: a mode of serialization, one of easyhtml.serializer.modes,
+               type str
+        """
+        # import here to avoid a circular import
+        from .serializer import serialize
+        return serialize(self, mode)
+
+    def write(self, file, mode='minified'):
+        """
+        Writes an HTML code of the container in specified mode to
+        a file and returns a count of written characters.
+
+        :file: a file to write to, type a text file object
+        :mode: a mode of serialization, one of easyhtml.serializer.modes,
+               type str
+        """
+        # import here to avoid a circular import
+        from .serializer import write
+        return write(self, file, mode)
+
+    def get_all_text_nodes(self, opaque=False):
+        """
+        Returns a generator that recursively yields
+        all nested text nodes in the document order.
+
+        :opaque: whether to yield OpaqueText elements as well, type bool
+        """
+        for element in self.elements:
+            if isinstance(element, TextNode):
+                yield element
+            elif isinstance(element, HTMLTag):
+                yield from element.get_all_text_nodes(opaque)
+            elif opaque and isinstance(element, OpaqueText):
+                yield element
+
+    def get_text(self, opaque=False):
+        """
+        Returns a text of the container. It's the same as str()
+        unless the content of OpaqueText elements is included.
+
+        :opaque: whether to include the content of
+                 OpaqueText elements, type bool
+        """
+        if not opaque:
+            return str(self)
+        return ''.join(e.text if isinstance(e, OpaqueText) else
+                       e.get_text(True) if isinstance(e, HTMLTag) else str(e)
+                       for e in self.elements)
+
+    def find_text(self, term, opaque=False):
+        """
+        Returns a list of nested TextNode objects which visible
+        text contains specified term in the document order.
+
+        :term: a word or several words to search, type str
+        :opaque: whether to search in the content of OpaqueText
+                 elements as well and return found ones, type bool
+
+        The search is case insensitive and matches whole words only,
+        so the term "total" is found in "Total: 10", but not in "Totally".
+        """
+        from .index import tokenize, text_matches
+        index = self._get_text_index()
+        # the index does not contain opaque elements
+        if index is not None and not opaque:
+            nodes = index.find(term, self)
+            if nodes is not None:
+                return nodes
+        words = tokenize(term)
+        if not words:
+            return []
+        # check text of all nested nodes
+        return [n for n in self.get_all_text_nodes(opaque)
+                if text_matches(n.text if isinstance(n, OpaqueText)
+                                else str(n), words)]
+
+    def get_tags_containing(self, term, direct=False, opaque=False):
+        """
+        Returns an HTMLCollection object contains nested tags
+        which visible text contains specified term.
+
+        :term: a word or several words to search, type str
+        :direct: whether to return only tags which own text nodes
+                 contain the term (not the text of nested tags),
+                 type bool
+        :opaque: whether to search in the content of OpaqueText
+                 elements as well, type bool
+        """
+        found = set()
+        for node in self.find_text(term, opaque):
+            tag = node.parent
+            # add all ancestors of the text node nested in the container
+            while tag is not None and tag is not self and tag not in found:
+                found.add(tag)
+                if direct:
+                    break
+                tag = tag.parent
+        index = self._get_text_index()
+        if index is not None and all(t in index.ranges for t in found):
+            # sort found tags in the document order
+            return HTMLCollection(sorted(found, key=index.get_position))
+        return HTMLCollection(filter(lambda t: t in found,
+                              self.get_all_tags()))
 
     def get_tags_by_name(self, name):
         """
@@ -333,6 +675,12 @@ class ElementTagContainer(HTMLElementMixin, TagContainer):
         query properly, i.e. have all specified attributes
         and their values equal to ones from the query.
         """
+        index = self._get_index()
+        if index is not None:
+            # the index returns None if it could not process the query
+            tags = index.find(parse_query(query), self)
+            if tags is not None:
+                return HTMLCollection(tags)
         # use HTMLTag.check_attrs method to check a tag
         # for matching to the query
         return HTMLCollection(filter(lambda e: e.check_attrs(query),
@@ -345,6 +693,11 @@ class ElementTagContainer(HTMLElementMixin, TagContainer):
 
         :e_id: an ID of the tag, type str
         """
+        index = self._get_index()
+        if index is not None:
+            tags = index.find([('id', e_id)], self)
+            if tags is not None:
+                return tags[0] if tags else None
         # assume that ID is unique and there is
         # one tag with such ID only
         for tag in self.get_all_tags():
@@ -364,9 +717,34 @@ class HTMLDocument(ElementTagContainer):
     elements and provides an API to access them.
     """
 
-    def __init__(self):
+    # the source of the document if it's kept by the parser
+    source = None
+    # an offset of a construct (e.g. a comment) which is not complete
+    # at the end of the source, so it's parsed as a text, it's set
+    # if the source is kept
+    unparsed_start = None
+    # counters collected by the parser if it's asked to collect them
+    parse_stats = None
+    # names of limits of the parser exceeded by the document
+    exceeded_limits = ()
+
+    def __init__(self, indexed=False, text_indexed=False):
+        """
+        :indexed: whether to use an attribute index, type bool
+        :text_indexed: whether to use a text index, type bool
+
+        If the document is indexed, an AttributeIndex is built
+        on first search by attributes and is used by get_children
+        and get_element_by_id methods instead of checking all tags.
+        The same way a TextIndex is built on first search by text
+        and is used by find_text and get_tags_containing methods.
+        """
         ElementTagContainer.__init__(self)
         self._doctype = None
+        self.indexed = indexed
+        self.text_indexed = text_indexed
+        self._index = None
+        self._text_index = None
 
     @property
     def single(self):
@@ -382,11 +760,25 @@ class HTMLDocument(ElementTagContainer):
         """
         return False
 
+    @property
+    def partial(self):
+        """
+        Indicates whether the document is incomplete because
+        it exceeded limits of the parser.
+        """
+        return bool(self.exceeded_limits)
+
     @property
     def raw_html(self):
         """
         Returns a raw HTML code of an HTML document.
         """
+        return self._get_cached('raw_html', self._build_raw_html)
+
+    def _build_raw_html(self):
+        """
+        Builds a raw HTML code of an HTML document.
+        """
         # raw_html contains a doctype declaration if it exists
         # and inner HTML
         decl = ''
@@ -407,6 +799,124 @@ class HTMLDocument(ElementTagContainer):
         Sets a DoctypeDeclaration object.
         """
         self._doctype = decl
+        self._invalidate()
+
+    def build_index(self):
+        """
+        Builds an AttributeIndex of the document and
+        makes the document indexed.
+
+        The index is dropped when the document is changed
+        and is rebuilt on the next search.
+        """
+        # import here to avoid a circular import
+        from .index import AttributeIndex
+        self.indexed = True
+        index = self._index = AttributeIndex(self)
+        return index
+
+    def get_index(self):
+        """
+        Returns an AttributeIndex of the document building it
+        if necessary. Returns None if the document is not indexed.
+        """
+        if not self.indexed:
+            return None
+        # concurrent readers could build the index twice, but
+        # each of them gets a complete one
+        index = self._index
+        if index is None:
+            index = self.build_index()
+        return index
+
+    def build_text_index(self):
+        """
+        Builds a TextIndex of the document and makes
+        the document text indexed.
+
+        The index is dropped when the document is changed
+        and is rebuilt on the next search.
+        """
+        # import here to avoid a circular import
+        from .index import TextIndex
+        self.text_indexed = True
+        index = self._text_index = TextIndex(self)
+        return index
+
+    def get_text_index(self):
+        """
+        Returns a TextIndex of the document building it if necessary.
+        Returns None if the document is not text indexed.
+        """
+        if not self.text_indexed:
+            return None
+        # concurrent readers could build the index twice, but
+        # each of them gets a complete one
+        index = self._text_index
+        if index is None:
+            index = self.build_text_index()
+        return index
+
+    def _clear_cache(self):
+        """
+        Drops indexes of the document.
+        """
+        ElementTagContainer._clear_cache(self)
+        self._index = None
+        self._text_index = None
+
+
+class AttributeDict(dict):
+    """
+    A dictionary of attributes of a tag that drops
+    cached data of the tag when it is changed.
+    """
+
+    def __init__(self, tag, attrs):
+        """
+        :tag: an owner of attributes, type HTMLTag
+        :attrs: attributes, type an iterable of tuples (name, value)
+        """
+        dict.__init__(self, attrs)
+        self._tag = tag
+
+    def _changed(self):
+        # attributes could be changed by pickle
+        # before the owner is restored
+        tag = getattr(self, '_tag', None)
+        if tag is not None:
+            tag._invalidate()
+
+    def __setitem__(self, name, value):
+        dict.__setitem__(self, name, value)
+        self._changed()
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self._changed()
+
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+
+    def pop(self, *args):
+        value = dict.pop(self, *args)
+        self._changed()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._changed()
+        return item
+
+    def setdefault(self, name, value=None):
+        value = dict.setdefault(self, name, value)
+        self._changed()
+        return value
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._changed()
 
 
 class HTMLTag(ElementTagContainer):
@@ -423,6 +933,11 @@ class HTMLTag(ElementTagContainer):
         'wbr',
     )
 
+    # offsets of the content of the tag
+    # (between the start tag and the end tag)
+    inner_start = None
+    inner_end = None
+
     def __init__(self, name, attrs):
         """
         :name: a name of the tag, type str
@@ -432,8 +947,47 @@ class HTMLTag(ElementTagContainer):
         """
         ElementTagContainer.__init__(self)
         self.tag_name = name
-        # create a dictionary of attributes
-        self.attrs = {k: v for k, v in attrs}
+        # most tags are never asked about attributes, so keep
+        # the list of attributes as it is and create a dictionary
+        # of attributes on first access to the attrs property
+        if not isinstance(attrs, (list, tuple)):
+            attrs = list(attrs)
+        self._attrs = attrs
+
+    @property
+    def attrs(self):
+        """
+        Returns a dictionary of attributes. Changes made
+        in the dictionary drop cached data of the tag.
+        """
+        attrs = self._attrs
+        if type(attrs) is not AttributeDict:
+            attrs = self._attrs = AttributeDict(self, attrs)
+        return attrs
+
+    def get_attr_items(self):
+        """
+        Returns an iterable of pairs (name, value) of attributes
+        without creating a dictionary of attributes.
+        """
+        attrs = self._attrs
+        if type(attrs) is AttributeDict:
+            return attrs.items()
+        if len(attrs) > 1 and len(set(a for a, v in attrs)) < len(attrs):
+            # an attribute is duplicated, the last value is used
+            # the same way as it's done by the dictionary
+            return dict(attrs).items()
+        return attrs
+
+    @attrs.setter
+    def attrs(self, attrs):
+        """
+        Replaces attributes of the tag.
+
+        :attrs: new attributes, type dict
+        """
+        self._attrs = AttributeDict(self, attrs.items())
+        self._invalidate()
 
     @property
     def single(self):
@@ -454,7 +1008,7 @@ class HTMLTag(ElementTagContainer):
         # begins with <tag_name
         text = '<' + self.tag_name
         # then append all attributes
-        for attr, value in self.attrs.items():
+        for attr, value in self.get_attr_items():
             text += ' {}="{}"'.format(attr, value)
         # and close > with a newline symbol
         text += '>\n'
@@ -473,6 +1027,12 @@ class HTMLTag(ElementTagContainer):
         """
         Returns a raw HTML code of the tag.
         """
+        return self._get_cached('raw_html', self._build_raw_html)
+
+    def _build_raw_html(self):
+        """
+        Builds a raw HTML code of the tag.
+        """
         # all tags have a start tag
         text = self.start_tag
         # single tags don't have a body
@@ -491,6 +1051,15 @@ class HTMLTag(ElementTagContainer):
             text += self.end_tag
         return text
 
+    @property
+    def inner_source(self):
+        """
+        Returns an original HTML code of the content of the tag
+        as it is in the source of the document or None if
+        the source is not kept.
+        """
+        return self._get_source(self.inner_start, self.inner_end)
+
     def get_attributes(self):
         """
         Returns a dictionary with attributes of the tag
@@ -504,7 +1073,15 @@ class HTMLTag(ElementTagContainer):
 
         :name: a name of attribute, type str
         """
-        return self.attrs.get(name)
+        attrs = self._attrs
+        if type(attrs) is AttributeDict:
+            return attrs.get(name)
+        # search in the list of attributes, the last value
+        # is used the same way as it's done by the dictionary
+        for attr, value in reversed(attrs):
+            if attr == name:
+                return value
+        return None
 
     def check_attr(self, name, value):
         """
@@ -533,12 +1110,7 @@ class HTMLTag(ElementTagContainer):
 
         attr1=value1; attr2=value2; attr3=value3 ...
         """
-        # split query to conditions and make a list of tuples
-        # with the name and the value of each attribute in the query
-        # attributes could be separated by ; with several spaces, so
-        # strip spaces before splitting a query component into name and value
-        attrs = list(map(lambda item: tuple(item.strip(' ').split('=')),
-                     query.split(';')))
+        attrs = parse_query(query)
         # tuples would be passed to HTMLTag.check_attr method
         # as separate arguments
         # check all attributes and return True only if those all match
@@ -619,23 +1191,9 @@ class HTMLCollection(TagContainer):
         self.elements = list(items)
 
     def __iter__(self):
-        self._index = 0
-        return self
-
-    def __next__(self):
-        try:
-            # return current element while
-            # it is present
-            return self.elements[self._index]
-        except:
-            # stop iteration when there is
-            # no element with such index
-            raise StopIteration
-        finally:
-            # finally increase an index
-            # (get the next element in the
-            # next iteration)
-            self._index += 1
+        # each loop gets its own iterator, so the same collection
+        # could be iterated by nested loops and by several threads
+        return iter(self.elements)
 
     def __len__(self):
         """
@@ -694,6 +1252,21 @@ class HTMLCollection(TagContainer):
         # creates a collection using get_children method.
         return self._get_collection(lambda e: e.get_children(query))
 
+    def get_tags_containing(self, term, direct=False, opaque=False):
+        """
+        Search tags which visible text contains specified term
+        in contained elements and returns them as a collection.
+
+        :term: a word or several words to search, type str
+        :direct: whether to return only tags which own text nodes
+                 contain the term, type bool
+        :opaque: whether to search in the content of OpaqueText
+                 elements as well, type bool
+        """
+        # creates a collection using get_tags_containing method.
+        return self._get_collection(
+            lambda e: e.get_tags_containing(term, direct, opaque))
+
     def get_element(self, index):
         """
         Returns an element with specified index
@@ -765,8 +1338,10 @@ class HTMLCollection(TagContainer):
         # one tag with such ID only
         # recursively search in all elements
         for element in self.elements:
-            if isinstance(element, HTMLTag):
-                # for tags only
+            # for tags only (including proxies of tags of other
+            # documents, so the method is looked up in the class
+            # since missing attributes of containers are searches)
+            if hasattr(type(element), 'check_attr'):
                 # check ID of the tag first
                 if element.get_attr('id') == e_id:
                     return element
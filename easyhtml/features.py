@@ -0,0 +1,128 @@
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    # numpy is an optional dependency, it's
+    # required by node_features() only
+    numpy = None
+
+from . import dom
+
+__all__ = ('NodeFeatures', 'dtype', 'node_features')
+
+# fields of rows of the features array:
+# depth            - a count of tags from the container to the tag
+#                    inclusive, nested tags of the container have depth 1
+# children         - a count of child tags of the tag
+# text_length      - a length of the text of the tag, i.e. len(str(tag))
+# link_text_length - a length of the part of the text inside <a> tags
+#                    (the whole text if the tag is inside a link)
+# name_id          - an index of the name of the tag in names
+# parent           - a row of the parent tag or -1 if the parent
+#                    is the container
+fields = ('depth', 'children', 'text_length', 'link_text_length',
+          'name_id', 'parent')
+
+# features of nested tags of a container:
+# array - a structured NumPy array with the fields above,
+#         a row per tag in the document order
+# tags  - a list of tags, tags[row] is the tag of the row
+# names - a tuple of names of tags, names[name_id] is the name
+NodeFeatures = namedtuple('NodeFeatures', 'array tags names')
+
+# a NumPy dtype of rows of the features array
+dtype = None if numpy is None else \
+    numpy.dtype([(name, numpy.int64) for name in fields])
+
+
+def _walk(container):
+    """
+    Walks nested tags of the container once in the document order
+    and returns lists of columns collected on the way: parents,
+    depths, name ids, lengths of the own text (text nodes that are
+    direct children) and ends of subtrees (the row after the last
+    nested tag), tags and names.
+    """
+    tags = []
+    parents = []
+    depths = []
+    name_ids = []
+    own_text = []
+    ends = []
+    # a name of a tag -> its id
+    names = {}
+    # the stack contains pairs (tag, parent row) and rows
+    # of tags whose nested tags are all walked, it's used
+    # instead of recursion
+    stack = [(tag, -1) for tag in reversed(list(container.tags))]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, int):
+            ends[item] = len(tags)
+            continue
+        tag, parent = item
+        row = len(tags)
+        tags.append(tag)
+        parents.append(parent)
+        depths.append(1 if parent < 0 else depths[parent] + 1)
+        name_ids.append(names.setdefault(tag.tag_name, len(names)))
+        ends.append(row + 1)
+        length = 0
+        nested = []
+        for element in tag.elements:
+            if isinstance(element, dom.TextNode):
+                length += len(str(element))
+            elif isinstance(element, dom.HTMLTag):
+                nested.append((element, row))
+        own_text.append(length)
+        if nested:
+            stack.append(row)
+            stack.extend(reversed(nested))
+    return parents, depths, name_ids, own_text, ends, tags, tuple(names)
+
+
+def node_features(container):
+    """
+    Returns a NodeFeatures tuple with features of all nested tags
+    of the container in the document order. Requires NumPy.
+
+    :container: a document or a tag, type HTMLDocument or HTMLTag
+
+    Tags are walked once without recursion, the walk collects
+    parents, depths, names and lengths of texts of text nodes
+    only. Other features are computed from these columns by
+    array operations: counts of children are counted by parents,
+    lengths of texts are sums over ranges of subtrees (nested
+    tags of a tag follow it in the document order) and texts
+    inside links are found by ranges of <a> tags.
+    """
+    if numpy is None:
+        raise ImportError('node_features() requires numpy')
+    parents, depths, name_ids, own_text, ends, tags, names = \
+        _walk(container)
+    count = len(tags)
+    array = numpy.zeros(count, dtype=dtype)
+    parent = numpy.array(parents, dtype=numpy.int64)
+    end = numpy.array(ends, dtype=numpy.int64)
+    own = numpy.array(own_text, dtype=numpy.int64)
+    array['parent'] = parent
+    array['depth'] = depths
+    array['name_id'] = name_ids
+    array['children'] = numpy.bincount(parent[parent >= 0], minlength=count)
+    # the text of a tag is the text of its subtree, i.e. of
+    # rows from the tag to the end of the subtree
+    totals = numpy.concatenate(([0], numpy.cumsum(own)))
+    start = numpy.arange(count)
+    array['text_length'] = totals[end] - totals[start]
+    # rows inside <a> tags: +1 at the start of the subtree of
+    # each link and -1 at its end, the sum is positive inside
+    if 'a' in names:
+        links = numpy.flatnonzero(array['name_id'] == names.index('a'))
+        marks = numpy.zeros(count + 1, dtype=numpy.int64)
+        numpy.add.at(marks, links, 1)
+        numpy.add.at(marks, end[links], -1)
+        inside = numpy.cumsum(marks[:-1]) > 0
+        totals = numpy.concatenate(([0], numpy.cumsum(own * inside)))
+        array['link_text_length'] = totals[end] - totals[start]
+    return NodeFeatures(array, tags, names)
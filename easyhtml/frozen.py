@@ -0,0 +1,262 @@
+import sys
+from types import MappingProxyType
+
+from . import dom
+
+__all__ = ('FrozenError', 'FrozenDocument', 'FrozenTag', 'freeze')
+
+
+class FrozenError(TypeError):
+    """
+    Raised on attempts to change a frozen element.
+    """
+    pass
+
+
+class Frozen:
+    """
+    A base class for immutable copies of elements.
+    """
+
+    # fields of data derived from the content, they could be set
+    # on frozen elements since the content does not change
+    derived_fields = ('_cached', '_cache', '_index', '_text_index',
+                      'indexed', 'text_indexed')
+
+    # names of fields copied from the original element
+    copied_fields = ('_raw_html', 'data', 'parent',
+                     'source_start', 'source_end', 'space_before')
+
+    def __setattr__(self, name, value):
+        if name not in self.derived_fields:
+            raise FrozenError('frozen element could not be changed')
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise FrozenError('frozen element could not be changed')
+
+    def freeze(self):
+        """
+        Returns the element itself since it's frozen already.
+        """
+        return self
+
+
+class FrozenPlainText(Frozen, dom.PlainText):
+    pass
+
+
+class FrozenNamedEntity(Frozen, dom.NamedEntity):
+    pass
+
+
+class FrozenNumEntity(Frozen, dom.NumEntity):
+    pass
+
+
+class FrozenComment(Frozen, dom.HTMLComment):
+    pass
+
+
+class FrozenDoctype(Frozen, dom.DoctypeDeclaration):
+    pass
+
+
+class FrozenOpaqueText(Frozen, dom.OpaqueText):
+    pass
+
+
+class FrozenTextNode(Frozen, dom.TextNode):
+
+    copied_fields = ('parent', 'source_start', 'source_end',
+                     'space_before')
+
+    def append(self, element):
+        raise FrozenError('frozen element could not be changed')
+
+
+class FrozenContainer(Frozen):
+    """
+    A base class for frozen documents and tags. Nested tags are
+    kept in a tuple, raw HTML code, text and results of searches
+    are always cached since they never become invalid.
+    """
+
+    # frozen containers do not keep these fields until
+    # derived data are stored in them
+    _cached = False
+    _cache = None
+
+    @property
+    def tags(self):
+        """
+        Returns a tuple of tags contained by the object.
+        """
+        return self._tags
+
+    def append(self, element):
+        raise FrozenError('frozen element could not be changed')
+
+    def _invalidate(self):
+        # the content is never changed
+        pass
+
+    def _get_cached(self, key, func):
+        """
+        Returns a cached value with specified key. If the value
+        is not cached, gets it from the function and caches it.
+        Values are cached even if the cache is disabled.
+        """
+        cache = self._cache
+        if cache is None:
+            # concurrent calls could create several dictionaries,
+            # in that case values of one of them are computed again
+            cache = self._cache = {}
+        try:
+            return cache[key]
+        except KeyError:
+            value = cache[key] = func()
+            return value
+
+    def find_text(self, term, opaque=False):
+        return list(self._get_cached(
+            ('find_text', term, opaque),
+            lambda: tuple(super(FrozenContainer, self).find_text(
+                term, opaque))))
+
+    def get_tags_containing(self, term, direct=False, opaque=False):
+        return dom.HTMLCollection(self._get_cached(
+            ('get_tags_containing', term, direct, opaque),
+            lambda: tuple(super(FrozenContainer, self).get_tags_containing(
+                term, direct, opaque).elements)))
+
+    def get_tags_by_name(self, name):
+        return dom.HTMLCollection(self._get_cached(
+            ('get_tags_by_name', name),
+            lambda: tuple(super(FrozenContainer, self).get_tags_by_name(
+                name).elements)))
+
+    def get_children(self, query):
+        return dom.HTMLCollection(self._get_cached(
+            ('get_children', query),
+            lambda: tuple(super(FrozenContainer, self).get_children(
+                query).elements)))
+
+    def get_element_by_id(self, e_id):
+        return self._get_cached(
+            ('get_element_by_id', e_id),
+            lambda: super(FrozenContainer, self).get_element_by_id(e_id))
+
+
+class FrozenDocument(FrozenContainer, dom.HTMLDocument):
+    """
+    An immutable copy of an HTMLDocument.
+    """
+
+    copied_fields = ('_doctype', 'indexed', 'text_indexed', 'source',
+                     'parse_stats', 'exceeded_limits',
+                     'source_start', 'source_end', 'space_at_end')
+
+    _index = None
+    _text_index = None
+
+
+class FrozenTag(FrozenContainer, dom.HTMLTag):
+    """
+    An immutable copy of an HTMLTag. Attributes are kept
+    in a tuple and are available as a read-only mapping.
+    """
+
+    copied_fields = ('tag_name', '_attrs', 'parent', 'source_start',
+                     'source_end', 'inner_start', 'inner_end',
+                     'space_before', 'space_at_end')
+
+    @property
+    def attrs(self):
+        """
+        Returns a read-only mapping of attributes.
+        """
+        return self._get_cached(
+            'attrs', lambda: MappingProxyType(dict(self._attrs)))
+
+
+# classes of elements -> classes of their frozen copies
+frozen_classes = {
+    dom.PlainText: FrozenPlainText,
+    dom.NamedEntity: FrozenNamedEntity,
+    dom.NumEntity: FrozenNumEntity,
+    dom.HTMLComment: FrozenComment,
+    dom.DoctypeDeclaration: FrozenDoctype,
+    dom.OpaqueText: FrozenOpaqueText,
+    dom.TextNode: FrozenTextNode,
+    dom.HTMLDocument: FrozenDocument,
+    dom.HTMLTag: FrozenTag,
+}
+
+
+def get_frozen_class(cls):
+    """
+    Returns a class of frozen copies of elements of the class.
+    Subclasses of elements are frozen as their base classes.
+    """
+    for base in cls.__mro__:
+        if base in frozen_classes:
+            return frozen_classes[base]
+    raise TypeError('could not freeze {}'.format(cls.__name__))
+
+
+def _copy(element, parent):
+    """
+    Returns a frozen copy of the element without its content.
+    """
+    cls = get_frozen_class(type(element))
+    copy = object.__new__(cls)
+    fields = vars(element)
+    # fields are set directly since frozen elements
+    # could not be changed by setting attributes
+    values = vars(copy)
+    for name in cls.copied_fields:
+        if name in fields:
+            values[name] = fields[name]
+    if 'parent' in values:
+        values['parent'] = parent
+    if isinstance(element, dom.HTMLTag):
+        # names are repeated in many tags, so share equal strings
+        values['tag_name'] = sys.intern(element.tag_name)
+        values['_attrs'] = tuple((sys.intern(n), sys.intern(v))
+                                 if isinstance(v, str) else (sys.intern(n), v)
+                                 for n, v in element.get_attr_items())
+    return copy
+
+
+def freeze(root):
+    """
+    Returns an immutable copy of a document or a tag.
+
+    :root: an element to freeze, type HTMLDocument or HTMLTag
+
+    Lists of elements are replaced by tuples, attributes by tuples
+    of pairs and names of tags and attributes by interned strings.
+    The original element is not changed and could be changed later
+    without affecting the copy. Indexes are not copied and are built
+    on first search if the document is indexed.
+    """
+    frozen_root = _copy(root, None)
+    # pairs (element, copy) which content is not copied yet,
+    # processed without recursion to freeze deep documents
+    pending = [(root, frozen_root)]
+    while pending:
+        element, copy = pending.pop()
+        if isinstance(element, dom.HTMLDocument) and \
+           element.doctype is not None:
+            vars(copy)['_doctype'] = _copy(element.doctype, copy)
+        if not isinstance(element, dom.HTMLContainer):
+            continue
+        elements = tuple(_copy(e, copy) for e in element.elements)
+        values = vars(copy)
+        values['elements'] = elements
+        if isinstance(copy, FrozenContainer):
+            values['_tags'] = tuple(e for e in elements
+                                    if isinstance(e, dom.HTMLTag))
+        pending.extend(zip(element.elements, elements))
+    return frozen_root
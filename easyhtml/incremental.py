@@ -0,0 +1,436 @@
+from . import dom
+from .parser import DOMParser
+
+__all__ = ('FragmentParser', 'reparse')
+
+# fields of elements that keep offsets in the source of the document
+offset_fields = ('source_start', 'source_end', 'inner_start', 'inner_end')
+
+
+class FragmentParser(DOMParser):
+    """
+    Parses a part of the content of a container and finds out
+    whether the part is parsed the same way as in the whole document.
+    """
+
+    def __init__(self, closing=(), raw_text=None):
+        """
+        :closing: names of the container and its ancestors, end tags
+                  with these names close them in the whole document,
+                  type a collection of str
+        :raw_text: policies of the content of raw text elements,
+                   see DOMParser, type dict
+        """
+        DOMParser.__init__(self, keep_source=True, raw_text=raw_text)
+        self.closing = closing
+        # indicates whether the fragment is parsed
+        # not the same way as in the whole document
+        self.unsafe = False
+        # indicates whether the fragment ends with an incomplete
+        # construct and whether tags are left opened at the end
+        self.incomplete = False
+        self.opened = False
+
+    def handle_endtag(self, name):
+        """
+        Processes an end tag such as </tag>
+
+        :name: a name of the tag, type str
+        """
+        if name in self.closing and name not in self.stack:
+            # the end tag would close a tag outside the fragment
+            self.unsafe = True
+        DOMParser.handle_endtag(self, name)
+
+    def parse(self, source, base, final=False):
+        """
+        Parses the fragment and returns a document that contains
+        its elements or None if the fragment is parsed not the same
+        way as in the whole document.
+
+        :source: the fragment, type str
+        :base: an offset of the fragment in the source, type int
+        :final: whether the fragment ends the source, type bool
+        """
+        # offsets of parsed elements should be
+        # offsets in the source of the document
+        self._base = -base
+        self.feed(source)
+        # an incomplete construct (e.g. a comment) or an unclosed
+        # raw text element would take the following source
+        self.incomplete = not final and \
+            (bool(self.rawdata) or self.cdata_elem is not None)
+        self.close()
+        opened = self.stack.tags[1:]
+        self.opened = bool(opened)
+        if any(tag.tag_name in self.closing for tag in opened):
+            # the tag would take the end tag of the container
+            self.unsafe = True
+        fragment = self.get_dom()
+        if self.unsafe or self.incomplete:
+            return None
+        return fragment
+
+
+def _get_common_length(old, new, size, suffix=False):
+    """
+    Returns a length of the common prefix (or suffix) of strings
+    not longer than the size. Slices are compared by a binary
+    search, so strings are not compared character by character.
+    """
+    low, high = 0, size
+    while low < high:
+        middle = (low + high + 1) // 2
+        if suffix:
+            equal = old[len(old) - middle:] == new[len(new) - middle:]
+        else:
+            equal = old[:middle] == new[:middle]
+        if equal:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _get_changed_range(old, new):
+    """
+    Returns a tuple (start, old_end, new_end) of offsets of
+    the changed part of the source in the old and new versions.
+    """
+    size = min(len(old), len(new))
+    start = _get_common_length(old, new, size)
+    end = _get_common_length(old, new, size - start, suffix=True)
+    return start, len(old) - end, len(new) - end
+
+
+def _align_range(old, new, start, old_end, new_end):
+    """
+    Moves boundaries of the changed range to boundaries of tags,
+    so a change that starts or ends inside a tag (e.g. inserted
+    <li>3</li> before </ul> starts after the common '<') is a change
+    of the content of the containing tag.
+    """
+    # the start inside a tag moves to the beginning of the tag
+    lt = old.rfind('<', 0, start)
+    if lt > old.rfind('>', 0, start):
+        start = lt
+    # the beginning of a tag at the end of the range moves to
+    # the common suffix, if the range ends inside the tag
+    lt = old.rfind('<', start, old_end)
+    if lt != -1 and '>' not in old[lt:old_end]:
+        size = old_end - lt
+        if new_end - size >= start and \
+           new[new_end - size:new_end] == old[lt:old_end]:
+            old_end -= size
+            new_end -= size
+    return start, old_end, new_end
+
+
+def _get_inner_range(container, source):
+    """
+    Returns offsets of the content of the container.
+    """
+    if isinstance(container, dom.HTMLDocument):
+        return 0, len(source)
+    return container.inner_start, container.inner_end
+
+
+def _find_container(document, start, end):
+    """
+    Returns the deepest tag which content contains the changed
+    range or the document if there is no such tag. Raw text
+    elements are skipped since their content is not HTML, as well
+    as self-closing tags such as <p/> that have no content.
+    """
+    source = document.source
+    container = document
+    while True:
+        for tag in container.tags:
+            if tag.single or tag.inner_start is None or \
+               tag.inner_end is None or \
+               tag.tag_name in DOMParser.CDATA_CONTENT_ELEMENTS or \
+               source[tag.inner_start - 2:tag.inner_start] == '/>':
+                continue
+            if tag.inner_start <= start and end <= tag.inner_end:
+                container = tag
+                break
+        else:
+            return container
+
+
+def _get_closing(container):
+    """
+    Returns names of the container and its ancestors.
+    """
+    names = set()
+    while isinstance(container, dom.HTMLTag):
+        names.add(container.tag_name)
+        container = container.parent
+    return names
+
+
+def _shift(element, delta):
+    """
+    Moves offsets of the element and of its content.
+    """
+    stack = [element]
+    while stack:
+        element = stack.pop()
+        fields = vars(element)
+        for name in offset_fields:
+            value = fields.get(name)
+            if value is not None:
+                setattr(element, name, value + delta)
+        if isinstance(element, dom.ElementTagContainer):
+            stack.extend(element.elements)
+
+
+def _shift_following(container, delta):
+    """
+    Moves offsets of the ends of the container and its ancestors
+    and offsets of all elements that follow them.
+    """
+    element = container
+    while isinstance(element, dom.HTMLTag):
+        for name in ('inner_end', 'source_end'):
+            value = vars(element).get(name)
+            if value is not None:
+                setattr(element, name, value + delta)
+        parent = element.parent
+        if parent is None:
+            return
+        elements = parent.elements
+        following = False
+        for sibling in elements:
+            if following:
+                _shift(sibling, delta)
+            elif sibling is element:
+                following = True
+        element = parent
+
+
+def _ends_before(tag, offset):
+    """
+    Checks whether the tag ends before the offset and does not
+    depend on the source after it. A tag closed without its end
+    tag ends where the next construct starts, so a change at its
+    end offset could continue it.
+    """
+    end = tag.source_end
+    if end is None or end > offset:
+        return False
+    return end < offset or tag.single or end != tag.inner_end
+
+
+def _split(elements, start, end):
+    """
+    Returns a tuple (head, tail) of counts of elements at the
+    beginning and at the end of the list that are kept as they
+    are. Both parts end and start with tags, so texts next to
+    the changed range are parsed again.
+    """
+    head = 0
+    for i, element in enumerate(elements):
+        if isinstance(element, dom.HTMLTag):
+            if not _ends_before(element, start):
+                break
+            head = i + 1
+        elif element.source_end is None or element.source_end > start:
+            break
+    tail = 0
+    for i, element in enumerate(reversed(elements)):
+        if element.source_start is None or element.source_start < end:
+            break
+        if isinstance(element, dom.HTMLTag):
+            tail = i + 1
+    return head, tail
+
+
+def _get_key(tag, shift):
+    """
+    Returns a key to find the same tag in the old version.
+    """
+    return (tag.tag_name, tag.source_start - shift, tag.source_end - shift,
+            None if tag.inner_end is None else tag.inner_end - shift)
+
+
+def _reuse(elements, start, end, delta, old_elements, limit=None):
+    """
+    Replaces parsed tags that lie outside the changed range
+    by the same tags of the old version, so they keep their
+    identity and cached data.
+
+    :elements: parsed elements, type list
+    :start: an offset of the changed range, type int
+    :end: an end offset of the changed range in the new source,
+          type int
+    :delta: a difference of lengths of the new and old sources,
+            type int
+    :old_elements: elements of the old version, type list
+    :limit: an offset in the new source from which constructs are
+            parsed as if they are followed by the end of the source
+            in either version, type int or None
+
+    Tags after the limit are parsed not the same way in versions
+    even if they are not changed, so they are not replaced.
+    """
+    old_tags = {_get_key(e, 0): e
+                for e in old_elements if isinstance(e, dom.HTMLTag)}
+    for i, element in enumerate(elements):
+        if not isinstance(element, dom.HTMLTag) or \
+           element.source_start is None or element.source_end is None:
+            continue
+        if limit is not None and not _ends_before(element, limit):
+            break
+        if _ends_before(element, start):
+            shift = 0
+        elif element.source_start >= end:
+            shift = delta
+        else:
+            continue
+        old = old_tags.get(_get_key(element, shift))
+        if old is not None:
+            if shift:
+                _shift(old, shift)
+            # white space before the tag could be changed
+            old.space_before = element.space_before
+            elements[i] = old
+
+
+def _splice(container, source, start, old_end, new_end, raw_text):
+    """
+    Parses the changed part of the content of the container again
+    and replaces its elements. Returns False if the part could not
+    be parsed apart from the rest of the document.
+    """
+    document = container.owner_document
+    old_source = document.source
+    delta = new_end - old_end
+    inner_start, inner_end = _get_inner_range(container, old_source)
+    elements = list(container.elements)
+    head, tail = _split(elements, start, old_end)
+    closing = _get_closing(container)
+    doctype = document.doctype
+    position = None if doctype is None else doctype.source_start
+    while True:
+        begin = elements[head - 1].source_end if head else inner_start
+        finish = elements[-tail].source_start if tail else inner_end
+        parser = FragmentParser(closing, raw_text)
+        fragment = parser.parse(source[begin:finish + delta], begin,
+                                finish == len(old_source))
+        if tail and not parser.unsafe and \
+           (parser.incomplete or parser.opened):
+            # the end of the fragment would take following
+            # elements, so parse them as well
+            tail = 0
+            continue
+        if fragment is None:
+            return False
+        if position is not None and position >= finish:
+            # the last declaration follows the fragment
+            break
+        removed = position is not None and position >= begin
+        if fragment.doctype is None and not removed:
+            break
+        if container is not document:
+            # a declaration is a part of the document, not of a tag
+            return False
+        if fragment.doctype is None and head:
+            # the last declaration is removed, so an earlier one
+            # becomes the declaration of the document if it exists
+            head = 0
+            continue
+        break
+    # constructs not complete at the end of the source
+    # in the old version (moved) and in the fragment
+    unparsed = document.unparsed_start
+    if unparsed is not None:
+        unparsed += delta
+    limits = [u for u in (unparsed, fragment.unparsed_start) if u is not None]
+    if finish == len(old_source):
+        document.unparsed_start = fragment.unparsed_start
+    else:
+        # the fragment is complete, so the construct follows it
+        document.unparsed_start = unparsed
+    if position is not None and position >= finish:
+        _shift(doctype, delta)
+    elif fragment.doctype is not None:
+        fragment.doctype.parent = document
+        doctype = fragment.doctype
+    elif position is not None and position >= begin:
+        doctype = None
+    parsed = fragment.elements
+    _reuse(parsed, start, new_end, delta, elements[head:len(elements) - tail],
+           min(limits) if limits else None)
+    kept = elements[len(elements) - tail:]
+    for element in kept:
+        _shift(element, delta)
+    for element in parsed:
+        element.parent = container
+    # white space dropped at the end of the fragment
+    # precedes the first kept element or the end tag
+    if kept:
+        kept[0].space_before = fragment.space_at_end
+    else:
+        container.space_at_end = fragment.space_at_end
+    container.elements = elements[:head] + parsed + kept
+    if container is not document:
+        _shift_following(container, delta)
+    if doctype is not document.doctype:
+        document.doctype = doctype
+    return True
+
+
+def reparse(document, source, raw_text=None):
+    """
+    Updates the document parsed from an old version of the source
+    to the new version of the source and returns the document.
+
+    :document: a document parsed with keep_source=True, type
+               HTMLDocument
+    :source: a new version of the source, type str
+    :raw_text: policies of the content of raw text elements the
+               document was parsed with, see DOMParser, type dict
+
+    The changed range of the source is found by comparing the old
+    and new versions. Only the part of the content of the deepest
+    tag that contains the changed range is parsed again: the part
+    between the last nested tag before the range and the first
+    nested tag after it. Parsed elements are spliced into the tag,
+    tags outside the changed range keep their identity and cached
+    data, offsets of following elements are moved. If the part
+    could be parsed not the same way as in the whole document
+    (e.g. it contains an end tag of an ancestor or an unclosed
+    comment), the parent tag is parsed instead up to the document.
+
+    Cached data of changed tags and their ancestors and indexes of
+    the document are dropped. The document should not be changed
+    after it's parsed, otherwise its offsets are not valid.
+    """
+    old_source = document.source
+    if old_source is None:
+        raise ValueError('the source of the document is not kept')
+    if source == old_source:
+        return document
+    start, old_end, new_end = _align_range(
+        old_source, source, *_get_changed_range(old_source, source))
+    unparsed = document.unparsed_start
+    if unparsed is not None and unparsed <= old_end:
+        # the rest of the old source after a construct which is
+        # not complete is parsed as if it's followed by the end
+        # of the source, the change could complete the construct,
+        # so parse the rest again
+        start = min(start, unparsed)
+        old_end, new_end = len(old_source), len(source)
+    container = _find_container(document, start, old_end)
+    while not _splice(container, source, start, old_end, new_end, raw_text):
+        container = container.parent
+    # drop cached data of the container and of its ancestors
+    element = container
+    while element is not None:
+        element._clear_cache()
+        element = element.parent
+    document.source = source
+    document.source_start = 0
+    document.source_end = len(source)
+    return document
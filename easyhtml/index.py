@@ -0,0 +1,239 @@
+from bisect import bisect_left
+import re
+
+from . import dom
+
+__all__ = ('AttributeIndex', 'TextIndex', 'tokenize')
+
+
+def tokenize(text):
+    """
+    Splits a text into a list of lowercase words.
+
+    :text: a text to split, type str
+    """
+    return re.findall(r'\w+', text.lower())
+
+
+def text_matches(text, words):
+    """
+    Returns True if the text contains all words following
+    one after another.
+
+    :text: a text to check, type str
+    :words: words returned by tokenize function, type list
+    """
+    tokens = tokenize(text)
+    if len(words) == 1:
+        return words[0] in tokens
+    # surround with spaces to match whole words only
+    return ' ' + ' '.join(words) + ' ' in ' ' + ' '.join(tokens) + ' '
+
+
+class DocumentIndex:
+    """
+    A base class for indexes of a document.
+
+    All tags and text nodes of the document are numbered in
+    the document order, so elements nested in a certain tag
+    occupy a continuous range of positions and could be found
+    in postings of the index using binary search.
+    """
+
+    def __init__(self, document):
+        """
+        :document: a document to index, type HTMLDocument
+        """
+        self.document = document
+        # a key -> (positions of elements, elements)
+        self.postings = {}
+        # tag -> (position of the tag, position after its last element)
+        self.ranges = {}
+        # a count of numbered elements
+        self.size = 0
+        self._build()
+
+    def _build(self):
+        """
+        Walks through the document and fills the index.
+        """
+        # a stack of iterators over elements of opened containers
+        # and a stack of opened tags with their positions,
+        # used instead of recursion to index deep documents
+        iterators = [iter(self.document.elements)]
+        opened = []
+        # mark containers to make them invalidate the index when changed
+        self.document._cached = True
+        while iterators:
+            for element in iterators[-1]:
+                if isinstance(element, dom.TextNode):
+                    self._add_text(element, self.size)
+                    self.size += 1
+                elif isinstance(element, dom.HTMLTag):
+                    element._cached = True
+                    self._add_tag(element, self.size)
+                    opened.append((element, self.size))
+                    self.size += 1
+                    # go inside the tag
+                    iterators.append(iter(element.elements))
+                    break
+            else:
+                # all elements of the container are processed,
+                # close it and save its range
+                iterators.pop()
+                if opened:
+                    tag, position = opened.pop()
+                    self.ranges[tag] = (position, self.size)
+
+    # adds a tag to the index
+    def _add_tag(self, tag, position): pass
+
+    # adds a text node to the index
+    def _add_text(self, node, position): pass
+
+    def _add_posting(self, key, position, element):
+        """
+        Adds an element with its position to the posting of the key.
+        """
+        positions, elements = self.postings.setdefault(key, ([], []))
+        positions.append(position)
+        elements.append(element)
+
+    def count(self, key):
+        """
+        Returns a count of elements with specified key.
+
+        :key: a key of the posting, type hashable
+        """
+        return len(self.postings.get(key, ((), ()))[0])
+
+    def _get_range(self, container):
+        """
+        Returns a range of positions of elements nested in
+        the container or None if the container is not indexed.
+
+        :container: a container, type ElementTagContainer
+        """
+        if container is self.document:
+            return 0, self.size
+        try:
+            position, end = self.ranges[container]
+        except KeyError:
+            return None
+        # the container itself is not nested in itself
+        return position + 1, end
+
+    def _get_elements(self, key, low, high):
+        """
+        Returns a list of elements with specified key
+        which positions are in the range [low, high).
+        """
+        positions, elements = self.postings.get(key, ([], []))
+        start = bisect_left(positions, low)
+        end = bisect_left(positions, high, start)
+        return elements[start:end]
+
+
+class AttributeIndex(DocumentIndex):
+    """
+    An inverted index of a document that maps pairs
+    (attribute, value) to the tags that have such attribute
+    with such value. The "class" attribute is split into
+    separate CSS classes, so each of them is indexed separately.
+    """
+
+    def _add_tag(self, tag, position):
+        """
+        Adds all attributes of the tag to the index.
+
+        :tag: a tag to add, type HTMLTag
+        :position: a position of the tag in the document order, type int
+        """
+        for name, value in tag.get_attr_items():
+            # attributes without values never match a query
+            if value is None:
+                continue
+            if name == 'class' and value:
+                # index each CSS class separately, duplicates
+                # are removed to keep the tag in a posting once
+                keys = set((name, c) for c in value.split(' '))
+            else:
+                keys = ((name, value),)
+            for key in keys:
+                self._add_posting(key, position, tag)
+
+    def find(self, conditions, container):
+        """
+        Returns a list of tags nested in the container that match
+        all conditions in the document order or None if the
+        conditions could not be processed by the index.
+
+        :conditions: pairs (attribute, value), type a list of tuples
+        :container: a container to search in, type ElementTagContainer
+
+        The most selective condition is used to get candidates from
+        the index, then remaining conditions are checked for each
+        candidate starting from the most selective one.
+        """
+        # invalid conditions are processed by HTMLTag.check_attrs
+        # which raises an appropriate exception
+        if not conditions or any(len(c) != 2 for c in conditions):
+            return None
+        bounds = self._get_range(container)
+        if bounds is None:
+            return None
+        # sort conditions by count of matching tags
+        plan = sorted(set(conditions), key=self.count)
+        candidates = self._get_elements(plan[0], *bounds)
+        for condition in plan[1:]:
+            if not candidates:
+                break
+            candidates = [t for t in candidates if t.check_attr(*condition)]
+        return candidates
+
+
+class TextIndex(DocumentIndex):
+    """
+    An inverted index of a document that maps words of the visible
+    text to the TextNode objects that contain them. Words are
+    lowercase, so the search is case insensitive.
+    """
+
+    def _add_text(self, node, position):
+        """
+        Adds all words of the text node to the index.
+
+        :node: a text node to add, type TextNode
+        :position: a position of the node in the document order, type int
+        """
+        for word in set(tokenize(str(node))):
+            self._add_posting(word, position, node)
+
+    def find(self, term, container):
+        """
+        Returns a list of text nodes nested in the container that
+        contain the term in the document order or None if the
+        container is not indexed.
+
+        :term: a word or several words to search, type str
+        :container: a container to search in, type ElementTagContainer
+        """
+        bounds = self._get_range(container)
+        if bounds is None:
+            return None
+        words = tokenize(term)
+        if not words:
+            return []
+        # get candidates by the rarest word
+        candidates = self._get_elements(min(words, key=self.count), *bounds)
+        if len(words) == 1:
+            return candidates
+        return [n for n in candidates if text_matches(str(n), words)]
+
+    def get_position(self, tag):
+        """
+        Returns a position of the tag in the document order.
+
+        :tag: an indexed tag, type HTMLTag
+        """
+        return self.ranges[tag][0]
@@ -0,0 +1,301 @@
+import re
+import threading
+
+from . import dom
+from .parser import DOMParser
+
+__all__ = ('LazyTag', 'LazyDocument', 'SkeletonParser', 'parse_lazy')
+
+# tags that wrap the content of a document, they are not counted
+# as levels of nesting when regions of a document are found
+wrappers = ('html', 'head', 'body')
+
+# protects materialization of regions
+_lock = threading.Lock()
+
+
+class LazyTag(dom.HTMLTag):
+    """
+    A tag which content is parsed from the source of the document
+    on first access to its elements.
+    """
+
+    # indicates whether the content is not parsed yet
+    _lazy = False
+    # the source of the document and options of the parser
+    # used to parse the content
+    _source = None
+    _options = None
+
+    def __init__(self, name, attrs, options=None):
+        """
+        :name: a name of the tag, type str
+        :attrs: a tag's attributes, type a list of tuples
+        :options: options of DOMParser used to parse the content,
+                  type dict
+        """
+        dom.HTMLTag.__init__(self, name, attrs)
+        self._options = options
+        self._lazy = True
+
+    @property
+    def elements(self):
+        """
+        Returns a list of contained elements parsing
+        the content of the tag if necessary.
+        """
+        if self._lazy:
+            self._materialize()
+        return self._elements
+
+    @elements.setter
+    def elements(self, elements):
+        self._elements = elements
+
+    @property
+    def materialized(self):
+        """
+        Indicates whether the content of the tag is parsed.
+        """
+        return not self._lazy
+
+    @property
+    def lazy_source(self):
+        """
+        Returns an original HTML code of the content of the tag
+        without parsing it or None if the document is not complete.
+        """
+        if self._source is None or self.inner_end is None:
+            return None
+        return self._source[self.inner_start:self.inner_end]
+
+    def _materialize(self):
+        """
+        Parses the content of the tag and appends parsed elements.
+        The content could not be parsed until the document is complete.
+        """
+        with _lock:
+            # another thread could parse the content while
+            # this one was waiting for the lock
+            if not self._lazy:
+                return
+            source = self.lazy_source
+            if source is None:
+                return
+            parser = DOMParser(keep_source=True, **(self._options or {}))
+            # offsets of parsed elements should be
+            # offsets in the source of the document
+            parser._base = -self.inner_start
+            parser.feed(source)
+            parser.close()
+            fragment = parser.get_dom()
+            for element in fragment.elements:
+                element.parent = self
+            if fragment.space_at_end:
+                # white space dropped before the end tag
+                self.space_at_end = True
+            self._elements = fragment.elements
+            self._lazy = False
+
+
+class LazyDocument(dom.HTMLDocument):
+    """
+    A document built by SkeletonParser. Searches by names and
+    attributes do not parse regions which source does not contain
+    the searched name or values.
+    """
+
+    def get_tags_by_name(self, name):
+        """
+        Returns an HTMLCollection object contains tags
+        with specified name including nested tags.
+
+        :name: a name of search tags, type str
+        """
+        pattern = re.compile(r'<{}[\s/>]'.format(re.escape(name)),
+                             re.IGNORECASE)
+        return dom.HTMLCollection(filter(
+            lambda e: e.tag_name == name,
+            _iter_tags(self, lambda source: pattern.search(source))))
+
+    def get_children(self, query):
+        """
+        Returns an HTMLCollection object contains tags
+        with specified in the query attributes.
+
+        :query: a query to search tags by attributes, type str
+        """
+        if self.indexed:
+            # the index contains all tags anyway
+            return dom.HTMLDocument.get_children(self, query)
+        values = [a[1] for a in dom.parse_query(query) if len(a) == 2]
+        return dom.HTMLCollection(filter(
+            lambda e: e.check_attrs(query),
+            _iter_tags(self, lambda source: _contains(source, values))))
+
+    def get_element_by_id(self, e_id):
+        """
+        Returns a tag with specified id. If the tag
+        is not found returns None.
+
+        :e_id: an ID of the tag, type str
+        """
+        if self.indexed:
+            return dom.HTMLDocument.get_element_by_id(self, e_id)
+        for tag in _iter_tags(self, lambda source: _contains(source, [e_id])):
+            if tag.check_attr('id', e_id):
+                return tag
+        return None
+
+
+def _contains(source, values):
+    """
+    Checks whether the source could contain attributes
+    with specified values.
+    """
+    # values of attributes could be written by entities
+    return '&' in source or all(v in source for v in values)
+
+
+def _iter_tags(container, may_contain):
+    """
+    Yields all nested tags in the document order skipping the content
+    of regions that are not parsed yet if their source could not contain
+    searched tags.
+
+    :container: a container to search in, type ElementTagContainer
+    :may_contain: a function that checks the source of a region,
+                  type callable
+    """
+    for tag in container.tags:
+        yield tag
+        if isinstance(tag, LazyTag) and tag._lazy:
+            source = tag.lazy_source
+            if source is not None and not may_contain(source):
+                continue
+        yield from _iter_tags(tag, may_contain)
+
+
+class SkeletonParser(DOMParser):
+    """
+    A parser that builds tags down to specified level of nesting only.
+    The content of deeper tags is parsed on first access to it, so
+    regions of the document which are never accessed cost only their
+    offsets in the source.
+    """
+
+    def __init__(self, depth=1, raw_text=None):
+        """
+        :depth: a level of nesting of tags which content is parsed
+                lazily, html, head and body tags are not counted,
+                type int
+        :raw_text: policies of the content of raw text elements,
+                   see DOMParser, type dict
+        """
+        if depth < 1:
+            raise ValueError('depth should be positive: {}'.format(depth))
+        self.depth = depth
+        # options used to parse regions
+        self.options = {'raw_text': raw_text} if raw_text else {}
+        DOMParser.__init__(self, keep_source=True, raw_text=raw_text)
+
+    def reset(self):
+        DOMParser.reset(self)
+        # a tag which content is skipped
+        self._region = None
+        # names of tags opened inside the region
+        self._inside = []
+        # tags which content is parsed lazily
+        self._regions = []
+
+    def create_document(self):
+        return LazyDocument()
+
+    def create_tag(self, name, attrs):
+        level = sum(1 for t in self.stack.tags[1:]
+                    if t.tag_name not in wrappers)
+        if level + 1 < self.depth or name in wrappers or \
+           name in dom.HTMLTag.single_tags or \
+           name in self.CDATA_CONTENT_ELEMENTS:
+            return DOMParser.create_tag(self, name, attrs)
+        tag = LazyTag(name, attrs, self.options)
+        self._region = tag
+        self._regions.append(tag)
+        return tag
+
+    def _update_region(self):
+        """
+        Forgets the region if it has been closed.
+        """
+        if self._region is not None and \
+           not any(t is self._region for t in self.stack.tags):
+            self._region = None
+            self._inside.clear()
+
+    def handle_starttag(self, name, attrs):
+        if self._region is None:
+            DOMParser.handle_starttag(self, name, attrs)
+        elif name not in dom.HTMLTag.single_tags:
+            self._inside.append(name)
+
+    def handle_startendtag(self, name, attrs):
+        if self._region is None:
+            DOMParser.handle_startendtag(self, name, attrs)
+            # a self-closing tag could open and close a region
+            self._update_region()
+
+    def handle_endtag(self, name):
+        if name in self._inside:
+            # close all tags until encounter an appropriate one
+            # the same way DOMParser does
+            while self._inside.pop() != name:
+                pass
+            return
+        DOMParser.handle_endtag(self, name)
+        self._update_region()
+
+    def handle_data(self, data):
+        if self._region is None:
+            DOMParser.handle_data(self, data)
+
+    def handle_entityref(self, name):
+        if self._region is None:
+            DOMParser.handle_entityref(self, name)
+
+    def handle_charref(self, num):
+        if self._region is None:
+            DOMParser.handle_charref(self, num)
+
+    def handle_comment(self, data):
+        if self._region is None:
+            DOMParser.handle_comment(self, data)
+
+    def get_dom(self):
+        source_regions = self._regions
+        self._region = None
+        self._inside = []
+        self._regions = []
+        dom_root = DOMParser.get_dom(self)
+        if dom_root is not None:
+            # regions keep the source to be parsed
+            # even if they are removed from the document
+            for tag in source_regions:
+                tag._source = dom_root.source
+        return dom_root
+
+
+def parse_lazy(source, depth=1, raw_text=None):
+    """
+    Parses a source lazily and returns a LazyDocument object.
+
+    :source: an HTML code of the document, type str
+    :depth: a level of nesting of tags which content is parsed
+            lazily, html, head and body tags are not counted,
+            type int
+    :raw_text: policies of the content of raw text elements,
+               see DOMParser, type dict
+    """
+    parser = SkeletonParser(depth, raw_text)
+    parser.feed(source)
+    parser.close()
+    return parser.get_dom()
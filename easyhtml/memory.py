@@ -0,0 +1,180 @@
+import heapq
+import sys
+
+from . import dom
+
+__all__ = ('MemoryFootprint', 'measure')
+
+
+class MemoryFootprint:
+    """
+    An estimated size of a document or a tag with its content.
+    Sizes are in bytes and are estimated by sys.getsizeof,
+    so they do not include memory allocator overhead.
+    """
+
+    def __init__(self):
+        # a class name -> a count of such elements
+        self.counts = {}
+        # a class name -> a size of such elements including
+        # their dictionaries and lists of nested elements
+        self.sizes = {}
+        # a size of all strings: names of tags, texts, raw HTML codes,
+        # attributes and the source of the document
+        self.string_bytes = 0
+        # a size of containers of attributes (lists, tuples and
+        # dictionaries) excluding strings of names and values
+        self.attribute_bytes = 0
+        # a size of cached raw HTML codes and texts
+        self.cache_bytes = 0
+        # pairs (tag, size of the tag with its content)
+        # in descending order of size
+        self.heaviest = []
+
+    @property
+    def total(self):
+        """
+        Returns the total estimated size.
+        """
+        return (sum(self.sizes.values()) + self.string_bytes +
+                self.attribute_bytes + self.cache_bytes)
+
+    def as_dict(self):
+        """
+        Returns the footprint as a dictionary. Heaviest tags
+        are represented by their names.
+        """
+        return {
+            'counts': dict(self.counts),
+            'sizes': dict(self.sizes),
+            'string_bytes': self.string_bytes,
+            'attribute_bytes': self.attribute_bytes,
+            'cache_bytes': self.cache_bytes,
+            'total': self.total,
+            'heaviest': [(t.tag_name, s) for t, s in self.heaviest],
+        }
+
+
+class Measurer:
+    """
+    Measures elements one by one and adds their sizes to a footprint.
+    """
+
+    def __init__(self, footprint):
+        self.footprint = footprint
+        # ids of measured strings and containers, objects
+        # shared by several elements are measured once
+        self.seen = set()
+
+    def _string(self, value):
+        """
+        Returns a size of the string if it's not measured yet.
+        """
+        if not isinstance(value, str) or id(value) in self.seen:
+            return 0
+        self.seen.add(id(value))
+        return sys.getsizeof(value)
+
+    def _attributes(self, attrs):
+        """
+        Returns sizes of attributes: containers and strings.
+        """
+        if id(attrs) in self.seen:
+            return 0, 0
+        self.seen.add(id(attrs))
+        size = sys.getsizeof(attrs)
+        strings = 0
+        if isinstance(attrs, dict):
+            # the dictionary of AttributeDict keeps its owner
+            size += sys.getsizeof(vars(attrs))
+            items = attrs.items()
+        else:
+            size += sum(map(sys.getsizeof, attrs))
+            items = attrs
+        for name, value in items:
+            strings += self._string(name) + self._string(value)
+        return size, strings
+
+    def _cache(self, cache):
+        """
+        Returns a size of cached data of a container.
+        """
+        if cache is None:
+            return 0
+        return sys.getsizeof(cache) + sum(map(self._string, cache.values()))
+
+    def measure(self, element):
+        """
+        Adds a size of the element without nested elements to
+        the footprint and returns it.
+
+        :element: an element to measure, type HTMLElement
+        """
+        footprint = self.footprint
+        name = type(element).__name__
+        size = sys.getsizeof(element)
+        strings = attributes = cache = 0
+        fields = getattr(element, '__dict__', None)
+        if fields is not None:
+            size += sys.getsizeof(fields)
+            for field, value in fields.items():
+                if field == '_attrs':
+                    attributes, attr_strings = self._attributes(value)
+                    strings += attr_strings
+                elif field == '_cache':
+                    cache = self._cache(value)
+                elif field in ('elements', '_elements', '_tags'):
+                    size += sys.getsizeof(value)
+                else:
+                    strings += self._string(value)
+        footprint.counts[name] = footprint.counts.get(name, 0) + 1
+        footprint.sizes[name] = footprint.sizes.get(name, 0) + size
+        footprint.string_bytes += strings
+        footprint.attribute_bytes += attributes
+        footprint.cache_bytes += cache
+        return size + strings + attributes + cache
+
+
+def measure(root, heaviest=0):
+    """
+    Returns a MemoryFootprint of the container with its content.
+
+    :root: a container to measure, type HTMLDocument or HTMLTag
+    :heaviest: a count of the heaviest nested tags to report,
+               type int
+
+    The heaviest tags include their content, so ancestors of a heavy
+    tag are at least as heavy as the tag itself. Indexes of documents
+    are not measured.
+    """
+    footprint = MemoryFootprint()
+    measurer = Measurer(footprint)
+    # elements in the document order with positions of their
+    # containers, walked by a stack instead of recursion
+    order = []
+    stack = [(root, -1)]
+    while stack:
+        element, parent = stack.pop()
+        order.append((element, parent, measurer.measure(element)))
+        position = len(order) - 1
+        if isinstance(element, dom.HTMLDocument):
+            if element.doctype is not None:
+                stack.append((element.doctype, position))
+        if isinstance(element, dom.HTMLContainer):
+            # lazy tags keep elements in another field and
+            # should not be built to be measured
+            fields = vars(element)
+            elements = fields.get('elements', fields.get('_elements', ()))
+            # push in reversed order to pop in the document order
+            stack.extend((e, position) for e in reversed(elements))
+    if heaviest:
+        # sum sizes of elements up to their containers,
+        # containers precede their content in the order
+        totals = [size for element, parent, size in order]
+        for position in range(len(order) - 1, 0, -1):
+            totals[order[position][1]] += totals[position]
+        tags = ((order[p][0], totals[p]) for p in range(len(order))
+                if isinstance(order[p][0], dom.HTMLTag))
+        footprint.heaviest = heapq.nlargest(heaviest, tags,
+                                            key=lambda t: t[1])
+    return footprint
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from . import dom
+from .query import find_tags
+
+__all__ = ('query_parallel',)
+
+
+def run_query(container, query):
+    """
+    Runs a query in the container and returns its result.
+
+    :container: a container to search in, type ElementTagContainer
+                or HTMLCollection
+    :query: a query in the format of the command line (see
+            easyhtml.query.parse_query) or a function that takes
+            the container and returns a result, type str or callable
+    """
+    if callable(query):
+        return query(container)
+    return find_tags(container, query)
+
+
+def _prepare(container):
+    """
+    Builds indexes of the document the container belongs to,
+    so they are not built by several threads at once.
+    """
+    if isinstance(container, dom.HTMLCollection):
+        for element in container.elements:
+            _prepare(element)
+        return
+    document = container.owner_document
+    if document is not None:
+        document.get_index()
+        document.get_text_index()
+
+
+def query_parallel(container, queries, executor=None, workers=None):
+    """
+    Runs queries in a thread pool and returns a list of their
+    results in the order of queries.
+
+    :container: a container to search in, type HTMLDocument,
+                HTMLTag or HTMLCollection
+    :queries: queries in the format of the command line (see
+              easyhtml.query.parse_query) or functions that take
+              a container and return a result, type an iterable
+              of str or callable
+    :executor: an executor to run queries, a new ThreadPoolExecutor
+               is used if it's not specified, type Executor
+    :workers: a count of threads of the new executor, type int
+
+    A string query returns a list of found tags. If the container is
+    an HTMLCollection, each query is run in each element of the
+    collection separately and its result is a list of results for
+    all elements in their order.
+
+    Read paths of the DOM (iteration, searches, raw_html, str) are
+    safe for concurrent readers as long as nobody changes the document
+    while queries are running. Queries are run by threads, so they are
+    run in parallel by free-threaded builds of CPython only.
+    """
+    queries = list(queries)
+    if executor is None:
+        with ThreadPoolExecutor(workers) as executor:
+            return query_parallel(container, queries, executor)
+    _prepare(container)
+    if not isinstance(container, dom.HTMLCollection):
+        return list(executor.map(run_query, [container] * len(queries),
+                                 queries))
+    elements = container.elements
+    if not elements:
+        return [[] for q in queries]
+    # spread each query over all elements
+    results = list(executor.map(
+        run_query, elements * len(queries),
+        [q for q in queries for i in range(len(elements))]))
+    size = len(elements)
+    return [results[i:i + size] for i in range(0, len(results), size)]
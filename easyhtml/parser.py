@@ -1,6 +1,20 @@
 from html.parser import HTMLParser
+from html import unescape
+from collections import namedtuple
+from contextlib import contextmanager
+import threading
+import time
+import re
 from . import dom
 
+# a pattern to find line breaks in the source
+newline = re.compile('\n')
+
+# a reference at the end of the source, the tokenizer waits
+# for a character after it and drops it at the end of file
+tail_reference = re.compile(
+    r'&(#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][-.a-zA-Z0-9]*)\Z')
+
 
 class TagStack:
     """
@@ -62,21 +76,644 @@ class TagStack:
         return self.tags[0]
 
 
+class ParserStats:
+    """
+    Counters collected by DOMParser while parsing a document.
+    """
+
+    # methods of the parser which time is measured
+    handlers = ('handle_starttag', 'handle_endtag', 'handle_startendtag',
+                'handle_data', 'handle_entityref', 'handle_charref',
+                'handle_comment', 'handle_decl', 'handle_pi', 'unknown_decl')
+
+    def __init__(self):
+        # a class name -> a count of such elements in the document
+        self.elements = {}
+        # a maximum count of nested tags
+        self.max_depth = 0
+        # a count of tags closed by an end tag of their ancestor
+        self.recovery_pops = 0
+        # a count of end tags without opened tags
+        self.ignored_end_tags = 0
+        # a count of unknown entities kept as a plain text
+        self.entity_fallbacks = 0
+        # a length of fed data
+        self.chars_fed = 0
+        # a name of a handler -> a count of its calls
+        self.handler_calls = {}
+        # a name of a handler -> a total time of its calls in seconds
+        self.handler_time = {}
+
+    def count_elements(self, document):
+        """
+        Counts elements of the document by their classes
+        and finds the maximum depth of tags.
+
+        :document: a parsed document, type HTMLDocument
+        """
+        # a stack of pairs (container, depth) used instead of recursion
+        containers = [(document, 0)]
+        while containers:
+            container, depth = containers.pop()
+            self.max_depth = max(self.max_depth, depth)
+            for element in container.elements:
+                name = type(element).__name__
+                self.elements[name] = self.elements.get(name, 0) + 1
+                if isinstance(element, dom.HTMLTag):
+                    containers.append((element, depth + 1))
+                elif isinstance(element, dom.TextNode):
+                    containers.append((element, depth))
+        if document.doctype is not None:
+            name = type(document.doctype).__name__
+            self.elements[name] = self.elements.get(name, 0) + 1
+
+    def as_dict(self):
+        """
+        Returns all counters as a dictionary.
+        """
+        return {
+            'elements': dict(self.elements),
+            'max_depth': self.max_depth,
+            'recovery_pops': self.recovery_pops,
+            'ignored_end_tags': self.ignored_end_tags,
+            'entity_fallbacks': self.entity_fallbacks,
+            'chars_fed': self.chars_fed,
+            'handler_calls': dict(self.handler_calls),
+            'handler_time': dict(self.handler_time),
+        }
+
+
+class ParserLimits(namedtuple('ParserLimits', (
+        'max_nodes', 'max_depth', 'max_attrs', 'max_text', 'max_time',
+        'policy'))):
+    """
+    Limits of resources used by DOMParser to parse a document.
+    Each limit is None if it's not limited.
+
+    max_nodes  - a maximum count of tags, comments and texts appended
+                 to the document
+    max_depth  - a maximum count of nested tags
+    max_attrs  - a maximum count of attributes of a tag
+    max_text   - a maximum length of the text of the document
+    max_time   - a maximum time of parsing in seconds since the first
+                 data of the document are fed
+    policy     - what to do when a limit is exceeded:
+                 'raise' - raise ParserLimitError,
+                 'truncate' - stop parsing, the document contains
+                 everything parsed before the limit is exceeded,
+                 'skip' - skip the content beyond the limit (nested tags
+                 that are too deep, extra attributes, the text beyond the
+                 limit) and continue, limits of nodes and time stop
+                 parsing as 'truncate' does
+    """
+
+    __slots__ = ()
+
+    policies = ('raise', 'truncate', 'skip')
+
+    def __new__(cls, max_nodes=None, max_depth=None, max_attrs=None,
+                max_text=None, max_time=None, policy='raise'):
+        if policy not in cls.policies:
+            raise ValueError('unknown policy: {}'.format(policy))
+        return super().__new__(cls, max_nodes, max_depth, max_attrs,
+                               max_text, max_time, policy)
+
+
+class ParserLimitError(Exception):
+    """
+    Raised when a document exceeds a limit of the parser
+    which policy is 'raise'.
+    """
+
+    def __init__(self, limit, value):
+        """
+        :limit: a name of the limit, e.g. 'max_depth', type str
+        :value: a value of the limit, type int or float
+        """
+        Exception.__init__(self, '{} exceeded: {}'.format(limit, value))
+        self.limit = limit
+        self.value = value
+
+
+class StopParsing(Exception):
+    """
+    Raised by handlers to stop parsing of the current document.
+    """
+    pass
+
+
 class DOMParser(HTMLParser):
     """
     Parses HTML document and builds
     DOM structure.
     """
 
-    def __init__(self):
-        HTMLParser.__init__(self)
+    # policies of the content of raw text elements
+    raw_text_policies = ('text', 'opaque', 'drop')
+
+    def __init__(self, index=False, text_index=False, keep_source=False,
+                 collect_stats=False, limits=None, raw_text=None):
+        """
+        :index: whether to build an attribute index of parsed
+                documents, type bool
+        :text_index: whether to build a text index of parsed
+                     documents, type bool
+        :keep_source: whether to keep the source of parsed documents
+                      and offsets of elements in it, type bool
+        :collect_stats: whether to collect ParserStats of parsed
+                        documents, type bool
+        :limits: limits of resources used to parse a document,
+                 type ParserLimits
+        :raw_text: policies of the content of raw text elements
+                   (script and style), type dict:
+
+        {'script': 'drop', 'style': 'opaque'}
+
+        The 'text' policy (by default) keeps the content as a text,
+        'opaque' keeps it as an OpaqueText element that is not
+        a part of the text of the document and 'drop' drops it.
+        """
+        self.index = index
+        self.text_index = text_index
+        self.keep_source = keep_source
+        self.collect_stats = collect_stats
+        self.limits = limits
+        raw_text = dict(raw_text or {})
+        for name, policy in raw_text.items():
+            if name not in self.CDATA_CONTENT_ELEMENTS:
+                raise ValueError('not a raw text element: {}'.format(name))
+            if policy not in self.raw_text_policies:
+                raise ValueError('unknown policy: {}'.format(policy))
+        self.raw_text = raw_text
+        if collect_stats:
+            # indicates whether a handler is being measured
+            self._timing = False
+            # measure time of handlers by wrappers, so the parser
+            # does not check whether to measure it in each call
+            for name in ParserStats.handlers:
+                setattr(self, name, self._timed(name, getattr(self, name)))
+        # entities are processed by handle_entityref and handle_charref
+        # to keep their codes in the raw HTML of the document,
+        # the constructor calls reset() that prepares the parser
+        HTMLParser.__init__(self, convert_charrefs=False)
+
+    def _timed(self, name, handler):
+        """
+        Returns a wrapper of the handler that adds
+        the time of its calls to the stats.
+
+        :name: a name of the handler, type str
+        :handler: a handler to wrap, type callable
+        """
+        def wrapper(*args):
+            if self._timing:
+                # a handler called by another one (e.g. handle_starttag
+                # called by handle_startendtag) is a part of its call
+                return handler(*args)
+            self._timing = True
+            start = time.perf_counter()
+            try:
+                return handler(*args)
+            finally:
+                self._timing = False
+                elapsed = time.perf_counter() - start
+                calls, times = self.stats.handler_calls, self.stats.handler_time
+                calls[name] = calls.get(name, 0) + 1
+                times[name] = times.get(name, 0) + elapsed
+        return wrapper
+
+    def reset(self):
+        """
+        Resets the parser and prepares it for a new document.
+        Data fed before and not returned by get_dom() are lost.
+        """
+        HTMLParser.reset(self)
+        # an index of the current construct in the unparsed data
+        self._cursor = 0
+        # fed parts of the source of the current document
+        self._chunks = []
+        # offsets of all lines in the fed data
+        self._lines = [0]
+        # a length of all fed data
+        self._fed = 0
+        # an offset of the current document in the fed data
+        self._base = 0
+        # elements which end offset is the start of the next construct
+        self._pending = []
+        # an offset of a construct not complete at the end of the source
+        self._unparsed_start = None
+        # raw HTML codes and texts of buffered text fragments
+        self._raw_text = []
+        self._text = []
+        # an offset of the first buffered fragment
+        self._text_start = None
+        # indicates whether the last construct was a part of a text
+        # (a text fragment or an entity appended as a separate element)
+        self._in_text = False
+        # indicates whether white space was dropped
+        # after the last appended element
+        self._space = False
+        # a policy of the content of the current raw text element
+        # if it's not kept as a text, its parts and their offset
+        self._raw_policy = None
+        self._raw_parts = []
+        self._raw_start = None
+        # counters of the current document
+        self.stats = ParserStats() if self.collect_stats else None
+        self._reset_limits()
         # create a stack object
         self.stack = TagStack()
         # create a root object
-        root = dom.HTMLDocument()
+        root = self.create_document()
         # push root object to the stack
         self.stack.push(root)
 
+    def _reset_limits(self):
+        """
+        Resets counters of resources used by the current document.
+        """
+        # counts of added nodes and of characters of the text
+        self._nodes = 0
+        self._text_size = 0
+        # a time when the first data of the document are fed
+        self._started = None
+        # names of opened tags which content is skipped
+        self._skipped = []
+        # names of exceeded limits
+        self._exceeded = []
+        # indicates whether parsing of the document is stopped
+        self._stopped = False
+
+    def feed(self, data):
+        """
+        Feeds data to the parser.
+
+        :data: a part of the document, type str
+        """
+        if self._stopped:
+            # parsing of the document is stopped, ignore the rest of it
+            return
+        if self.limits is not None and self._started is None:
+            self._started = time.monotonic()
+        if self.stats is not None:
+            self.stats.chars_fed += len(data)
+        if self.keep_source:
+            self._chunks.append(data)
+            # save offsets of lines to convert positions
+            # returned by getpos() into offsets
+            self._lines.extend(m.end() + self._fed
+                               for m in newline.finditer(data))
+            self._fed += len(data)
+        try:
+            HTMLParser.feed(self, data)
+        except StopParsing:
+            self._stop()
+
+    def close(self):
+        """
+        Processes all remaining data as if they are
+        followed by the end of file.
+        """
+        if self._stopped:
+            return
+        if self.keep_source and self.rawdata:
+            # the rest of the data is not parsed yet because
+            # a construct is not complete, so it's parsed as a text
+            self._unparsed_start = self._fed - len(self.rawdata) - self._base
+        try:
+            self._parse_tail_reference()
+            HTMLParser.close(self)
+        except StopParsing:
+            self._stop()
+
+    def goahead(self, end):
+        """
+        Parses the fed data. Called by feed() and close().
+
+        :end: whether the data are followed by the end of file, type bool
+        """
+        # the tokenizer starts at the beginning of unparsed data
+        self._cursor = 0
+        HTMLParser.goahead(self, end)
+
+    def updatepos(self, i, j):
+        """
+        Moves the position of the tokenizer to the next construct.
+
+        :i: an index of the current construct, type int
+        :j: an index of the next construct, type int
+        """
+        # remember the index, so handlers of references
+        # could find their codes in the data
+        self._cursor = j
+        return HTMLParser.updatepos(self, i, j)
+
+    def _get_reference(self, code):
+        """
+        Returns the code of a reference as it's written in the source.
+        The tokenizer passes references without the semicolon which
+        is optional in HTML (e.g. "AT&T" or "&copy 2020").
+
+        :code: a code of the reference without the semicolon, type str
+        """
+        rawdata, i = self.rawdata, self._cursor
+        if rawdata.startswith(code, i) and \
+           not rawdata.startswith(';', i + len(code)):
+            return code
+        return code + ';'
+
+    def _parse_tail_reference(self):
+        """
+        Parses a reference at the end of the source,
+        the tokenizer would drop it at the end of file.
+        """
+        if self.cdata_elem is not None:
+            return
+        match = tail_reference.match(self.rawdata)
+        if match is None:
+            return
+        self._cursor = 0
+        name = match.group(1)
+        if name.startswith('#'):
+            self.handle_charref(name[1:])
+        else:
+            self.handle_entityref(name)
+        self.updatepos(0, len(self.rawdata))
+        self.rawdata = ''
+
+    def _stop(self):
+        """
+        Stops parsing of the current document dropping unprocessed data.
+        """
+        self._stopped = True
+        self.rawdata = ''
+
+    def _reset_tokenizer(self):
+        """
+        Resets the state of the tokenizer (e.g. an opened raw text
+        element) after parsing of the document is stopped,
+        so the next document is parsed from scratch.
+        """
+        HTMLParser.reset(self)
+        self._cursor = 0
+        # positions of the tokenizer start over
+        self._lines = [0]
+        self._fed = 0
+        self._base = 0
+
+    def _exceed(self, limit, skippable=True):
+        """
+        Processes an exceeded limit according to the policy.
+        Returns if the content beyond the limit should be skipped.
+
+        :limit: a name of the limit, type str
+        :skippable: whether the content could be skipped, type bool
+        """
+        if limit not in self._exceeded:
+            self._exceeded.append(limit)
+        policy = self.limits.policy
+        if policy == 'raise':
+            raise ParserLimitError(limit, getattr(self.limits, limit))
+        if policy == 'truncate' or not skippable:
+            raise StopParsing
+
+    def _check_time(self):
+        """
+        Checks the limit of time. Returns False if the content
+        should be skipped because it's inside a skipped tag.
+        """
+        if self._skipped:
+            return False
+        limits = self.limits
+        if limits.max_time is not None and \
+           time.monotonic() - self._started > limits.max_time:
+            self._exceed('max_time', False)
+        return True
+
+    def _count_node(self):
+        """
+        Counts a node appended to the DOM and checks the limit of nodes.
+
+        Nodes are counted where they are appended rather than
+        for each call of handlers, so the count does not depend on
+        how the tokenizer splits texts into fragments.
+        """
+        max_nodes = self.limits.max_nodes
+        if max_nodes is not None and self._nodes >= max_nodes:
+            self._exceed('max_nodes', False)
+        self._nodes += 1
+
+    def _check_node(self):
+        """
+        Checks limits of time and nodes before adding a node.
+        Returns False if the node should be skipped.
+        """
+        if not self._check_time():
+            return False
+        self._count_node()
+        return True
+
+    def _check_tag(self, name, attrs):
+        """
+        Checks limits before adding a tag. Returns attributes
+        of the tag to use or None if the tag should be skipped.
+        """
+        single = name in dom.HTMLTag.single_tags
+        if self._check_time():
+            limits = self.limits
+            if limits.max_depth is not None and \
+               len(self.stack.tags) > limits.max_depth:
+                self._exceed('max_depth')
+            else:
+                self._count_node()
+                if limits.max_attrs is not None and \
+                   len(attrs) > limits.max_attrs:
+                    self._exceed('max_attrs')
+                    attrs = attrs[:limits.max_attrs]
+                return attrs
+        if not single:
+            # skip the content until the tag is closed
+            self._skipped.append(name)
+        return None
+
+    def _check_text(self, data):
+        """
+        Checks limits before adding a text. Returns a part
+        of the text to add or an empty string.
+
+        The text is counted as a node when it's appended.
+        """
+        if not self._check_time():
+            return ''
+        max_text = self.limits.max_text
+        if max_text is not None and self._text_size + len(data) > max_text:
+            if self._text_size < max_text:
+                self._exceed('max_text')
+            data = data[:max_text - self._text_size]
+        self._text_size += len(data)
+        return data
+
+    def _get_offset(self):
+        """
+        Returns an offset of the current construct in the source
+        of the document and sets it as the end offset of elements
+        waiting for it.
+        """
+        lineno, column = self.getpos()
+        offset = self._lines[lineno - 1] + column - self._base
+        for element in self._pending:
+            element.source_end = offset
+        self._pending.clear()
+        return offset
+
+    def _start_construct(self):
+        """
+        Processes the beginning of any construct except text
+        fragments and entities: appends buffered text to the DOM
+        and returns an offset of the construct if the source is kept.
+        """
+        self._flush_text()
+        self._in_text = False
+        return self._get_offset() if self.keep_source else None
+
+    def _buffer_text(self, raw_html, text, offset):
+        """
+        Adds a text fragment to the buffer.
+
+        :raw_html: a raw HTML code of the fragment, type str
+        :text: a text of the fragment, type str
+        :offset: an offset of the fragment, type int or None
+        """
+        if not self._raw_text:
+            self._text_start = offset
+        self._raw_text.append(raw_html)
+        self._text.append(text)
+
+    def _flush_text(self):
+        """
+        Appends all buffered text fragments to the current
+        opened tag as a single PlainText object.
+        """
+        if not self._raw_text:
+            return
+        raw_html = ''.join(self._raw_text)
+        text = ''.join(self._text)
+        self._raw_text.clear()
+        self._text.clear()
+        # ignore empty strings without printable characters
+        # unless they continue a text after an entity
+        if not self._in_text and not text.strip(' \n\t\xA0'):
+            # a serializer could restore a collapsed space
+            self._space = True
+            return
+        if self.limits is not None:
+            self._count_node()
+        # create a PlainText object
+        element = dom.PlainText(text, raw_html)
+        # and append it to current opened tag
+        self.stack.current.append(element)
+        self._mark_text()
+        if self.keep_source:
+            self._track_text(self._text_start)
+
+    def _flush_raw(self):
+        """
+        Appends the content of the current raw text element
+        as an OpaqueText object if it should be kept.
+        """
+        self._raw_policy = None
+        if self._raw_parts:
+            element = dom.OpaqueText(''.join(self._raw_parts))
+            self._raw_parts.clear()
+            if self.limits is not None:
+                self._count_node()
+            self._mark_space(element)
+            self.stack.current.append(element)
+            if self.keep_source:
+                element.source_start = self._raw_start
+                self._pending.append(element)
+
+    def _mark_space(self, element):
+        """
+        Marks the element appended next if white space
+        was dropped before it.
+
+        :element: an element to append, type SourceElement
+        """
+        if self._space:
+            element.space_before = True
+            self._space = False
+
+    def _mark_text(self):
+        """
+        Marks the text node of the text appended last if white
+        space was dropped before it. The space is lost if the text
+        continues a text node.
+        """
+        if self._space:
+            node = self.stack.current.elements[-1]
+            if len(node.elements) == 1:
+                node.space_before = True
+            self._space = False
+
+    def _close_tag(self, offset, explicit=False):
+        """
+        Closes the current opened tag.
+
+        :offset: an offset of the construct that closes the tag,
+                 type int or None
+        :explicit: whether the tag is closed by its end tag, type bool
+        """
+        tag = self.stack.current
+        if self._space:
+            # white space was dropped before the end of the tag
+            tag.space_at_end = True
+            self._space = False
+        if self.keep_source:
+            tag.inner_end = offset
+            if explicit:
+                # the end tag ends where the next construct starts
+                self._pending.append(tag)
+            else:
+                tag.source_end = offset
+        self.stack.pop()
+        self.handle_tag_close(tag)
+
+    def create_document(self):
+        """
+        Returns a new document. Could be overridden to create
+        documents of other classes.
+        """
+        return dom.HTMLDocument()
+
+    def create_tag(self, name, attrs):
+        """
+        Returns a new tag. Could be overridden to create
+        tags of other classes.
+
+        :name: a name of the tag, type str
+        :attrs: attributes of the tag, type a list of tuples
+        """
+        return dom.HTMLTag(name, attrs)
+
+    def handle_tag_open(self, tag):
+        """
+        Called when a tag is appended to the DOM. Does nothing,
+        could be overridden to process tags while parsing.
+
+        :tag: an opened tag, type HTMLTag
+        """
+        pass
+
+    def handle_tag_close(self, tag):
+        """
+        Called when a tag is closed, i.e. when its content is complete.
+        Does nothing, could be overridden to process tags while parsing.
+
+        :tag: a closed tag, type HTMLTag
+        """
+        pass
+
     def handle_starttag(self, name, attrs):
         """
         Processes a start tag such as
@@ -87,15 +724,35 @@ class DOMParser(HTMLParser):
 
         [(attr1, value1), (attr2, value2)...]
         """
+        offset = self._start_construct()
+        if self.limits is not None:
+            attrs = self._check_tag(name, attrs)
+            if attrs is None:
+                return
         # create a tag
-        tag = dom.HTMLTag(name, attrs)
+        tag = self.create_tag(name, attrs)
+        if self.keep_source:
+            tag.source_start = offset
+            end = tag.source_start + len(self.get_starttag_text())
+            if tag.single:
+                tag.source_end = end
+            else:
+                tag.inner_start = end
         # append tag as a child
         # to the current tag
+        self._mark_space(tag)
         self.stack.current.append(tag)
         # push the tag to the stack
         # the tag would become current
         # if that is not simple tag
         self.stack.push(tag)
+        if name in self.raw_text and self.raw_text[name] != 'text':
+            # the parser passes the content of the tag as data
+            self._raw_policy = self.raw_text[name]
+        self.handle_tag_open(tag)
+        if tag.single:
+            # single tags are complete at once
+            self.handle_tag_close(tag)
 
     def handle_endtag(self, name):
         """
@@ -115,12 +772,53 @@ class DOMParser(HTMLParser):
         # </p>      - ignore it
         # so there would be a DIV tag object with a child P tag inside as it's
         # expected if the HTML code were correct.
+        if self._raw_policy is not None:
+            # the end of a raw text element
+            self._flush_raw()
+        offset = self._start_construct()
+        if self.limits is not None and self._skipped:
+            # close skipped tags until encounter an appropriate one
+            if name in self._skipped:
+                while self._skipped.pop() != name:
+                    pass
+                return
+            if name not in self.stack:
+                return
+            # the end tag closes an opened tag, so skipped
+            # tags which are not closed end before it
+            self._skipped.clear()
         if name in self.stack:
             # close all tags until encounter an appropriate one
             while name != self.stack.current.tag_name:
-                self.stack.pop()
+                self._close_tag(offset)
+                if self.stats is not None:
+                    self.stats.recovery_pops += 1
             # close the tag
-            self.stack.pop()
+            self._close_tag(offset, explicit=True)
+        elif self.stats is not None:
+            self.stats.ignored_end_tags += 1
+
+    def handle_startendtag(self, name, attrs):
+        """
+        Processes a self-closing tag such as <tag ... />
+
+        :name: a name of the tag, type str
+        :attrs: attributes of the tag, type a list of tuples
+        """
+        skipped = len(self._skipped)
+        self.handle_starttag(name, attrs)
+        # a self-closing raw text element has no content
+        self._raw_policy = None
+        if self._skipped:
+            # the tag is skipped, so there is nothing to close
+            del self._skipped[skipped:]
+            return
+        if name in self.stack and self.stack.current.tag_name == name:
+            # the tag has been opened, so close it
+            tag = self.stack.current
+            self._close_tag(tag.inner_start)
+            if self.keep_source:
+                tag.source_end = tag.inner_start
 
     def handle_data(self, data):
         """
@@ -128,13 +826,35 @@ class DOMParser(HTMLParser):
 
         :data: data of the text, type str
         """
-        # ignore empty strings without printable characters
-        if not data.strip(' \n\t\xA0'):
+        if self._raw_policy == 'drop':
             return
-        # create a PlainText object
-        element = dom.PlainText(data)
-        # and append it to current opened tag
-        self.stack.current.append(element)
+        if self.limits is not None:
+            data = self._check_text(data)
+            if not data:
+                return
+        if self._raw_policy is not None:
+            # keep the content of a raw text element as it is
+            if self.keep_source and not self._raw_parts:
+                self._raw_start = self._get_offset()
+            self._raw_parts.append(data)
+            return
+        offset = self._get_offset() if self.keep_source else None
+        # the parser could split a text into several fragments,
+        # so buffer them until the text ends to create a single
+        # PlainText object for the whole text
+        self._buffer_text(data, data, offset)
+
+    def _track_text(self, offset):
+        """
+        Sets offsets of the text node that contains
+        the last appended text element.
+
+        :offset: an offset of the text element, type int
+        """
+        node = self.stack.current.elements[-1]
+        if node.source_start is None:
+            node.source_start = offset
+        self._pending.append(node)
 
     def handle_entityref(self, name):
         """
@@ -142,15 +862,43 @@ class DOMParser(HTMLParser):
 
         :name: a name of the entity, type str
         """
+        code = self._get_reference('&' + name)
+        if self.limits is not None:
+            if self._check_text(code) != code:
+                return
+        offset = self._get_offset() if self.keep_source else None
         try:
+            if not code.endswith(';'):
+                raise KeyError(name)
             # create an entity by its name
             element = dom.NamedEntity(name)
         except:
-            # if there is no entity with specified name
-            # use its code as a palin text
-            element = dom.PlainText('&' + name + ';')
-        # append result to current opened tag
+            element = self._get_fallback(code)
+        self._handle_entity(element, offset)
+
+    def _handle_entity(self, element, offset):
+        """
+        Adds an entity to the text.
+
+        :element: an entity or a text with its code, type HTMLText
+        :offset: an offset of the entity, type int or None
+        """
+        if not element.data.isspace():
+            # the text keeps the code of the entity in its raw HTML,
+            # so there is no need in a separate element
+            self._buffer_text(element.raw_html, element.data, offset)
+            return
+        # white space characters such as &nbsp; should not be
+        # replaced by spaces in the text, so append them as
+        # separate elements after the buffered text
+        self._flush_text()
+        if self.limits is not None:
+            self._count_node()
         self.stack.current.append(element)
+        self._mark_text()
+        if self.keep_source:
+            self._track_text(offset)
+        self._in_text = True
 
     def handle_charref(self, num):
         """
@@ -158,15 +906,37 @@ class DOMParser(HTMLParser):
 
         :num: a numeric code of the character, type str
         """
+        code = self._get_reference('&#' + num)
+        if self.limits is not None:
+            if self._check_text(code) != code:
+                return
+        offset = self._get_offset() if self.keep_source else None
         try:
+            if not code.endswith(';'):
+                raise ValueError(num)
             # create an entity by its code
             element = dom.NumEntity(num)
         except:
+            element = self._get_fallback(code)
+        self._handle_entity(element, offset)
+
+    def _get_fallback(self, code):
+        """
+        Returns a text of a reference which is not an entity
+        known by NamedEntity and NumEntity, e.g. a reference
+        without the semicolon or an entity of HTML5.
+
+        :code: a code of the reference in the source, type str
+        """
+        if self.stats is not None:
+            self.stats.entity_fallbacks += 1
+        # the text follows the rules of html.unescape
+        text = unescape(code)
+        if text == code:
             # if there is no entity with specified name
             # use its code as a palin text
-            element = dom.PlainText('&#' + num + ';')
-        # append result to current opened tag
-        self.stack.current.append(element)
+            return dom.PlainText(code)
+        return dom.PlainText(text, code)
 
     def handle_comment(self, data):
         """
@@ -174,9 +944,16 @@ class DOMParser(HTMLParser):
 
         :data: data of the comment, type str
         """
+        offset = self._start_construct()
+        if self.limits is not None and not self._check_node():
+            return
         # create a comment object
         element = dom.HTMLComment(data)
+        if self.keep_source:
+            element.source_start = offset
+            self._pending.append(element)
         # append result to current opened tag
+        self._mark_space(element)
         self.stack.current.append(element)
 
     def handle_decl(self, decl):
@@ -186,7 +963,54 @@ class DOMParser(HTMLParser):
 
         :decl: a string of declaration, type str
         """
-        self.stack.root.doctype = dom.DoctypeDeclaration(decl)
+        offset = self._start_construct()
+        element = dom.DoctypeDeclaration(decl)
+        if self.keep_source:
+            element.source_start = offset
+            element.parent = self.stack.root
+            self._pending.append(element)
+        self.stack.root.doctype = element
+
+    def handle_pi(self, data):
+        """
+        Processes an instruction such as <?xml ...?>
+        Instructions are ignored.
+
+        :data: a text of the instruction, type str
+        """
+        self._start_construct()
+
+    def unknown_decl(self, data):
+        """
+        Processes an unknown declaration such as <![CDATA[...]]>
+        Unknown declarations are ignored.
+
+        :data: a text of the declaration, type str
+        """
+        self._start_construct()
+
+    def _finish_source(self, dom_root):
+        """
+        Sets the source of the document and end offsets
+        of elements that are not closed yet.
+
+        :dom_root: a parsed document, type HTMLDocument
+        """
+        end = self._fed - self._base
+        for element in self._pending:
+            element.source_end = end
+        self._pending.clear()
+        for tag in self.stack.tags[1:]:
+            tag.inner_end = tag.source_end = end
+        dom_root.source = ''.join(self._chunks)
+        dom_root.source_start = 0
+        dom_root.source_end = end
+        if self._unparsed_start is not None:
+            dom_root.unparsed_start = self._unparsed_start
+            self._unparsed_start = None
+        # the next document starts after the current one
+        self._chunks = []
+        self._base = self._fed
 
     def get_dom(self):
         """
@@ -195,6 +1019,14 @@ class DOMParser(HTMLParser):
 
         Prepare the parser for a new document.
         """
+        # append the text at the end of the document
+        try:
+            self._flush_text()
+            self._flush_raw()
+        except StopParsing:
+            self._stop()
+        self._in_text = False
+        space, self._space = self._space, False
         try:
             # get a root elemtn - HTMLDocument object
             dom_root = self.stack.root
@@ -202,12 +1034,136 @@ class DOMParser(HTMLParser):
             # HTMLDocument does not exist
             return None
         else:
+            if space:
+                # the space is dropped before the end of the
+                # innermost opened tag or of the document
+                self.stack.current.space_at_end = True
+            if self.keep_source:
+                self._finish_source(dom_root)
+            # close all opened tags except the document
+            for tag in reversed(self.stack.tags[1:]):
+                self.handle_tag_close(tag)
+            # the document is complete, so indexes
+            # would not be dropped by following changes
+            if self.index:
+                dom_root.build_index()
+            if self.text_index:
+                dom_root.build_text_index()
+            if self._exceeded:
+                dom_root.exceeded_limits = tuple(self._exceeded)
+            if self.stats is not None:
+                self.stats.count_elements(dom_root)
+                dom_root.parse_stats = self.stats
+                self.stats = ParserStats()
             # return result
             return dom_root
         finally:
+            if self._stopped:
+                self._reset_tokenizer()
+            self._reset_limits()
             # clear the stack
             self.stack.clear()
             # and create a new HTMLDocument object
-            root = dom.HTMLDocument()
+            root = self.create_document()
             # append a new root element to the stack
             self.stack.push(root)
+
+
+class ParserPool:
+    """
+    A thread-safe pool of parsers ready to parse new documents.
+
+    Creating a parser for each document takes a noticeable time
+    when small documents are parsed, so the pool keeps parsers
+    released after parsing and gives them out again.
+    """
+
+    def __init__(self, parser_class=DOMParser, max_size=16):
+        """
+        :parser_class: a class of parsers, type a subclass of DOMParser
+        :max_size: a maximum count of kept parsers with the same
+                   options, type int
+        """
+        self.parser_class = parser_class
+        self.max_size = max_size
+        # options of parsers -> a list of free parsers
+        self._parsers = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, **options):
+        """
+        Returns a free parser with specified options
+        creating it if there are no free parsers.
+
+        Options are passed to the constructor of the parser.
+        """
+        key = tuple(sorted(
+            # dictionaries of options could not be used in the key
+            (n, tuple(sorted(v.items())) if isinstance(v, dict) else v)
+            for n, v in options.items()))
+        with self._lock:
+            parsers = self._parsers.get(key)
+            if parsers:
+                return parsers.pop()
+        parser = self.parser_class(**options)
+        # remember options to return the parser to the right list
+        parser._pool_key = key
+        return parser
+
+    def release(self, parser):
+        """
+        Resets a parser and returns it to the pool. The parser
+        is reset even if it has been failed while parsing.
+
+        :parser: a parser returned by acquire(), type DOMParser
+        """
+        parser.reset()
+        with self._lock:
+            parsers = self._parsers.setdefault(parser._pool_key, [])
+            if len(parsers) < self.max_size:
+                parsers.append(parser)
+
+    @contextmanager
+    def parser(self, **options):
+        """
+        A context manager that acquires a parser
+        and releases it on exit.
+
+        with pool.parser() as parser:
+            parser.feed(source)
+            document = parser.get_dom()
+        """
+        parser = self.acquire(**options)
+        try:
+            yield parser
+        finally:
+            self.release(parser)
+
+    def parse(self, source, **options):
+        """
+        Parses a source using a parser from the pool
+        and returns an HTMLDocument object.
+
+        :source: an HTML code of the document, type str
+        """
+        with self.parser(**options) as parser:
+            parser.feed(source)
+            parser.close()
+            return parser.get_dom()
+
+
+# a pool used by the parse function
+default_pool = ParserPool()
+
+
+def parse(source, **options):
+    """
+    Parses a source and returns an HTMLDocument object.
+
+    :source: an HTML code of the document, type str
+
+    Options are passed to DOMParser. Parsers are taken from
+    the default pool, so the function is thread-safe and does
+    not create a new parser for each document.
+    """
+    return default_pool.parse(source, **options)
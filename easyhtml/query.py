@@ -0,0 +1,51 @@
+import re
+
+from . import dom
+
+__all__ = ('parse_query', 'find_tags')
+
+# a query such as "div", "div(class=foo; id=bar)", "(class=foo)" or "#id"
+query_pattern = re.compile(r'^\s*(#.+|[^()\s]*)\s*(?:\((.*)\))?\s*$')
+
+
+def parse_query(spec):
+    """
+    Splits a query into a tag name, a query of attributes
+    and an ID. Absent parts are None.
+
+    :spec: a query, type str
+
+    A query could be a tag name: "div", a tag name with attributes:
+    "div(class=foo; id=bar)", attributes only: "(class=foo)" or
+    an ID of the tag: "#bar"
+    """
+    match = query_pattern.match(spec)
+    if not match or not (match.group(1) or match.group(2)):
+        raise ValueError('invalid query: {}'.format(spec))
+    name, attrs = match.groups()
+    # each condition of attributes should be "name=value"
+    if attrs is not None and \
+       any(len(c) != 2 or not c[0] for c in dom.parse_query(attrs)):
+        raise ValueError('invalid query: {}'.format(spec))
+    if name.startswith('#'):
+        return None, None, name[1:]
+    return name or None, attrs, None
+
+
+def find_tags(container, spec):
+    """
+    Returns a list of tags that match the query.
+
+    :container: a container to search in, type HTMLDocument or HTMLTag
+    :spec: a query, see parse_query(), type str
+    """
+    name, attrs, e_id = parse_query(spec)
+    if e_id is not None:
+        tag = container.get_element_by_id(e_id)
+        return [tag] if tag is not None else []
+    if name is None:
+        return list(container.get_children(attrs))
+    tags = container.get_tags_by_name(name)
+    if attrs is not None:
+        tags = tags(attrs)
+    return list(tags)
@@ -0,0 +1,198 @@
+import re
+
+from . import dom
+
+__all__ = ('modes', 'iter_html', 'serialize', 'write')
+
+# modes of serialization:
+# pretty   - the raw HTML code with added newlines and indents
+# minified - no added white space, white space in texts is collapsed,
+#            white space dropped between elements becomes a space
+# compact  - no added white space, texts are kept as they are and
+#            white space between elements is restored from the source
+modes = ('pretty', 'minified', 'compact')
+
+# tags which content keeps its white space in the minified mode
+preformatted = ('pre', 'textarea', 'script', 'style')
+
+spaces = re.compile(r'\s+')
+
+
+def escape_attr(value):
+    """
+    Escapes a value of an attribute to put it between double quotes.
+    """
+    return value.replace('&', '&amp;').replace('"', '&quot;')
+
+
+def get_start_tag(tag):
+    """
+    Returns a start tag without added white space. Values
+    of attributes are quoted and escaped, attributes without
+    values are written by their names only.
+
+    :tag: a tag, type HTMLTag
+    """
+    parts = ['<', tag.tag_name]
+    for name, value in tag.get_attr_items():
+        if value is None:
+            parts.append(' ' + name)
+        else:
+            parts.append(' {}="{}"'.format(name, escape_attr(value)))
+    parts.append('>')
+    return ''.join(parts)
+
+
+def _get_gap(source, start, end):
+    """
+    Returns white space dropped by the parser between
+    specified offsets or an empty string.
+    """
+    if source is None or start is None or end is None or start >= end:
+        return ''
+    gap = source[start:end]
+    return gap if gap.isspace() else ''
+
+
+def _get_comment(comment):
+    """
+    Returns a code of the comment without spaces
+    added around its text by the parser.
+    """
+    return '<!--' + comment._raw_html[5:-4] + '-->'
+
+
+def _get_source(element):
+    """
+    Returns the source of the document the element belongs to.
+    """
+    while element.parent is not None:
+        element = element.parent
+    if isinstance(element, dom.HTMLDocument):
+        return element.source
+    return None
+
+
+def iter_html(element, mode='minified'):
+    """
+    Yields parts of an HTML code of the element.
+
+    :element: an element to serialize, type HTMLDocument or HTMLTag
+    :mode: a mode of serialization, one of modes, type str
+
+    The pretty mode returns raw_html of the element at once, other
+    modes walk the element without recursion and yield small parts,
+    so a large document is not built in memory as a whole.
+    """
+    if mode not in modes:
+        raise ValueError('unknown mode: {}'.format(mode))
+    if mode == 'pretty':
+        yield element.raw_html
+        return
+    compact = mode == 'compact'
+    source = _get_source(element) if compact else None
+    # without the source white space dropped between elements
+    # is restored as a single space where the parser marked it
+    spaced = source is None
+    # whether the last part ends with white space
+    blank = False
+    # offsets of the end of the previous element
+    # are used to restore white space between elements
+    previous = None
+    if isinstance(element, dom.HTMLDocument):
+        if element.doctype is not None:
+            yield element.doctype._raw_html
+            previous = element.doctype.source_end
+        else:
+            previous = 0
+    else:
+        yield get_start_tag(element)
+        if element.single:
+            return
+        previous = element.inner_start
+    # a stack of tuples (container, iterator over its elements,
+    # whether the content is preformatted) used instead of recursion
+    keep = isinstance(element, dom.HTMLTag) and \
+        element.tag_name in preformatted
+    stack = [(element, iter(element.elements), keep)]
+    while stack:
+        container, elements, keep = stack[-1]
+        for child in elements:
+            if compact:
+                yield _get_gap(source, previous, child.source_start)
+            if spaced and child.space_before and not blank:
+                yield ' '
+            blank = False
+            if isinstance(child, dom.HTMLTag):
+                yield get_start_tag(child)
+                if child.single:
+                    previous = child.source_end
+                    continue
+                stack.append((child, iter(child.elements),
+                              keep or child.tag_name in preformatted))
+                previous = child.inner_start
+                break
+            if isinstance(child, dom.TextNode):
+                text = dom.HTMLElementMixin.raw_html.fget(child)
+                if not compact and not keep:
+                    text = spaces.sub(' ', text)
+                blank = text[-1:].isspace()
+                yield text
+            elif isinstance(child, dom.HTMLComment):
+                # the parser adds spaces around the text of comments,
+                # so the compact mode takes them from the source
+                text = child.outer_source if compact else None
+                yield _get_comment(child) if text is None else text
+            else:
+                # the content of raw text elements
+                yield child._raw_html
+            previous = child.source_end
+        else:
+            stack.pop()
+            if isinstance(container, dom.HTMLTag):
+                if compact:
+                    yield _get_gap(source, previous, container.inner_end)
+                if spaced and container.space_at_end and not blank:
+                    yield ' '
+                blank = False
+                yield '</' + container.tag_name + '>'
+                previous = container.source_end
+            elif compact and source is not None:
+                # white space at the end of the document
+                yield _get_gap(source, previous, len(source))
+
+
+def serialize(element, mode='minified'):
+    """
+    Returns an HTML code of the element.
+
+    :element: an element to serialize, type HTMLDocument or HTMLTag
+    :mode: a mode of serialization, one of modes, type str
+    """
+    return ''.join(iter_html(element, mode))
+
+
+def write(element, file, mode='minified', chunk_size=65536):
+    """
+    Writes an HTML code of the element to a file
+    and returns a count of written characters.
+
+    :element: an element to serialize, type HTMLDocument or HTMLTag
+    :file: a file to write to, type a text file object
+    :mode: a mode of serialization, one of modes, type str
+    :chunk_size: an approximate size of written chunks, type int
+    """
+    parts = []
+    size = total = 0
+    for part in iter_html(element, mode):
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            file.write(''.join(parts))
+            total += size
+            parts.clear()
+            size = 0
+    if parts:
+        file.write(''.join(parts))
+        total += size
+    return total
@@ -0,0 +1,557 @@
+from array import array
+from types import MappingProxyType
+import mmap
+import os
+import struct
+import textwrap
+
+from . import dom
+
+__all__ = ('SharedDocument', 'export', 'share', 'attach', 'save', 'load')
+
+# a header of the buffer: a signature, a version, counts of nodes,
+# attributes and strings and a size of the string pool
+header = struct.Struct('=4sIIIIQ')
+signature = b'EHTM'
+version = 1
+
+# fields of a node in the node table, each of them is an int32
+(KIND, PARENT, END, NAME, ATTRS_START, ATTRS_END, TEXT, RAW) = range(8)
+node_size = 8
+
+# kinds of nodes
+DOCUMENT, TAG, TEXT_NODE, COMMENT, DOCTYPE, OPAQUE = range(6)
+
+# classes of hidden elements -> kinds of their nodes
+hidden_kinds = (
+    (dom.OpaqueText, OPAQUE),
+    (dom.DoctypeDeclaration, DOCTYPE),
+    (dom.HTMLComment, COMMENT),
+)
+
+
+def _align(size):
+    """
+    Returns the size rounded up to a multiple of 8,
+    so tables of numbers start at aligned offsets.
+    """
+    return (size + 7) & ~7
+
+
+class StringPool:
+    """
+    Collects unique strings and assigns them numbers.
+    """
+
+    def __init__(self):
+        # a string -> its number
+        self.numbers = {}
+        self.strings = []
+
+    def add(self, string):
+        """
+        Returns a number of the string, None is numbered as -1.
+        """
+        if string is None:
+            return -1
+        number = self.numbers.get(string)
+        if number is None:
+            number = self.numbers[string] = len(self.strings)
+            self.strings.append(string)
+        return number
+
+
+def _hidden_kind(element):
+    for cls, kind in hidden_kinds:
+        if isinstance(element, cls):
+            return kind
+    return None
+
+
+def export(document):
+    """
+    Exports a document into a flat buffer and returns it.
+
+    :document: a document to export, type HTMLDocument
+
+    The buffer contains a table of nodes in the document order,
+    a table of attributes and a pool of unique strings. Each tag
+    knows the end of its subtree, so nested tags are found by
+    scanning a range of the table without recursion.
+    """
+    strings = StringPool()
+    nodes = []
+    attrs = []
+    doctype = document.doctype
+    nodes.append([DOCUMENT, -1, 0, -1, 0, 0, -1, strings.add(
+        doctype._raw_html if doctype is not None else None)])
+    # pairs (element, number of its parent node), the end
+    # of a subtree is set when a marker (None, node) is popped
+    stack = [(None, 0)]
+    stack.extend((e, 0) for e in reversed(document.elements))
+    while stack:
+        element, parent = stack.pop()
+        if element is None:
+            nodes[parent][END] = len(nodes)
+            continue
+        number = len(nodes)
+        if isinstance(element, dom.HTMLTag):
+            start = len(attrs)
+            for name, value in element.get_attr_items():
+                attrs.append((strings.add(name), strings.add(value)))
+            nodes.append([TAG, parent, 0, strings.add(element.tag_name),
+                          start, len(attrs), -1, -1])
+            stack.append((None, number))
+            stack.extend((e, number) for e in reversed(element.elements))
+            continue
+        if isinstance(element, dom.TextNode):
+            kind = TEXT_NODE
+            text = strings.add(str(element))
+            raw = strings.add(dom.HTMLElementMixin.raw_html.fget(element))
+        else:
+            kind = _hidden_kind(element)
+            if kind is None:
+                raise TypeError('could not export {}'.format(
+                    type(element).__name__))
+            text = -1
+            raw = strings.add(element._raw_html)
+        nodes.append([kind, parent, number + 1, -1, 0, 0, text, raw])
+    encoded = [s.encode('utf-8', 'surrogatepass') for s in strings.strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    nodes_offset = _align(header.size)
+    attrs_offset = nodes_offset + len(nodes) * node_size * 4
+    offsets_offset = _align(attrs_offset + len(attrs) * 2 * 4)
+    data_offset = offsets_offset + len(offsets) * 8
+    buffer = bytearray(data_offset + offsets[-1])
+    header.pack_into(buffer, 0, signature, version, len(nodes), len(attrs),
+                     len(encoded), offsets[-1])
+    # tables are read by casting the buffer, so they
+    # are written in the native byte order
+    tables = (
+        (nodes_offset, array('i', (f for node in nodes for f in node))),
+        (attrs_offset, array('i', (n for attr in attrs for n in attr))),
+        (offsets_offset, array('q', offsets)),
+    )
+    for offset, table in tables:
+        data = table.tobytes()
+        buffer[offset:offset + len(data)] = data
+    buffer[data_offset:] = b''.join(encoded)
+    return buffer
+
+
+class SharedNode:
+    """
+    A read-only proxy of a node of a shared document.
+    """
+
+    __slots__ = ('document', 'index')
+
+    def __init__(self, document, index):
+        """
+        :document: a document the node belongs to, type SharedDocument
+        :index: a number of the node in the node table, type int
+        """
+        self.document = document
+        self.index = index
+
+    def _field(self, field):
+        return self.document._nodes[self.index * node_size + field]
+
+    @property
+    def parent(self):
+        """
+        Returns a container of the node.
+        """
+        return self.document._get_node(self._field(PARENT))
+
+    def __eq__(self, other):
+        return isinstance(other, SharedNode) and \
+            other.document is self.document and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.document), self.index))
+
+
+class SharedTextNode(SharedNode):
+    """
+    A proxy of a TextNode.
+    """
+
+    __slots__ = ()
+
+    @property
+    def raw_html(self):
+        text = self.document._get_string(self._field(RAW))
+        return text + ('\n' if not text.endswith('\n') else '')
+
+    def __str__(self):
+        return self.document._get_string(self._field(TEXT))
+
+
+class SharedHiddenElement(SharedNode):
+    """
+    A proxy of a comment or the content of a raw text element.
+    """
+
+    __slots__ = ()
+
+    @property
+    def raw_html(self):
+        return self.document._get_string(self._field(RAW)) + '\n'
+
+    @property
+    def text(self):
+        """
+        Returns the content of a raw text element.
+        """
+        return self.document._get_string(self._field(RAW))
+
+    def __str__(self):
+        return ''
+
+
+class SharedContainer(SharedNode):
+    """
+    A proxy of a document or a tag that provides the search API.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        """
+        An attribute of the object returns
+        a collection of all tags with specified name.
+        """
+        if name.startswith('_'):
+            # private fields are never names of tags
+            raise AttributeError(name)
+        return self.get_tags_by_name(name)
+
+    @property
+    def elements(self):
+        """
+        Returns a list of proxies of contained elements.
+        """
+        document = self.document
+        nodes = document._nodes
+        elements = []
+        index = self.index + 1
+        end = self._field(END)
+        while index < end:
+            elements.append(document._get_node(index))
+            # the next sibling follows the subtree of the node
+            index = nodes[index * node_size + END]
+        return elements
+
+    @property
+    def tags(self):
+        """
+        Returns a generator of tags contained by the object.
+        """
+        return filter(lambda e: isinstance(e, SharedTag), self.elements)
+
+    def _iter_tag_indexes(self):
+        """
+        Yields numbers of all nested tags in the document order.
+        """
+        nodes = self.document._nodes
+        for index in range(self.index + 1, self._field(END)):
+            if nodes[index * node_size + KIND] == TAG:
+                yield index
+
+    def get_all_tags(self):
+        """
+        Returns a generator that yields all nested tags
+        in the document order.
+        """
+        document = self.document
+        return (SharedTag(document, i) for i in self._iter_tag_indexes())
+
+    def get_tags_by_name(self, name):
+        """
+        Returns an HTMLCollection object contains tags
+        with specified name including nested tags.
+
+        :name: a name of search tags, type str
+        """
+        document = self.document
+        number = document._get_name_number(name)
+        if number is None:
+            return dom.HTMLCollection(())
+        nodes = document._nodes
+        return dom.HTMLCollection(
+            SharedTag(document, i) for i in self._iter_tag_indexes()
+            if nodes[i * node_size + NAME] == number)
+
+    def get_children(self, query):
+        """
+        Returns an HTMLCollection object contains tags
+        with specified in the query attributes.
+
+        :query: a query to search tags by attributes, type str
+        """
+        return dom.HTMLCollection(filter(lambda e: e.check_attrs(query),
+                                  self.get_all_tags()))
+
+    def get_element_by_id(self, e_id):
+        """
+        Returns a tag with specified id. If the tag
+        is not found returns None.
+
+        :e_id: an ID of the tag, type str
+        """
+        for tag in self.get_all_tags():
+            if tag.check_attr('id', e_id):
+                return tag
+        return None
+
+    @property
+    def inner_html(self):
+        """
+        Returns HTML codes of contained elements.
+        """
+        return ''.join(e.raw_html for e in self.elements)
+
+    def __str__(self):
+        return ''.join(str(e) for e in self.elements)
+
+
+class SharedTag(SharedContainer):
+    """
+    A proxy of an HTMLTag.
+    """
+
+    __slots__ = ()
+
+    single_tags = dom.HTMLTag.single_tags
+
+    @property
+    def tag_name(self):
+        return self.document._get_string(self._field(NAME))
+
+    @property
+    def single(self):
+        return self.tag_name in self.single_tags
+
+    def get_attr_items(self):
+        """
+        Returns a list of pairs (name, value) of attributes.
+        """
+        document = self.document
+        attrs = document._attrs
+        return [(document._get_string(attrs[i * 2]),
+                 document._get_string(attrs[i * 2 + 1]))
+                for i in range(self._field(ATTRS_START),
+                               self._field(ATTRS_END))]
+
+    @property
+    def attrs(self):
+        """
+        Returns a read-only mapping of attributes.
+        """
+        return MappingProxyType(dict(self.get_attr_items()))
+
+    def get_attr(self, name):
+        for attr, value in self.get_attr_items():
+            if attr == name:
+                return value
+        return None
+
+    check_attr = dom.HTMLTag.check_attr
+    check_attrs = dom.HTMLTag.check_attrs
+    filter_tags_by_attrs = dom.HTMLTag.filter_tags_by_attrs
+    start_tag = dom.HTMLTag.start_tag
+    end_tag = dom.HTMLTag.end_tag
+
+    @property
+    def raw_html(self):
+        text = self.start_tag
+        if not self.single:
+            text += textwrap.indent(self.inner_html, ' ' * 4)
+            text += self.end_tag
+        return text
+
+
+class SharedDocument(SharedContainer):
+    """
+    A read-only document that reads its nodes from a flat buffer
+    made by export(). The buffer is not copied, so documents in
+    several processes could share the same memory.
+    """
+
+    __slots__ = ('buffer', '_owner', '_view', '_nodes', '_attrs',
+                 '_offsets', '_data', '_strings', '_names')
+
+    def __init__(self, buffer, owner=None):
+        """
+        :buffer: a buffer made by export(), type bytes-like object
+        :owner: an object that owns the buffer and is closed
+                by close(), e.g. SharedMemory or mmap
+        """
+        SharedNode.__init__(self, self, 0)
+        self.buffer = buffer
+        self._owner = owner
+        view = self._view = memoryview(buffer).cast('B')
+        (sign, buffer_version, node_count, attr_count, string_count,
+         data_size) = header.unpack_from(view, 0)
+        if sign != signature or buffer_version != version:
+            raise ValueError('not an exported document')
+        start = _align(header.size)
+        end = start + node_count * node_size * 4
+        self._nodes = view[start:end].cast('i')
+        start, end = end, end + attr_count * 2 * 4
+        self._attrs = view[start:end].cast('i')
+        start = _align(end)
+        end = start + (string_count + 1) * 8
+        self._offsets = view[start:end].cast('q')
+        self._data = view[end:end + data_size]
+        # decoded strings, they are decoded on first access
+        self._strings = [None] * string_count
+        # names of tags -> numbers of their strings
+        self._names = None
+
+    def _get_node(self, index):
+        """
+        Returns a proxy of the node with specified number.
+        """
+        if index < 0:
+            return None
+        kind = self._nodes[index * node_size + KIND]
+        if kind == DOCUMENT:
+            return self
+        if kind == TAG:
+            return SharedTag(self, index)
+        if kind == TEXT_NODE:
+            return SharedTextNode(self, index)
+        return SharedHiddenElement(self, index)
+
+    def _get_string(self, number):
+        """
+        Returns a string with specified number, -1 is None.
+        """
+        if number < 0:
+            return None
+        string = self._strings[number]
+        if string is None:
+            start, end = self._offsets[number], self._offsets[number + 1]
+            string = self._strings[number] = str(
+                self._data[start:end], 'utf-8', 'surrogatepass')
+        return string
+
+    def _get_name_number(self, name):
+        """
+        Returns a number of the string of the tag name
+        or None if there are no tags with such name.
+        """
+        names = self._names
+        if names is None:
+            nodes = self._nodes
+            numbers = set(nodes[i * node_size + NAME]
+                          for i in range(len(nodes) // node_size)
+                          if nodes[i * node_size + KIND] == TAG)
+            names = self._names = {self._get_string(n): n for n in numbers}
+        return names.get(name)
+
+    @property
+    def parent(self):
+        return None
+
+    @property
+    def doctype(self):
+        """
+        Returns a raw HTML code of the doctype declaration
+        or None if the document does not have it.
+        """
+        decl = self._get_string(self._field(RAW))
+        return decl + '\n' if decl is not None else None
+
+    @property
+    def raw_html(self):
+        return (self.doctype or '') + self.inner_html
+
+    def close(self):
+        """
+        Releases the buffer and closes its owner. Proxies
+        of the document could not be used after that.
+        """
+        for view in (self._nodes, self._attrs, self._offsets,
+                     self._data, self._view):
+            view.release()
+        if self._owner is not None:
+            self._owner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def share(document, name=None):
+    """
+    Exports a document into a new block of shared memory and
+    returns a multiprocessing.shared_memory.SharedMemory object.
+    Other processes attach to the document by attach(shm.name).
+
+    :document: a document to export, type HTMLDocument
+    :name: a name of the block, a random name is used if it's
+           not specified, type str
+
+    The block should be unlinked by its creator when it's not
+    needed anymore. Requires Python 3.8+.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    buffer = export(document)
+    shm = SharedMemory(name, create=True, size=max(len(buffer), 1))
+    shm.buf[:len(buffer)] = buffer
+    return shm
+
+
+def attach(name):
+    """
+    Attaches to a document shared by share() and
+    returns a SharedDocument object.
+
+    :name: a name of the block of shared memory, type str
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    try:
+        # the block is owned by its creator, so it should not
+        # be unlinked when the attached process exits
+        shm = SharedMemory(name, track=False)
+    except TypeError:
+        # Python before 3.13 registers the block in the resource
+        # tracker of this process that would unlink it at exit
+        shm = SharedMemory(name)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+    return SharedDocument(shm.buf, shm)
+
+
+def save(document, path):
+    """
+    Exports a document into a file that could be loaded by load().
+
+    :document: a document to export, type HTMLDocument
+    :path: a path of the file, type str
+    """
+    with open(path, 'wb') as f:
+        f.write(export(document))
+
+
+def load(path):
+    """
+    Maps a file saved by save() into memory and
+    returns a SharedDocument object.
+
+    :path: a path of the file, type str
+
+    Pages of the mapped file are shared by all processes
+    that load the same file.
+    """
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return SharedDocument(data, data)
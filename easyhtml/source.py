@@ -0,0 +1,136 @@
+import codecs
+import mmap
+import re
+
+from . import parser as html_parser
+
+__all__ = ('detect_encoding', 'iter_decoded', 'parse_file', 'parse_stream')
+
+# byte order marks and encodings they define, UTF-32 marks
+# are checked first since they begin with UTF-16 ones
+boms = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# a pattern to find an encoding in <meta charset="..."> or
+# <meta http-equiv="Content-Type" content="text/html; charset=...">
+meta_charset = re.compile(br'<meta[^>]*?charset\s*=\s*["\']?\s*([-\w.:]+)',
+                          re.IGNORECASE)
+
+# a count of bytes where the encoding is searched for
+# (the same count is used by web browsers)
+prescan_size = 1024
+
+
+def detect_encoding(data, default='utf-8'):
+    """
+    Detects an encoding of the document by its byte order mark
+    or <meta> tag. Returns the default encoding if the encoding
+    is not specified in the document or is unknown.
+
+    :data: the beginning of the document, type bytes
+    :default: an encoding to use by default, type str
+    """
+    for bom, encoding in boms:
+        if data.startswith(bom):
+            return encoding
+    match = meta_charset.search(data[:prescan_size])
+    if match:
+        encoding = match.group(1).decode('ascii', 'replace')
+        try:
+            # check whether the encoding exists
+            return codecs.lookup(encoding).name
+        except LookupError:
+            pass
+    return default
+
+
+def iter_decoded(data, encoding, chunk_size=65536):
+    """
+    Decodes data by chunks and yields decoded text.
+
+    :data: data to decode, type bytes-like object
+    :encoding: an encoding of the data, type str
+    :chunk_size: a size of decoded chunks, type int
+    """
+    # a decoder keeps bytes of characters split between chunks
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for start in range(0, len(data), chunk_size):
+        text = decoder.decode(data[start:start + chunk_size])
+        if text:
+            yield text
+    text = decoder.decode(b'', True)
+    if text:
+        yield text
+
+
+def parse_file(path, encoding=None, chunk_size=65536, parser=None,
+               **options):
+    """
+    Parses a file and returns an HTMLDocument object.
+
+    :path: a path of the file, type str
+    :encoding: an encoding of the file, it's detected by
+               detect_encoding() if not specified, type str
+    :chunk_size: a size of chunks fed to the parser, type int
+    :parser: a parser to use, type DOMParser
+
+    Other keyword arguments are passed to DOMParser if the parser
+    is not specified. The file is mapped into memory and decoded
+    by chunks, so neither the file nor its decoded text are kept
+    in memory as a whole (unless the parser keeps the source).
+    """
+    if parser is None:
+        with html_parser.default_pool.parser(**options) as parser:
+            return parse_file(path, encoding, chunk_size, parser)
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file could not be mapped
+            data = b''
+        try:
+            if encoding is None:
+                encoding = detect_encoding(data[:prescan_size])
+            for text in iter_decoded(data, encoding, chunk_size):
+                parser.feed(text)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    parser.close()
+    return parser.get_dom()
+
+
+def parse_stream(stream, encoding=None, chunk_size=65536, parser=None,
+                 **options):
+    """
+    Reads a binary stream by chunks, parses it and
+    returns an HTMLDocument object.
+
+    :stream: a stream to read, type a binary file object
+    :encoding: an encoding of the stream, it's detected by
+               detect_encoding() if not specified, type str
+    :chunk_size: a size of chunks fed to the parser, type int
+    :parser: a parser to use, type DOMParser
+
+    Other keyword arguments are passed to DOMParser if
+    the parser is not specified.
+    """
+    if parser is None:
+        with html_parser.default_pool.parser(**options) as parser:
+            return parse_stream(stream, encoding, chunk_size, parser)
+    data = stream.read(max(chunk_size, prescan_size))
+    if encoding is None:
+        encoding = detect_encoding(data[:prescan_size])
+    # a decoder keeps bytes of characters split between chunks
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while data:
+        parser.feed(decoder.decode(data))
+        data = stream.read(chunk_size)
+    parser.feed(decoder.decode(b'', True))
+    parser.close()
+    return parser.get_dom()
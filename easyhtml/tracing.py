@@ -0,0 +1,285 @@
+from contextlib import contextmanager
+import threading
+import time
+
+from . import dom, index, lazy
+
+__all__ = ('QueryStats', 'QueryTracer', 'tracing')
+
+# search methods which calls are traced: (class, method name, label)
+searches = (
+    (dom.ElementTagContainer, 'get_tags_by_name', 'get_tags_by_name'),
+    (dom.ElementTagContainer, 'get_children', 'get_children'),
+    (dom.ElementTagContainer, 'get_element_by_id', 'get_element_by_id'),
+    (dom.ElementTagContainer, 'find_text', 'find_text'),
+    (dom.ElementTagContainer, 'get_tags_containing', 'get_tags_containing'),
+    # lazy documents override searches of documents
+    (lazy.LazyDocument, 'get_tags_by_name', 'get_tags_by_name'),
+    (lazy.LazyDocument, 'get_children', 'get_children'),
+    (lazy.LazyDocument, 'get_element_by_id', 'get_element_by_id'),
+    (dom.HTMLCollection, 'get_tags_by_name',
+     'HTMLCollection.get_tags_by_name'),
+    (dom.HTMLCollection, 'get_children', 'HTMLCollection.get_children'),
+    (dom.HTMLCollection, 'get_element_by_id',
+     'HTMLCollection.get_element_by_id'),
+    (dom.HTMLCollection, 'get_tags_containing',
+     'HTMLCollection.get_tags_containing'),
+    (dom.HTMLCollection, 'filter_tags_by_attrs',
+     'HTMLCollection.filter_tags_by_attrs'),
+)
+
+# installed tracers
+_tracers = []
+# original methods replaced while tracers are installed
+_originals = []
+# protects the list of tracers and methods replacement
+_lock = threading.Lock()
+# a state of the search running in the current thread
+_state = threading.local()
+
+
+class QueryStats:
+    """
+    Aggregated stats of calls of a search method with the same query.
+    """
+
+    def __init__(self):
+        # a count of calls
+        self.calls = 0
+        # a total count of tags, text nodes and index entries
+        # checked by all calls
+        self.visited = 0
+        # a total count of found elements
+        self.results = 0
+        # a total and the maximum time of a call in seconds
+        self.time = 0.0
+        self.max_time = 0.0
+
+    def add(self, visited, results, elapsed):
+        """
+        Adds a call to the stats.
+        """
+        self.calls += 1
+        self.visited += visited
+        self.results += results
+        self.time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self):
+        """
+        Returns the stats as a dictionary.
+        """
+        return {
+            'calls': self.calls,
+            'visited': self.visited,
+            'results': self.results,
+            'time': self.time,
+            'max_time': self.max_time,
+        }
+
+
+class QueryTracer:
+    """
+    Collects stats of search calls made while it's installed.
+    Only calls made by the user are recorded, searches made by
+    them internally are considered as their parts.
+    """
+
+    def __init__(self, callback=None):
+        """
+        :callback: a function called for each search with arguments
+                   (method, query, visited, results, elapsed),
+                   type callable
+        """
+        self.callback = callback
+        # (method, query) -> QueryStats
+        self.queries = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, query, visited, results, elapsed):
+        """
+        Records a search call.
+
+        :method: a name of the search method, type str
+        :query: a query, a tag name, an ID or a term, type str
+        :visited: a count of checked elements, type int
+        :results: a count of found elements, type int
+        :elapsed: a time of the call in seconds, type float
+        """
+        with self._lock:
+            stats = self.queries.get((method, query))
+            if stats is None:
+                stats = self.queries[method, query] = QueryStats()
+            stats.add(visited, results, elapsed)
+        if self.callback is not None:
+            self.callback(method, query, visited, results, elapsed)
+
+    def report(self, key='time'):
+        """
+        Returns a list of tuples (method, query, stats) sorted
+        by specified field of stats in descending order.
+
+        :key: a name of a field of QueryStats, type str
+        """
+        with self._lock:
+            items = [(m, q, s) for (m, q), s in self.queries.items()]
+        return sorted(items, key=lambda i: getattr(i[2], key), reverse=True)
+
+    def install(self):
+        """
+        Starts tracing of search calls.
+        """
+        with _lock:
+            if not _tracers:
+                _patch()
+            _tracers.append(self)
+
+    def uninstall(self):
+        """
+        Stops tracing of search calls.
+        """
+        with _lock:
+            _tracers.remove(self)
+            if not _tracers:
+                _unpatch()
+
+
+@contextmanager
+def tracing(callback=None):
+    """
+    A context manager that traces search calls while it's active
+    and returns a QueryTracer object with collected stats.
+
+    :callback: a function called for each search with arguments
+               (method, query, visited, results, elapsed),
+               type callable
+
+    Search methods are replaced by tracing ones while any tracer
+    is installed, so there is no overhead when nothing is traced.
+    Tracing affects all threads.
+    """
+    tracer = QueryTracer(callback)
+    tracer.install()
+    try:
+        yield tracer
+    finally:
+        tracer.uninstall()
+
+
+def count_results(result):
+    """
+    Returns a count of elements found by a search.
+    """
+    if result is None:
+        return 0
+    if isinstance(result, dom.HTMLCollection):
+        # collections could contain nested collections
+        return sum(count_results(e) for e in result.elements)
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def _visit(count):
+    """
+    Adds a count of checked elements to the current search.
+    """
+    if getattr(_state, 'searching', False):
+        _state.visited += count
+
+
+def _trace_search(label, method):
+    """
+    Returns a tracing version of the search method.
+    """
+    def search(self, query, *args, **kwargs):
+        if getattr(_state, 'searching', False):
+            # a search made by another search is a part of it
+            return method(self, query, *args, **kwargs)
+        _state.searching = True
+        _state.visited = 0
+        start = time.perf_counter()
+        try:
+            result = method(self, query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _state.searching = False
+        for tracer in list(_tracers):
+            tracer.record(label, query, _state.visited,
+                          count_results(result), elapsed)
+        return result
+    return search
+
+
+def _trace_scan(method):
+    """
+    Returns a version of a recursive generator method
+    that counts yielded elements.
+    """
+    def scan(self, *args):
+        if getattr(_state, 'scanning', False):
+            # a nested call made by the counted generator
+            return method(self, *args)
+        return _count(method(self, *args))
+    return scan
+
+
+def _count(iterator):
+    """
+    Yields elements of the iterator and counts them.
+    """
+    while True:
+        # generators called while the iterator is running
+        # are its parts, so they do not count elements
+        _state.scanning = True
+        try:
+            element = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _state.scanning = False
+        _visit(1)
+        yield element
+
+
+def _filter_tag(method):
+    def filter_tags_by_attrs(self, query):
+        _visit(1)
+        return method(self, query)
+    return filter_tags_by_attrs
+
+
+def _get_elements(method):
+    def get_elements(self, key, low, high):
+        elements = method(self, key, low, high)
+        _visit(len(elements))
+        return elements
+    return get_elements
+
+
+def _replace(cls, name, wrapper):
+    _originals.append((cls, name, cls.__dict__[name]))
+    setattr(cls, name, wrapper(cls.__dict__[name]))
+
+
+def _patch():
+    """
+    Replaces search methods by tracing ones.
+    """
+    for cls, name, label in searches:
+        _replace(cls, name, lambda method: _trace_search(label, method))
+    _replace(dom.ElementTagContainer, 'get_all_tags', _trace_scan)
+    _replace(dom.ElementTagContainer, 'get_all_text_nodes', _trace_scan)
+    # tags of lazy documents are scanned by a function of the module
+    _replace(lazy, '_iter_tags', _trace_scan)
+    _replace(dom.HTMLTag, 'filter_tags_by_attrs', _filter_tag)
+    _replace(index.DocumentIndex, '_get_elements', _get_elements)
+
+
+def _unpatch():
+    """
+    Restores original search methods.
+    """
+    while _originals:
+        cls, name, method = _originals.pop()
+        setattr(cls, name, method)
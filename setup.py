@@ -15,6 +15,7 @@ setup(
     long_description = open('README').read(),
     url = "https://github.com/Kemaweyan/easyhtml",
     license = "GPLv3",
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
+    extras_require={"numpy": ["numpy"]},
     test_suite='tests'
 )
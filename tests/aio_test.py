@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from easyhtml import aio, dom
+
+HTML = ('<html><body><p class="price">Café &amp; bar</p>'
+        '<ul><li>one<li>two</ul><br></body></html>')
+
+
+async def iterate(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestParseAsync(unittest.IsolatedAsyncioTestCase):
+
+    def make_stream(self, data):
+        stream = asyncio.StreamReader()
+        stream.feed_data(data)
+        stream.feed_eof()
+        return stream
+
+    async def test_parse_stream_reader(self):
+        stream = self.make_stream(HTML.encode('utf-8'))
+        doc = await aio.parse_async(stream, chunk_size=5)
+        self.assertIsInstance(doc, dom.HTMLDocument)
+        self.assertEqual(str(doc.p[0]), 'Café & bar')
+
+    async def test_parse_split_characters(self):
+        data = HTML.encode('utf-8')
+        # split the data inside a multibyte character
+        chunks = [data[i:i + 1] for i in range(len(data))]
+        doc = await aio.parse_async(iterate(chunks))
+        self.assertEqual(str(doc.p[0]), 'Café & bar')
+
+    async def test_parse_str_iterator(self):
+        doc = await aio.parse_async(iterate([HTML[:20], HTML[20:]]),
+                                    keep_source=True)
+        self.assertEqual(doc.source, HTML)
+
+    async def test_parse_encoding(self):
+        stream = self.make_stream(HTML.encode('cp1251', errors='replace'))
+        doc = await aio.parse_async(stream, encoding='cp1251')
+        self.assertEqual(len(doc.li), 2)
+
+    async def test_large_chunk_is_split(self):
+        chunks = []
+        async for chunk in aio.iter_chunks(iterate([HTML]), chunk_size=10):
+            chunks.append(chunk)
+        self.assertTrue(all(len(c) <= 10 for c in chunks))
+        self.assertEqual(''.join(chunks), HTML)
+
+    async def test_other_tasks_are_not_blocked(self):
+        ticks = []
+
+        async def ticker():
+            for i in range(3):
+                ticks.append(i)
+                await asyncio.sleep(0)
+
+        task = asyncio.ensure_future(ticker())
+        await aio.parse_async(iterate([HTML * 10]), chunk_size=16)
+        self.assertEqual(ticks, [0, 1, 2])
+        await task
+
+    async def test_iter_events(self):
+        events = []
+        async for event, element in aio.iter_events(iterate([HTML]),
+                                                   chunk_size=7):
+            if isinstance(element, dom.HTMLDocument):
+                events.append((event, None))
+            else:
+                events.append((event, element.tag_name))
+        self.assertEqual(events[:3], [('start', 'html'), ('start', 'body'),
+                                      ('start', 'p')])
+        self.assertIn(('end', 'p'), events)
+        self.assertEqual(events.count(('end', 'li')), 2)
+        self.assertEqual(events[-1], ('end', None))
+        self.assertEqual(len([e for e in events if e[0] == 'start']),
+                         len([e for e in events if e[0] == 'end']) - 1)
@@ -0,0 +1,45 @@
+import unittest
+
+from benchmarks import corpus, run
+from easyhtml import parser
+
+
+class TestCorpus(unittest.TestCase):
+
+    def test_deterministic(self):
+        for kind in corpus.kinds:
+            self.assertEqual(corpus.generate(kind, 50),
+                             corpus.generate(kind, 50))
+        self.assertNotEqual(corpus.generate('wide', 50, seed=1),
+                            corpus.generate('wide', 50, seed=2))
+
+    def test_searchable(self):
+        for kind in corpus.kinds:
+            document = parser.parse(corpus.generate(kind, 50))
+            self.assertIsNotNone(document.get_element_by_id('n49'))
+            self.assertEqual(len(document.get_children('class=c3')), 5)
+
+
+class TestRun(unittest.TestCase):
+
+    def test_run(self):
+        results = run.run(['wide'], size=20, repeat=1, pattern='wide/')
+        self.assertEqual(results['meta']['size'], 20)
+        self.assertEqual(len(results['results']), len(run.get_cases('wide', 20)))
+        for result in results['results'].values():
+            self.assertEqual(set(result), {'min', 'median', 'peak_memory'})
+
+    def test_cache_disabled(self):
+        with run.cache_disabled():
+            document = parser.parse('<p>text</p>')
+            document.raw_html
+        self.assertIsNone(document._cache)
+        document.raw_html
+        self.assertIsNotNone(document._cache)
+
+    def test_compare(self):
+        baseline = {'results': {'a': {'min': 1.0}, 'b': {'min': 1.0}}}
+        results = {'results': {'a': {'min': 1.1}, 'b': {'min': 1.5},
+                               'c': {'min': 1.0}}}
+        self.assertEqual(run.compare(results, baseline, 0.25),
+                         [('a', 1.1, False), ('b', 1.5, True)])
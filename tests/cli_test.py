@@ -0,0 +1,98 @@
+from concurrent.futures import Future
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from easyhtml import cli
+
+PAGES = {
+    'a.html': '<div class="a b" id="x">Hi <b>there</b></div>'
+              '<div class="b">Two</div>',
+    'dir/b.htm': '<p id="x">para</p>',
+    'c.txt': '<div id="x">skipped</div>',
+}
+
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for name, text in PAGES.items():
+            path = os.path.join(self.dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def run_main(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            status = cli.main(list(args) + [self.dir])
+        records = [json.loads(l) for l in stdout.getvalue().splitlines()]
+        return status, records, stderr.getvalue()
+
+    def test_attrs(self):
+        status, records, stats = self.run_main('-w', '1', '-q', 'div(class=b)')
+        self.assertEqual(status, 0)
+        self.assertEqual([r['attrs'] for r in records],
+                         [{'class': 'a b', 'id': 'x'}, {'class': 'b'}])
+        self.assertTrue(stats.startswith('2 documents'))
+
+    def test_text(self):
+        status, records, _ = self.run_main('-w', '1', '-o', 'text', '-q', '#x')
+        self.assertEqual([(os.path.basename(r['file']), r['tag'], r['text'])
+                          for r in records],
+                         [('a.html', 'div', 'Hi there'), ('b.htm', 'p', 'para')])
+
+    def test_html(self):
+        _, records, _ = self.run_main('-w', '1', '-o', 'html', '-q', 'b')
+        self.assertEqual([r['html'] for r in records],
+                         ['<b>\n    there\n</b>\n'])
+
+    def test_workers(self):
+        expected = self.run_main('-w', '1', '-q', 'div', '-q', 'p')[1]
+        actual = self.run_main('-w', '2', '-c', '1', '-q', 'div', '-q', 'p')[1]
+        self.assertEqual(actual, expected)
+
+    def test_pattern(self):
+        _, records, _ = self.run_main('-w', '1', '-p', '*.txt', '-o', 'text',
+                                      '-q', '#x')
+        self.assertEqual([r['text'] for r in records], ['skipped'])
+
+    def test_missing_file(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), \
+                contextlib.redirect_stderr(stderr):
+            status = cli.main(['-w', '1', '-q', 'p',
+                               os.path.join(self.dir, 'missing.html')])
+        self.assertEqual(status, 1)
+        self.assertIn('missing.html', stderr.getvalue())
+
+    def test_invalid_query(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(cli.main(['-q', 'div(', self.dir]), 2)
+            self.assertEqual(cli.main(['-q', 'div(class)', self.dir]), 2)
+
+    def test_bounded_submission(self):
+        submitted = []
+
+        class Executor:
+            def submit(self, func, *args):
+                submitted.append(args[0])
+                future = Future()
+                future.set_result(func(*args))
+                return future
+
+        files = [os.path.join(self.dir, 'a.html')] * 10
+        results = cli.iter_results(Executor(), iter(files), (['div'], 'attrs',
+                                   None), 2, 1)
+        # only 2 * workers chunks are submitted before the first result
+        next(results)
+        self.assertEqual(len(submitted), 4)
+        self.assertEqual(len(list(results)), 9)
+        self.assertEqual(len(submitted), 10)
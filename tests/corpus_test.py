@@ -0,0 +1,91 @@
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from easyhtml import corpus
+
+PAGES = {
+    'a.html': '<p id="x">first</p>'.encode('utf-8'),
+    'dir/b.html': '<meta charset="cp1251"><p id="x">другий</p>'.encode(
+        'cp1251'),
+    'c.html': ('<p id="x">' + 'long ' * 50000 + '</p>').encode('utf-8'),
+}
+
+
+def get_text(name, document):
+    return str(document.get_element_by_id('x'))[:10]
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def make_tar(self, mode='w:gz'):
+        path = self.path('pages.tar.gz')
+        with tarfile.open(path, mode) as archive:
+            for name, data in PAGES.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return path
+
+    def make_zip(self):
+        path = self.path('pages.zip')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('dir/', b'')
+            for name, data in PAGES.items():
+                archive.writestr(name, data)
+        return path
+
+    def check_documents(self, path):
+        result = [(name, get_text(name, document))
+                  for name, document in corpus.iter_documents(path)]
+        self.assertEqual(result, [('a.html', 'first'),
+                                  ('dir/b.html', 'другий'),
+                                  ('c.html', 'long long ')])
+
+    def test_tar(self):
+        self.check_documents(self.make_tar())
+
+    def test_uncompressed_tar(self):
+        self.check_documents(self.make_tar('w'))
+
+    def test_zip(self):
+        self.check_documents(self.make_zip())
+
+    def test_gzip(self):
+        path = self.path('a.html.gz')
+        with gzip.open(path, 'wb') as f:
+            f.write(PAGES['a.html'])
+        result = [(name, str(document))
+                  for name, document in corpus.iter_documents(path)]
+        self.assertEqual(result, [('a.html', 'first')])
+
+    def test_plain_file(self):
+        path = self.path('a.html')
+        with open(path, 'wb') as f:
+            f.write(PAGES['a.html'])
+        names = [name for name, stream in corpus.iter_members(path)]
+        self.assertEqual(names, ['a.html'])
+
+    def test_parser_options(self):
+        documents = corpus.iter_documents(self.make_zip(), keep_source=True)
+        name, document = next(documents)
+        self.assertEqual(document.source, PAGES['a.html'].decode('utf-8'))
+
+    def test_iter_results(self):
+        result = list(corpus.iter_results(self.make_tar(), get_text,
+                                          workers=2))
+        self.assertEqual(result, [('a.html', 'first'),
+                                  ('dir/b.html', 'другий'),
+                                  ('c.html', 'long long ')])
@@ -0,0 +1,108 @@
+import unittest
+
+from easyhtml import diff, dom, parser
+
+OLD = ('<!DOCTYPE html><html><body>'
+       '<div id="a" class="x"><p>one</p><p>two <b>three</b></p></div>'
+       '<ul><li>1</li><li>2</li></ul><!-- c --></body></html>')
+
+NEW = ('<!DOCTYPE html><html><body>'
+       '<div id="b" class="x"><p>one</p><p>two <b>four</b></p></div>'
+       '<ul><li>1</li><li>3</li><li>5</li></ul></body></html>')
+
+
+def describe(changes):
+    """
+    Returns a list of tuples (kind, old, new) with names
+    of tags and texts of other elements.
+    """
+    def name(element):
+        if element is None:
+            return None
+        if isinstance(element, dom.HTMLTag):
+            return element.tag_name
+        return element.raw_html.strip()
+    return [(c.kind, name(c.old), name(c.new)) for c in changes]
+
+
+class TestContentHash(unittest.TestCase):
+
+    def test_equal(self):
+        a = parser.parse('<div  class="x"  id="y">\n  <p>text</p>\n</div>')
+        b = parser.parse('<div id="y" class="x"><p>text</p></div>')
+        self.assertEqual(a.content_hash, b.content_hash)
+        self.assertEqual(diff.content_hash(a.div[0]), b.div[0].content_hash)
+        self.assertEqual(a.content_hash, b.freeze().content_hash)
+
+    def test_different(self):
+        hashes = {parser.parse(s).content_hash for s in (
+            '<p>text</p>', '<p>Text</p>', '<div>text</div>',
+            '<p class="x">text</p>', '<p class>text</p>',
+            '<p>text<br></p>', '<p>text<!-- c --></p>',
+            '<!DOCTYPE html><p>text</p>', '<p>te</p><p>xt</p>')}
+        self.assertEqual(len(hashes), 9)
+
+    def test_invalidate(self):
+        doc = parser.parse(OLD)
+        old = doc.content_hash
+        old_div = doc.div[0].content_hash
+        doc.ul[0].append(dom.HTMLTag('li', []))
+        self.assertNotEqual(doc.content_hash, old)
+        self.assertEqual(doc.div[0].content_hash, old_div)
+        doc.div[0].attrs['id'] = 'c'
+        self.assertNotEqual(doc.div[0].content_hash, old_div)
+
+    def test_cache_disabled(self):
+        expected = parser.parse(OLD).content_hash
+        dom.ElementTagContainer.cache_enabled = False
+        try:
+            doc = parser.parse(OLD)
+            self.assertEqual(doc.content_hash, expected)
+            self.assertIsNone(doc._cache)
+        finally:
+            dom.ElementTagContainer.cache_enabled = True
+
+    def test_deep(self):
+        source = '<div>' * 3000 + 'x' + '</div>' * 3000
+        doc = parser.parse(source)
+        self.assertEqual(len(doc.content_hash), 32)
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_same(self):
+        self.assertEqual(diff.diff(parser.parse(OLD), parser.parse(OLD)), [])
+
+    def test_changes(self):
+        old, new = parser.parse(OLD), parser.parse(NEW)
+        changes = diff.diff(old, new)
+        self.assertEqual(describe(changes), [
+            ('changed', 'div', 'div'),
+            ('changed', 'three', 'four'),
+            ('changed', '2', '3'),
+            ('inserted', None, 'li'),
+            ('removed', '<!--  c  -->', None),
+        ])
+        self.assertIs(changes[0].old, old.div[0])
+        self.assertIs(changes[3].new, new.li[2])
+
+    def test_moved(self):
+        old = parser.parse('<p>a</p><p>b</p><p>c</p>')
+        new = parser.parse('<p>b</p><p>c</p><p>a</p>')
+        self.assertEqual(describe(diff.diff(old, new)),
+                         [('removed', 'p', None), ('inserted', None, 'p')])
+
+    def test_doctype(self):
+        old = parser.parse('<!DOCTYPE html><p>a</p>')
+        new = parser.parse('<p>a</p>')
+        changes = diff.diff(old, new)
+        self.assertEqual(changes, [('changed', old.doctype, None)])
+
+    def test_tags(self):
+        old = parser.parse(OLD).ul[0]
+        new = parser.parse(NEW).ul[0]
+        self.assertEqual(len(diff.diff(old, new)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -307,6 +307,26 @@ class TestHTMLTag(unittest.TestCase):
         self.assertEqual(tag.attrs['attr1'], 'value1')
         self.assertEqual(tag.attrs['attr2'], 'value2')
 
+    def test_attrs_not_created_on_init(self):
+        tag = dom.HTMLTag('tag', [('attr1', 'value1')])
+        self.assertNotIsInstance(tag._attrs, dom.AttributeDict)
+        self.assertTrue(tag.check_attr('attr1', 'value1'))
+        self.assertEqual(tag.start_tag, '<tag attr1="value1">\n')
+        self.assertNotIsInstance(tag._attrs, dom.AttributeDict)
+        self.assertIsInstance(tag.attrs, dom.AttributeDict)
+
+    def test_create_tag_from_generator(self):
+        tag = dom.HTMLTag('tag', (a for a in [('attr1', 'value1')]))
+        self.assertEqual(tag.get_attr('attr1'), 'value1')
+
+    def test_duplicated_attrs(self):
+        attrs = [('attr1', 'value1'), ('attr2', 'value2'), ('attr1', 'value3')]
+        tag = dom.HTMLTag('tag', attrs)
+        self.assertEqual(tag.get_attr('attr1'), 'value3')
+        self.assertEqual(list(tag.get_attr_items()),
+                         [('attr1', 'value3'), ('attr2', 'value2')])
+        self.assertEqual(tag.get_attr('attr1'), tag.attrs['attr1'])
+
     def test_single_yes(self):
         tag = dom.HTMLTag('tag', [])
         tag.single_tags = ('tag')
@@ -570,3 +590,88 @@ class TestHTMLCollection(unittest.TestCase):
         self.div.attrs['id'] = 'test'
         self.coll = dom.HTMLCollection((dom.HTMLCollection((self.div,)),))
         self.assertEqual(self.div, self.coll.get_element_by_id('test'))
+
+
+
+
+class TestOwnerDocument(unittest.TestCase):
+
+    def test_owner_document_appended(self):
+        doc = dom.HTMLDocument()
+        div = dom.HTMLTag('div', [])
+        p = dom.HTMLTag('p', [])
+        doc.append(div)
+        div.append(p)
+        self.assertIs(p.parent, div)
+        self.assertIs(p.owner_document, doc)
+
+    def test_owner_document_detached(self):
+        div = dom.HTMLTag('div', [])
+        self.assertIsNone(div.owner_document)
+
+
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = dom.HTMLDocument()
+        self.div = dom.HTMLTag('div', [('class', 'foo')])
+        self.p = dom.HTMLTag('p', [])
+        self.doc.append(self.div)
+        self.div.append(self.p)
+        self.p.append(dom.PlainText('test'))
+
+    def test_raw_html_cached(self):
+        html = self.doc.raw_html
+        with patch.object(dom.HTMLTag, '_build_raw_html') as build_mock:
+            self.assertEqual(self.doc.raw_html, html)
+            self.assertEqual(self.div.raw_html, self.div.raw_html)
+            self.assertFalse(build_mock.called)
+
+    def test_str_cached(self):
+        self.assertEqual(str(self.doc), 'test')
+        self.assertEqual(self.doc._cache['str'], 'test')
+        self.assertEqual(self.p._cache['str'], 'test')
+
+    def test_append_invalidates_ancestors(self):
+        self.doc.raw_html
+        self.p.append(dom.HTMLTag('br', []))
+        self.assertIsNone(self.p._cache)
+        self.assertIsNone(self.div._cache)
+        self.assertIsNone(self.doc._cache)
+        self.assertIn('<br>', self.doc.raw_html)
+
+    def test_append_text_invalidates_ancestors(self):
+        str(self.doc)
+        self.p.elements[0].append(dom.PlainText('!'))
+        self.assertEqual(str(self.doc), 'test!')
+
+    def test_attrs_change_invalidates_ancestors(self):
+        self.doc.raw_html
+        self.p.attrs['id'] = 'bar'
+        self.assertIn('<p id="bar">', self.doc.raw_html)
+        del self.p.attrs['id']
+        self.assertNotIn('id="bar"', self.doc.raw_html)
+        self.div.attrs = {'class': 'baz'}
+        self.assertIn('<div class="baz">', self.doc.raw_html)
+
+    def test_sibling_is_not_invalidated(self):
+        span = dom.HTMLTag('span', [])
+        self.doc.append(span)
+        self.doc.raw_html
+        span.append(dom.PlainText('test'))
+        self.assertIsNotNone(self.div._cache)
+        self.assertIsNone(self.doc._cache)
+
+    def test_doctype_invalidates_document(self):
+        self.doc.raw_html
+        self.doc.doctype = dom.DoctypeDeclaration('html')
+        self.assertTrue(self.doc.raw_html.startswith('<!html>'))
+
+    @patch.object(dom.ElementTagContainer, 'cache_enabled', False)
+    def test_cache_disabled(self):
+        self.doc.raw_html
+        str(self.doc)
+        self.assertIsNone(self.doc._cache)
+        self.assertIsNone(self.p._cache)
@@ -0,0 +1,77 @@
+import unittest
+
+from easyhtml import features, parser
+
+SOURCE = ('<!DOCTYPE html><html><body>'
+          '<div id="a"><p>one <a href="#">two <b>three</b></a> four</p>'
+          '<ul><li>1</li><li><a>22</a></li><li></li></ul><br></div>'
+          '<!-- comment --><script>var a = "<p>";</script>'
+          '<p>ten &amp; <i>more</i></p></body></html>')
+
+
+def get_features(tag, depth, parent, rows, in_link=False):
+    """
+    Returns a list of features of the tag and its nested tags
+    computed from str() of tags.
+    """
+    in_link = in_link or tag.tag_name == 'a'
+    row = len(rows)
+    rows.append(None)
+    links = 0
+    for child in tag.tags:
+        links += get_features(child, depth + 1, row, rows, in_link)
+    text = len(str(tag))
+    if in_link:
+        links = text
+    rows[row] = (tag, depth, len(list(tag.tags)), text, links, parent)
+    return links
+
+
+@unittest.skipIf(features.numpy is None, 'numpy is not installed')
+class TestNodeFeatures(unittest.TestCase):
+
+    def check(self, container):
+        result = container.node_features()
+        rows = []
+        for tag in container.tags:
+            get_features(tag, 1, -1, rows)
+        self.assertEqual(result.tags, [r[0] for r in rows])
+        self.assertEqual(result.array.dtype, features.dtype)
+        for row, expected in zip(result.array, rows):
+            tag, depth, children, text, links, parent = expected
+            self.assertEqual((row['depth'], row['children'],
+                              row['text_length'], row['link_text_length'],
+                              row['parent']),
+                             (depth, children, text, links, parent))
+            self.assertEqual(result.names[row['name_id']], tag.tag_name)
+        return result
+
+    def test_document(self):
+        document = parser.parse(SOURCE)
+        result = self.check(document)
+        self.assertEqual(result.names[:3], ('html', 'body', 'div'))
+        self.assertEqual(result.tags[result.array['text_length'].argmax()],
+                         document.html[0])
+
+    def test_tag(self):
+        document = parser.parse(SOURCE)
+        result = self.check(document.ul[0])
+        self.assertEqual(list(result.array['depth']), [1, 1, 2, 1])
+        self.assertEqual(list(result.array['link_text_length']), [0, 2, 2, 0])
+
+    def test_empty(self):
+        result = features.node_features(parser.parse('text <!-- c -->'))
+        self.assertEqual(len(result.array), 0)
+        self.assertEqual((result.tags, result.names), ([], ()))
+
+    def test_deep(self):
+        source = '<div>' * 3000 + '<a>x</a>' + '</div>' * 3000
+        result = features.node_features(parser.parse(source))
+        self.assertEqual(result.array['depth'][-1], 3001)
+        self.assertTrue((result.array['text_length'] == 1).all())
+        self.assertTrue((result.array['link_text_length'] == 1).all())
+        self.assertEqual(result.array['children'].sum(), 3000)
+
+
+if __name__ == '__main__':
+    unittest.main()
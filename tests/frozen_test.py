@@ -0,0 +1,110 @@
+import unittest
+
+from easyhtml import dom, frozen, lazy, parser
+
+SOURCE = ('<!DOCTYPE html><html><body><div id="a" class="x y">'
+          '<p>one &amp; two&nbsp;</p><!-- c --><br></div>'
+          '<script>var a;</script><p class="y">three</p></body></html>')
+
+
+class TestFreeze(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE, keep_source=True)
+        self.frozen = self.doc.freeze()
+
+    def test_same_document(self):
+        self.assertIsInstance(self.frozen, frozen.FrozenDocument)
+        self.assertIsInstance(self.frozen, dom.HTMLDocument)
+        self.assertEqual(self.frozen.raw_html, self.doc.raw_html)
+        self.assertEqual(str(self.frozen), str(self.doc))
+        self.assertEqual(self.frozen.doctype.raw_html,
+                         self.doc.doctype.raw_html)
+        self.assertIs(self.frozen.freeze(), self.frozen)
+
+    def test_structure(self):
+        div = self.frozen.div[0]
+        self.assertIsInstance(div, frozen.FrozenTag)
+        self.assertIsInstance(div.elements, tuple)
+        self.assertEqual(div.tags, (div.p[0], div.br[0]))
+        self.assertIs(div.parent.parent.parent, self.frozen)
+        self.assertIs(div.elements[0].elements[0].parent, div.p[0])
+        self.assertIs(self.frozen.doctype.parent, self.frozen)
+        self.assertEqual(div.outer_source, self.doc.div[0].outer_source)
+
+    def test_attributes(self):
+        div = self.frozen.div[0]
+        self.assertEqual(div.attrs, {'id': 'a', 'class': 'x y'})
+        self.assertEqual(div.get_attr('class'), 'x y')
+        with self.assertRaises(TypeError):
+            div.attrs['id'] = 'b'
+        # names are interned
+        self.assertIs(div.tag_name, self.frozen.div[0].tag_name)
+
+    def test_immutable(self):
+        div = self.frozen.div[0]
+        with self.assertRaises(frozen.FrozenError):
+            div.append(dom.HTMLTag('p', []))
+        with self.assertRaises(frozen.FrozenError):
+            div.attrs = {}
+        with self.assertRaises(frozen.FrozenError):
+            div.tag_name = 'span'
+        with self.assertRaises(frozen.FrozenError):
+            self.frozen.doctype = None
+        with self.assertRaises(frozen.FrozenError):
+            div.elements[0].append(dom.PlainText('text'))
+        with self.assertRaises(frozen.FrozenError):
+            del div.parent
+
+    def test_independent(self):
+        self.doc.div[0].append(dom.HTMLTag('span', []))
+        self.doc.div[0].attrs['id'] = 'b'
+        self.assertEqual(len(self.frozen.span), 0)
+        self.assertIsNotNone(self.frozen.get_element_by_id('a'))
+
+    def test_searches(self):
+        first = self.frozen.get_children('class=y')
+        second = self.frozen.get_children('class=y')
+        self.assertIsNot(first, second)
+        self.assertEqual(first.elements, second.elements)
+        self.assertEqual([t.tag_name for t in first], ['div', 'p'])
+        self.assertIs(self.frozen.get_element_by_id('a'),
+                      self.frozen.get_element_by_id('a'))
+        self.assertIsNone(self.frozen.get_element_by_id('b'))
+        self.assertEqual(len(self.frozen.find_text('two')), 1)
+        self.assertEqual(len(self.frozen.get_tags_containing('three')), 3)
+
+    def test_cache_disabled(self):
+        dom.ElementTagContainer.cache_enabled = False
+        try:
+            self.assertIs(self.frozen.raw_html, self.frozen.raw_html)
+        finally:
+            dom.ElementTagContainer.cache_enabled = True
+
+    def test_index(self):
+        document = parser.parse(SOURCE, index=True).freeze()
+        self.assertTrue(document.indexed)
+        self.assertEqual(len(document.get_children('class=x')), 1)
+        self.assertIsNotNone(document.get_index())
+
+    def test_tag(self):
+        div = self.doc.div[0].freeze()
+        self.assertIsNone(div.parent)
+        self.assertEqual(div.raw_html, self.doc.div[0].raw_html)
+
+    def test_deep(self):
+        source = '<div>' * 2000 + 'text' + '</div>' * 2000
+        element = parser.parse(source).freeze()
+        for i in range(2000):
+            element = element.elements[0]
+            self.assertIsInstance(element, frozen.FrozenTag)
+        self.assertEqual(str(element.elements[0]), 'text')
+
+    def test_lazy(self):
+        document = lazy.parse_lazy(SOURCE).freeze()
+        self.assertEqual(document.raw_html, self.doc.raw_html)
+        self.assertIsInstance(document.div[0], frozen.FrozenTag)
+
+
+if __name__ == '__main__':
+    unittest.main()
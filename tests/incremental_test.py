@@ -0,0 +1,140 @@
+import random
+import unittest
+
+from easyhtml import incremental, parser
+
+SOURCE = ('<!DOCTYPE html><html><body>'
+          '<div id="a"><p>one <b>two</b> three</p>'
+          '<ul><li>1</li><li>2</li></ul></div><!-- c -->'
+          '<p class="price">10 &amp; more</p>'
+          '<script>var a = "<p>";</script></body></html>')
+
+
+def get_offsets(document):
+    """
+    Returns names and offsets of all elements of the document.
+    """
+    result = []
+    stack = [document]
+    while stack:
+        element = stack.pop()
+        result.append((type(element).__name__,
+                       vars(element).get('tag_name'),
+                       element.source_start, element.source_end,
+                       vars(element).get('inner_start'),
+                       vars(element).get('inner_end')))
+        if hasattr(element, 'tags'):
+            stack.extend(reversed(element.elements))
+    return result
+
+
+class TestReparse(unittest.TestCase):
+
+    def check(self, old, new, **options):
+        """
+        Reparses the old document and compares it
+        with the new one parsed from scratch.
+        """
+        document = parser.parse(old, keep_source=True, **options)
+        # fill the cache, so stale data would be found
+        document.raw_html
+        str(document)
+        result = incremental.reparse(document, new, **options)
+        self.assertIs(result, document)
+        expected = parser.parse(new, keep_source=True, **options)
+        self.assertEqual(document.source, new)
+        self.assertEqual(document.raw_html, expected.raw_html)
+        self.assertEqual(str(document), str(expected))
+        self.assertEqual(get_offsets(document), get_offsets(expected))
+        self.assertEqual(document.serialize(), expected.serialize())
+        doctype = document.doctype
+        self.assertEqual(doctype and (doctype.raw_html, doctype.source_start),
+                         expected.doctype and (expected.doctype.raw_html,
+                                               expected.doctype.source_start))
+        return document
+
+    def test_text(self):
+        document = parser.parse(SOURCE, keep_source=True)
+        tags = list(document.get_all_tags())
+        html = document.div[0].raw_html
+        incremental.reparse(document, SOURCE.replace('10', '12'))
+        self.assertEqual(str(document.get_children('class=price')[0]),
+                         '12 & more')
+        # all tags are kept, so is the cache of the untouched one
+        for old, new in zip(tags, document.get_all_tags()):
+            self.assertIs(old, new)
+        self.assertEqual(document.div[0]._cache['raw_html'], html)
+
+    def test_insert(self):
+        document = self.check(
+            SOURCE, SOURCE.replace('<li>2</li>', '<li>2</li><li>3</li>'))
+        self.assertEqual(len(document.li), 3)
+        old = parser.parse(SOURCE, keep_source=True)
+        first, second = old.li
+        incremental.reparse(old, SOURCE.replace('</ul>', '<li>3</li></ul>'))
+        self.assertIs(old.li[0], first)
+        self.assertIs(old.li[1], second)
+        self.assertEqual(old.li[2].source_start, second.source_end)
+
+    def test_changes(self):
+        for old, new in (
+                ('<b>two</b>', '</div>'),
+                ('<b>two</b>', '<b>two'),
+                ('</p>', ''),
+                ('<!-- c -->', '<!-- c'),
+                ('<!DOCTYPE html>', ''),
+                ('<body>', '<body><!DOCTYPE x>'),
+                ('</script>', ''),
+                ('class="price"', 'class="new price" id="p"'),
+                ('</body></html>', '</body></html><p>tail')):
+            with self.subTest(new=new):
+                self.check(SOURCE, SOURCE.replace(old, new, 1))
+
+    def test_spaces(self):
+        # white space dropped between elements is kept by the serializer
+        for old, new in (('</ul>', ' </ul>'), ('</div>', '</div>\n'),
+                         ('<!-- c -->', ' '), ('<li>1</li>', '<li>1</li> ')):
+            with self.subTest(new=new):
+                document = self.check(SOURCE, SOURCE.replace(old, new, 1))
+                self.check(document.source, SOURCE)
+
+    def test_raw_text(self):
+        self.check(SOURCE, SOURCE.replace('var a', 'var b'),
+                   raw_text={'script': 'opaque'})
+
+    def test_unparsed(self):
+        old = '&#9<b>&#;<r>'
+        self.assertEqual(parser.parse(old, keep_source=True).unparsed_start, 8)
+        self.check(old, '&#<b>&#;<r>')
+        self.check('<p>a <!-- b</p><p>c</p>', '<p>a <!-- b</p><p>c</p> -->')
+
+    def test_index(self):
+        document = parser.parse(SOURCE, keep_source=True, index=True)
+        self.assertIsNotNone(document.get_element_by_id('a'))
+        incremental.reparse(document, SOURCE.replace('id="a"', 'id="b"'))
+        self.assertIsNone(document.get_element_by_id('a'))
+        self.assertEqual(document.get_element_by_id('b').tag_name, 'div')
+
+    def test_random(self):
+        # random edits of a document are compared with full parsing
+        tokens = ['<p>', '</p>', '<div>', '</div>', 'x', ' ', '&amp;',
+                  '<!--', '-->', '<br>', '<script>', '</script>', '<li>',
+                  '<', '&', '"', '<p/>', '<!DOCTYPE x>', '</body>']
+        rand = random.Random(7)
+        source = SOURCE * 3
+        for i in range(300):
+            start = rand.randrange(len(source) + 1)
+            end = min(len(source), start + rand.randrange(10))
+            new = source[:start] + ''.join(
+                rand.choice(tokens) for i in range(rand.randrange(4))) + \
+                source[end:]
+            self.check(source, new)
+            source = new
+
+    def test_source_not_kept(self):
+        with self.assertRaises(ValueError):
+            incremental.reparse(parser.parse(SOURCE), SOURCE)
+
+
+if __name__ == '__main__':
+    unittest.main()
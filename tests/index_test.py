@@ -0,0 +1,144 @@
+import unittest
+
+from easyhtml import parser, dom, index
+
+HTML = ('<div id="main" class="box">'
+        '   <p itemprop="price" class="amount big">10</p>'
+        '   <p itemprop="price" class="note">20</p>'
+        '   <div class="box">'
+        '       <span itemprop="price" class="amount">30</span>'
+        '       <span itemprop="name" class="amount">foo</span>'
+        '   </div>'
+        '</div>'
+        '<p itemprop="price" class="amount" id="last">40</p>')
+
+
+class TestAttributeIndex(unittest.TestCase):
+
+    def setUp(self):
+        dom_parser = parser.DOMParser(index=True)
+        dom_parser.feed(HTML)
+        self.doc = dom_parser.get_dom()
+        self.index = self.doc.get_index()
+
+    def test_index_built_by_parser(self):
+        self.assertIsInstance(self.index, index.AttributeIndex)
+        self.assertTrue(self.doc.indexed)
+
+    def test_class_split_into_tokens(self):
+        self.assertEqual(self.index.count(('class', 'amount')), 4)
+        self.assertEqual(self.index.count(('class', 'big')), 1)
+        self.assertEqual(self.index.count(('class', 'amount big')), 0)
+
+    def test_get_children_in_document_order(self):
+        tags = self.doc.get_children('itemprop=price; class=amount')
+        self.assertEqual([str(t) for t in tags], ['10', '30', '40'])
+
+    def test_get_children_same_as_without_index(self):
+        query = 'itemprop=price; class=amount'
+        expected = list(filter(lambda t: t.check_attrs(query),
+                               self.doc.get_all_tags()))
+        self.assertEqual(list(self.doc.get_children(query)), expected)
+
+    def test_get_children_nested_only(self):
+        main = self.doc.get_element_by_id('main')
+        tags = main.get_children('class=box')
+        self.assertEqual(len(tags), 1)
+        self.assertNotIn(main, tags.elements)
+
+    def test_get_children_in_collection(self):
+        result = self.doc.div.get_children('class=amount')
+        self.assertEqual([str(t) for t in result[0]], ['10', '30', 'foo'])
+        self.assertEqual([str(t) for t in result[1]], ['30', 'foo'])
+
+    def test_get_children_not_found(self):
+        self.assertEqual(len(self.doc.get_children('class=amount; id=x')), 0)
+
+    def test_get_element_by_id(self):
+        tag = self.doc.get_element_by_id('last')
+        self.assertEqual(str(tag), '40')
+        self.assertIsNone(self.doc.get_element_by_id('test'))
+
+    def test_invalid_query(self):
+        with self.assertRaises(TypeError):
+            self.doc.get_children('class')
+
+    def test_append_drops_index(self):
+        tag = dom.HTMLTag('b', [('class', 'amount')])
+        self.doc.get_element_by_id('main').append(tag)
+        self.assertIsNone(self.doc._index)
+        self.assertIn(tag, self.doc.get_children('class=amount').elements)
+        self.assertIsNotNone(self.doc._index)
+
+    def test_not_indexed_document(self):
+        doc = dom.HTMLDocument()
+        self.assertIsNone(doc.get_index())
+
+
+
+
+TEXT_HTML = ('<table>'
+             '   <tr><td>Subtotal</td><td>10</td></tr>'
+             '   <tr><td><b>Grand</b> total:</td><td>12</td></tr>'
+             '   <tr><td>Total&nbsp;due</td><td>2</td></tr>'
+             '</table>'
+             '<p>TOTAL</p>')
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        dom_parser = parser.DOMParser(text_index=True)
+        dom_parser.feed(TEXT_HTML)
+        self.doc = dom_parser.get_dom()
+
+    def test_index_built_by_parser(self):
+        self.assertIsInstance(self.doc.get_text_index(), index.TextIndex)
+
+    def test_find_text(self):
+        nodes = self.doc.find_text('total')
+        self.assertEqual([str(n) for n in nodes],
+                         [' total:', 'Total\xa0due', 'TOTAL'])
+
+    def test_find_text_phrase(self):
+        nodes = self.doc.find_text('Total due')
+        self.assertEqual([str(n) for n in nodes], ['Total\xa0due'])
+
+    def test_find_text_not_found(self):
+        self.assertEqual(self.doc.find_text('foo'), [])
+        self.assertEqual(self.doc.find_text(' '), [])
+
+    def test_get_tags_containing(self):
+        tags = self.doc.get_tags_containing('total')
+        self.assertEqual([t.tag_name for t in tags],
+                         ['table', 'tr', 'td', 'tr', 'td', 'p'])
+
+    def test_get_tags_containing_direct(self):
+        tags = self.doc.get_tags_containing('total', direct=True)
+        self.assertEqual([t.tag_name for t in tags], ['td', 'td', 'p'])
+
+    def test_get_tags_containing_nested(self):
+        table = self.doc.table[0]
+        tags = table.get_tags_containing('total', direct=True)
+        self.assertEqual([str(t) for t in tags],
+                         ['Grand total:', 'Total\xa0due'])
+
+    def test_same_as_without_index(self):
+        dom_parser = parser.DOMParser()
+        dom_parser.feed(TEXT_HTML)
+        doc = dom_parser.get_dom()
+        self.assertIsNone(doc.get_text_index())
+        for term in ('total', 'grand total', 'due', '12'):
+            self.assertEqual(
+                [str(t) for t in doc.get_tags_containing(term)],
+                [str(t) for t in self.doc.get_tags_containing(term)])
+
+    def test_append_drops_index(self):
+        p = self.doc.p[0]
+        p.append(dom.PlainText(' due'))
+        self.assertIsNone(self.doc._text_index)
+        self.assertEqual(len(self.doc.find_text('total due')), 2)
+
+    def test_collection_get_tags_containing(self):
+        result = self.doc.tr.get_tags_containing('total')
+        self.assertEqual([len(c) for c in result], [0, 1, 1])
@@ -0,0 +1,119 @@
+import threading
+import unittest
+
+from easyhtml import lazy, parser
+
+SOURCE = ('<!DOCTYPE html><html><head><title>T &amp; x</title>'
+          '<script>var a = "<div>";</script></head>\n'
+          '<body><div id="a"><p class="x y">one<b>two</b></p><br/>'
+          '<p>three</div>\n<ul><li>1<li>2</ul><div/>'
+          '<section><span id="s">&#x41;</section></span>'
+          '<!-- c -->&nbsp;tail</body></html>')
+
+
+def parse(source):
+    dom_parser = parser.DOMParser(keep_source=True)
+    dom_parser.feed(source)
+    dom_parser.close()
+    return dom_parser.get_dom()
+
+
+def get_offsets(document):
+    return [(t.tag_name, t.source_start, t.source_end,
+             t.inner_start, t.inner_end) for t in document.get_all_tags()]
+
+
+def get_regions(document):
+    return [t for t in document.get_all_tags()
+            if isinstance(t, lazy.LazyTag)]
+
+
+class TestParseLazy(unittest.TestCase):
+
+    def test_regions(self):
+        doc = lazy.parse_lazy(SOURCE)
+        self.assertIsInstance(doc, lazy.LazyDocument)
+        regions = [t for t in doc.body[0].tags]
+        self.assertEqual([t.tag_name for t in regions],
+                         ['div', 'ul', 'div', 'section'])
+        self.assertTrue(all(isinstance(t, lazy.LazyTag) for t in regions))
+        self.assertFalse(any(t.materialized for t in regions))
+        # raw text elements are parsed as usual
+        self.assertNotIsInstance(doc.head[0].elements[1], lazy.LazyTag)
+
+    def test_same_document(self):
+        expected = parse(SOURCE)
+        for depth in (1, 2, 3):
+            doc = lazy.parse_lazy(SOURCE, depth)
+            self.assertEqual(doc.raw_html, expected.raw_html)
+            self.assertEqual(str(doc), str(expected))
+            self.assertEqual(get_offsets(doc), get_offsets(expected))
+            self.assertEqual(doc.doctype.raw_html, expected.doctype.raw_html)
+
+    def test_depth(self):
+        doc = lazy.parse_lazy(SOURCE, 2)
+        self.assertEqual([t.tag_name for t in get_regions(doc)],
+                         ['p', 'p', 'li', 'span'])
+        with self.assertRaises(ValueError):
+            lazy.SkeletonParser(0)
+
+    def test_materialize(self):
+        doc = lazy.parse_lazy(SOURCE)
+        div = doc.body[0].elements[0]
+        self.assertEqual(div.lazy_source, '<p class="x y">one<b>two</b></p>'
+                                          '<br/><p>three')
+        self.assertEqual(len(div.elements), 3)
+        self.assertTrue(div.materialized)
+        b = div.elements[0].elements[1]
+        self.assertIs(b.owner_document, doc)
+        self.assertEqual(b.outer_source, '<b>two</b>')
+        self.assertEqual(div.inner_source, div.lazy_source)
+
+    def test_searches(self):
+        doc = lazy.parse_lazy(SOURCE)
+        div, ul, empty, section = doc.body[0].tags
+        self.assertEqual(len(doc.get_tags_by_name('b')), 1)
+        self.assertTrue(div.materialized)
+        self.assertFalse(ul.materialized or section.materialized)
+        self.assertEqual(doc.get_element_by_id('s').tag_name, 'span')
+        self.assertTrue(section.materialized)
+        self.assertFalse(ul.materialized)
+        self.assertEqual(len(doc.get_children('class=y')), 1)
+        self.assertIsNone(doc.get_element_by_id('missing'))
+        self.assertFalse(ul.materialized)
+        self.assertEqual(len(doc.li), 2)
+        self.assertTrue(ul.materialized)
+
+    def test_entities_in_attributes(self):
+        doc = lazy.parse_lazy('<div><p id="&#x61;">x</p></div><div></div>')
+        self.assertEqual(doc.get_element_by_id('a').tag_name, 'p')
+
+    def test_append(self):
+        doc = lazy.parse_lazy('<div><p>one</p></div>')
+        div = doc.div[0]
+        div.append(parser.dom.HTMLTag('p', []))
+        self.assertEqual(len(doc.p), 2)
+
+    def test_memory_footprint(self):
+        doc = lazy.parse_lazy(SOURCE)
+        regions = list(doc.body[0].tags)
+        doc.memory_footprint()
+        self.assertFalse(any(t.materialized for t in regions))
+        self.assertEqual(doc.memory_footprint().counts['LazyTag'], 5)
+
+    def test_threads(self):
+        doc = lazy.parse_lazy('<div>' + '<p>x</p>' * 100 + '</div>')
+        div = doc.div[0]
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+                   div.elements)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(len(results[0]), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from easyhtml import dom, parser
+
+SOURCE = ('<!DOCTYPE html><div id="a" class="x"><p>one &amp; two</p>'
+          '<!-- c --><br></div><p>&nbsp;three</p>')
+
+
+class TestMemoryFootprint(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE)
+
+    def test_counts(self):
+        footprint = self.doc.memory_footprint()
+        self.assertEqual(footprint.counts, {
+            'HTMLDocument': 1, 'DoctypeDeclaration': 1, 'HTMLTag': 4,
+            'TextNode': 2, 'PlainText': 2, 'NamedEntity': 1,
+            'HTMLComment': 1})
+
+    def test_total(self):
+        footprint = self.doc.memory_footprint()
+        self.assertGreater(footprint.string_bytes, 0)
+        self.assertGreater(footprint.attribute_bytes, 0)
+        self.assertEqual(footprint.cache_bytes, 0)
+        self.assertEqual(footprint.total, sum(footprint.sizes.values()) +
+                         footprint.string_bytes + footprint.attribute_bytes)
+        self.assertEqual(footprint.as_dict()['total'], footprint.total)
+
+    def test_cache(self):
+        before = self.doc.memory_footprint()
+        self.doc.raw_html
+        after = self.doc.memory_footprint()
+        self.assertGreater(after.cache_bytes, 0)
+        self.assertEqual(after.total - after.cache_bytes, before.total)
+
+    def test_attributes(self):
+        div = self.doc.div[0]
+        before = div.memory_footprint().attribute_bytes
+        div.attrs['title'] = 'a title'
+        self.assertGreater(div.memory_footprint().attribute_bytes, before)
+
+    def test_tag(self):
+        footprint = self.doc.div[0].memory_footprint()
+        self.assertEqual(footprint.counts['HTMLTag'], 3)
+        self.assertNotIn('HTMLDocument', footprint.counts)
+        self.assertLess(footprint.total, self.doc.memory_footprint().total)
+
+    def test_heaviest(self):
+        self.assertEqual(self.doc.memory_footprint().heaviest, [])
+        heaviest = self.doc.memory_footprint(heaviest=2).heaviest
+        self.assertEqual([t for t, s in heaviest],
+                         [self.doc.div[0], self.doc.p[1]])
+        self.assertEqual(heaviest[0][1], self.doc.div[0].memory_footprint().total)
+
+    def test_deep_document(self):
+        depth = 5000
+        doc = dom.HTMLDocument()
+        tag = doc
+        for i in range(depth):
+            child = dom.HTMLTag('div', [])
+            tag.append(child)
+            tag = child
+        self.assertEqual(doc.memory_footprint().counts['HTMLTag'], depth)
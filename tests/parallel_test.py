@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import unittest
+
+from easyhtml import dom, lazy, parallel, parser
+
+SOURCE = ''.join(
+    '<div id="d{0}" class="item c{1}"><p>text {0} &amp; more</p>'
+    '<span class="price">{0}</span><ul><li>a</li><li>b</li></ul></div>'
+    .format(i, i % 7) for i in range(200))
+
+QUERIES = ['div(class=c3)', 'p', '#d150', '(class=price)', 'li', '#none']
+
+
+def run_threads(target, count=8):
+    """
+    Runs the target in several threads at once
+    and returns a list of their results.
+    """
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = []
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class TestConcurrentReaders(unittest.TestCase):
+
+    def test_nested_iteration(self):
+        coll = dom.HTMLCollection(('a', 'b'))
+        pairs = [(x, y) for x in coll for y in coll]
+        self.assertEqual(pairs, [('a', 'a'), ('a', 'b'),
+                                 ('b', 'a'), ('b', 'b')])
+
+    def test_shared_collection(self):
+        coll = parser.parse(SOURCE).div
+        expected = list(coll.elements)
+
+        def iterate():
+            return [list(coll) for i in range(20)]
+
+        for result in run_threads(iterate):
+            self.assertTrue(all(r == expected for r in result))
+
+    def check_reads(self, document):
+        expected = (document.raw_html, str(document),
+                    [t.raw_html for t in document.div])
+
+        def read():
+            return [(document.raw_html, str(document),
+                     [t.raw_html for t in document.div],
+                     len(document.get_children('class=c3')),
+                     document.get_element_by_id('d150').tag_name,
+                     len(document.get_tags_containing('more')))
+                    for i in range(3)]
+
+        # drop the cache, so threads build it concurrently
+        document._clear_cache()
+        for tag in document.get_all_tags():
+            tag._clear_cache()
+        for result in run_threads(read):
+            for raw_html, text, tags, found, name, containing in result:
+                self.assertEqual((raw_html, text, tags), expected)
+                self.assertEqual(found, 29)
+                self.assertEqual(name, 'div')
+                self.assertEqual(containing, 400)
+
+    def test_reads(self):
+        self.check_reads(parser.parse(SOURCE))
+
+    def test_reads_indexed(self):
+        self.check_reads(parser.parse(SOURCE, index=True, text_index=True))
+
+    def test_reads_frozen(self):
+        self.check_reads(parser.parse(SOURCE).freeze())
+
+    def test_lazy_regions(self):
+        document = lazy.parse_lazy(SOURCE)
+        expected = parser.parse(SOURCE).raw_html
+        for result in run_threads(lambda: document.raw_html):
+            self.assertEqual(result, expected)
+
+
+class TestQueryParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE)
+
+    def test_queries(self):
+        results = parallel.query_parallel(self.doc, QUERIES, workers=4)
+        expected = [parallel.run_query(self.doc, q) for q in QUERIES]
+        self.assertEqual(results, expected)
+        self.assertEqual([len(r) for r in results], [29, 200, 1, 200, 400, 0])
+
+    def test_executor(self):
+        with ThreadPoolExecutor(4) as executor:
+            results = parallel.query_parallel(
+                self.doc, [lambda d: len(d.div), str], executor)
+        self.assertEqual(results, [200, str(self.doc)])
+
+    def test_collection(self):
+        coll = self.doc.div('class=c3')
+        results = parallel.query_parallel(coll, ['li', 'span'], workers=4)
+        self.assertEqual(len(results), 2)
+        self.assertEqual([len(r) for r in results[0]], [2] * 29)
+        self.assertEqual(results[1][0], [coll[0].span[0]])
+        self.assertEqual(parallel.query_parallel(
+            dom.HTMLCollection([]), ['li']), [[]])
+
+    def test_stress(self):
+        document = parser.parse(SOURCE, index=True)
+        queries = QUERIES * 50
+        expected = [parallel.run_query(document, q) for q in queries]
+        document._clear_cache()
+        with ThreadPoolExecutor(16) as executor:
+            for i in range(5):
+                self.assertEqual(parallel.query_parallel(
+                    document, queries, executor), expected)
+
+    def test_invalid_query(self):
+        with self.assertRaises(ValueError):
+            parallel.query_parallel(self.doc, ['div(class'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -125,45 +125,79 @@ class TestParser(unittest.TestCase):
         self.parser.handle_endtag('test')
         self.assertEqual(self.stack.pop.call_count, 2)
 
+    @patch('easyhtml.dom.PlainText')
+    def test_handle_data_buffered(self, text_mock):
+        self.parser.handle_data('test')
+        self.assertFalse(text_mock.called)
+        self.assertFalse(self.stack.current.append.called)
+
     @patch('easyhtml.dom.PlainText')
     def test_handle_data_ok(self, text_mock):
         self.parser.handle_data('test')
-        text_mock.assert_called_with('test')
-        self.stack.current.append.assert_called_with(text_mock.return_value)
+        self.parser.handle_comment('test')
+        text_mock.assert_called_with('test', 'test')
+        self.stack.current.append.assert_any_call(text_mock.return_value)
+
+    @patch('easyhtml.dom.PlainText')
+    def test_handle_data_joined(self, text_mock):
+        self.parser.handle_data('foo ')
+        self.parser.handle_data('bar')
+        self.parser.handle_starttag('br', [])
+        text_mock.assert_called_once_with('foo bar', 'foo bar')
 
     @patch('easyhtml.dom.PlainText')
     def test_handle_data_stripped(self, text_mock):
         self.parser.handle_data('\t \xA0')
+        self.parser.handle_comment('test')
         self.assertFalse(text_mock.called)
-        self.assertFalse(self.stack.current.append.called)
 
+    @patch('easyhtml.dom.PlainText')
     @patch('easyhtml.dom.NamedEntity')
-    def test_handle_entityref_ok(self, ent_mock):
+    def test_handle_entityref_ok(self, ent_mock, text_mock):
+        ent_mock.return_value = dom.HTMLText('&test;', '<')
+        self.parser.handle_data('a')
         self.parser.handle_entityref('test')
+        self.parser.handle_data('b')
+        self.parser.handle_comment('test')
         ent_mock.assert_called_with('test')
-        self.stack.current.append.assert_called_with(ent_mock.return_value)
+        text_mock.assert_called_once_with('a<b', 'a&test;b')
+
+    @patch('easyhtml.dom.PlainText')
+    @patch('easyhtml.dom.NamedEntity')
+    def test_handle_entityref_space(self, ent_mock, text_mock):
+        ent_mock.return_value = dom.HTMLText('&test;', '\xA0')
+        self.parser.handle_data('a')
+        self.parser.handle_entityref('test')
+        self.parser.handle_data(' ')
+        self.parser.handle_comment('test')
+        text_mock.assert_any_call('a', 'a')
+        self.stack.current.append.assert_any_call(ent_mock.return_value)
+        text_mock.assert_called_with(' ', ' ')
 
     @patch('easyhtml.dom.PlainText')
     @patch('easyhtml.dom.NamedEntity', side_effect=KeyError)
     def test_handle_entityref_error(self, ent_mock, text_mock):
+        text_mock.return_value = dom.HTMLText('&test;', '&test;')
         self.parser.handle_entityref('test')
         ent_mock.assert_called_with('test')
         text_mock.assert_called_with('&test;')
-        self.stack.current.append.assert_called_with(text_mock.return_value)
 
+    @patch('easyhtml.dom.PlainText')
     @patch('easyhtml.dom.NumEntity')
-    def test_handle_charref_ok(self, ent_mock):
+    def test_handle_charref_ok(self, ent_mock, text_mock):
+        ent_mock.return_value = dom.HTMLText('&#test;', '<')
         self.parser.handle_charref('test')
+        self.parser.handle_comment('test')
         ent_mock.assert_called_with('test')
-        self.stack.current.append.assert_called_with(ent_mock.return_value)
+        text_mock.assert_called_once_with('<', '&#test;')
 
     @patch('easyhtml.dom.PlainText')
     @patch('easyhtml.dom.NumEntity', side_effect=ValueError)
     def test_handle_charref_error(self, ent_mock, text_mock):
+        text_mock.return_value = dom.HTMLText('&#test;', '&#test;')
         self.parser.handle_charref('test')
         ent_mock.assert_called_with('test')
         text_mock.assert_called_with('&#test;')
-        self.stack.current.append.assert_called_with(text_mock.return_value)
 
     @patch('easyhtml.dom.HTMLComment')
     def test_handle_comment_ok(self, comm_mock):
@@ -184,3 +218,450 @@ class TestParser(unittest.TestCase):
         self.stack.clear.assert_called_with()
         document_mock.assert_called_with()
         self.stack.push.assert_called_with(document_mock.return_value)
+
+
+
+
+class TestSourceOffsets(unittest.TestCase):
+
+    SOURCE = ('<!DOCTYPE html>\n'
+              '<body class="x">\n'
+              '  <p>Hello &amp; <b>bye</b></p><!-- c -->\n'
+              '<div/><br><ul><li>one</ul></p>tail\n')
+
+    def parse(self, chunk_size):
+        dom_parser = parser.DOMParser(keep_source=True)
+        for i in range(0, len(self.SOURCE), chunk_size):
+            dom_parser.feed(self.SOURCE[i:i + chunk_size])
+        return dom_parser, dom_parser.get_dom()
+
+    def test_document_source(self):
+        dom_parser, doc = self.parse(1000)
+        self.assertEqual(doc.source, self.SOURCE)
+        self.assertEqual(doc.outer_source, self.SOURCE)
+        self.assertEqual(doc.doctype.outer_source, '<!DOCTYPE html>')
+
+    def test_tag_source(self):
+        for chunk_size in (1, 7, 1000):
+            dom_parser, doc = self.parse(chunk_size)
+            p = doc.p[0]
+            self.assertEqual(p.outer_source, '<p>Hello &amp; <b>bye</b></p>')
+            self.assertEqual(p.inner_source, 'Hello &amp; <b>bye</b>')
+
+    def test_text_source(self):
+        for chunk_size in (1, 7, 1000):
+            dom_parser, doc = self.parse(chunk_size)
+            text = doc.p[0].elements[0]
+            self.assertEqual(text.outer_source, 'Hello &amp; ')
+
+    def test_comment_source(self):
+        dom_parser, doc = self.parse(1000)
+        comment = doc.body[0].elements[1]
+        self.assertEqual(comment.outer_source, '<!-- c -->')
+
+    def test_self_closing_and_single_tags(self):
+        dom_parser, doc = self.parse(1000)
+        self.assertEqual(doc.div[0].outer_source, '<div/>')
+        self.assertEqual(doc.div[0].inner_source, '')
+        self.assertEqual(doc.br[0].outer_source, '<br>')
+        self.assertIsNone(doc.br[0].inner_source)
+
+    def test_unclosed_tags_source(self):
+        dom_parser, doc = self.parse(1000)
+        self.assertEqual(doc.li[0].outer_source, '<li>one')
+        self.assertTrue(doc.body[0].outer_source.endswith('tail\n'))
+
+    def test_next_document_offsets(self):
+        dom_parser, doc = self.parse(1000)
+        dom_parser.feed('<p>next</p>')
+        doc = dom_parser.get_dom()
+        self.assertEqual(doc.p[0].outer_source, '<p>next</p>')
+
+    def test_source_not_kept(self):
+        dom_parser = parser.DOMParser()
+        dom_parser.feed(self.SOURCE)
+        doc = dom_parser.get_dom()
+        self.assertIsNone(doc.source)
+        self.assertIsNone(doc.p[0].outer_source)
+
+
+
+
+
+class TestTextRuns(unittest.TestCase):
+
+    SOURCE = ('<div>\n'
+              '  <p>Fish &amp; chips &eacute;t&eacute; &#60; &unknown; '
+              'x&nbsp;y, ' + 'long text ' * 2000 + '</p>\n'
+              '</div>')
+
+    def parse(self, chunk_size):
+        dom_parser = parser.DOMParser()
+        for i in range(0, len(self.SOURCE), chunk_size):
+            dom_parser.feed(self.SOURCE[i:i + chunk_size])
+        return dom_parser.get_dom()
+
+    def test_single_text_element(self):
+        p = self.parse(8192).p[0]
+        self.assertEqual(len(p.elements), 1)
+        self.assertEqual([type(e) for e in p.elements[0].elements],
+                         [dom.PlainText, dom.NamedEntity, dom.PlainText])
+
+    def test_text_and_raw_html(self):
+        text = self.parse(8192).p[0].elements[0]
+        self.assertTrue(str(text).startswith(
+            'Fish & chips \xe9t\xe9 < &unknown; x\xa0y, long text'))
+        self.assertTrue(text.raw_html.startswith(
+            'Fish &amp; chips &eacute;t&eacute; &#60; &unknown; x&nbsp;y, '))
+
+    def test_references_without_semicolon(self):
+        for source, text in (('<p>AT&T rocks</p>', 'AT&T rocks'),
+                             ('<p>&copy 2020</p>', '\xa9 2020'),
+                             ('<p>&#65 x</p>', 'A x'),
+                             ('<p>a &copy', 'a \xa9'),
+                             ('<p>a&b', 'a&b')):
+            with self.subTest(source=source):
+                doc = parser.parse(source, keep_source=True)
+                self.assertEqual(str(doc), text)
+                # the raw HTML keeps the source as it is
+                self.assertEqual(doc.p[0].inner_html.strip(),
+                                 source.split('>', 1)[1].split('<')[0])
+                self.assertEqual(doc.serialize('compact'),
+                                 source if source.endswith('</p>') else
+                                 source + '</p>')
+
+    def test_chunks_do_not_change_dom(self):
+        expected = self.parse(len(self.SOURCE))
+        for chunk_size in (1, 7, 8192):
+            doc = self.parse(chunk_size)
+            self.assertEqual(doc.raw_html, expected.raw_html)
+            self.assertEqual(
+                [len(n.elements) for n in doc.get_all_text_nodes()],
+                [len(n.elements) for n in expected.get_all_text_nodes()])
+
+
+
+
+class TestTagHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.parser = parser.DOMParser()
+        self.parser.handle_tag_open = \
+            lambda tag: self.events.append(('start', tag.tag_name))
+        self.parser.handle_tag_close = \
+            lambda tag: self.events.append(('end', tag.tag_name))
+
+    def test_valid_document(self):
+        self.parser.feed('<div><br><p/></div>')
+        self.parser.get_dom()
+        self.assertEqual(self.events, [
+            ('start', 'div'), ('start', 'br'), ('end', 'br'),
+            ('start', 'p'), ('end', 'p'), ('end', 'div')])
+
+    def test_unclosed_tags(self):
+        self.parser.feed('<div><p><b></div><i>')
+        self.parser.get_dom()
+        self.assertEqual(self.events, [
+            ('start', 'div'), ('start', 'p'), ('start', 'b'), ('end', 'b'),
+            ('end', 'p'), ('end', 'div'), ('start', 'i'), ('end', 'i')])
+
+
+class TestParserStats(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = parser.DOMParser(collect_stats=True)
+
+    def parse(self, source):
+        self.parser.feed(source)
+        self.parser.close()
+        return self.parser.get_dom()
+
+    def test_disabled(self):
+        dom_parser = parser.DOMParser()
+        dom_parser.feed('<p>text</p>')
+        self.assertIsNone(dom_parser.stats)
+        self.assertIsNone(dom_parser.get_dom().parse_stats)
+        self.assertNotIn('handle_starttag', vars(dom_parser))
+
+    def test_elements(self):
+        source = '<!DOCTYPE html><div><p>a &amp; b&nbsp;<!-- c --></p><br></div>'
+        doc = self.parse(source)
+        stats = doc.parse_stats
+        self.assertEqual(stats.elements, {
+            'DoctypeDeclaration': 1, 'HTMLTag': 3, 'TextNode': 1,
+            'PlainText': 1, 'NamedEntity': 1, 'HTMLComment': 1})
+        self.assertEqual(stats.max_depth, 2)
+        self.assertEqual(stats.chars_fed, len(source))
+
+    def test_recovery(self):
+        stats = self.parse('<div><p><b>text</div></i>&foo;&#xZ1;'
+                           '&#99999999;').parse_stats
+        self.assertEqual(stats.recovery_pops, 2)
+        self.assertEqual(stats.ignored_end_tags, 1)
+        self.assertEqual(stats.entity_fallbacks, 2)
+
+    def test_handler_time(self):
+        stats = self.parse('<div><p>text</p><br/></div>').parse_stats
+        self.assertEqual(stats.handler_calls, {
+            'handle_starttag': 2, 'handle_endtag': 2,
+            'handle_startendtag': 1, 'handle_data': 1})
+        self.assertEqual(set(stats.handler_time), set(stats.handler_calls))
+        self.assertTrue(all(t >= 0 for t in stats.handler_time.values()))
+
+    def test_nested_handlers(self):
+        # handle_startendtag calls handle_starttag, it's counted once
+        stats = self.parse('<br/>' * 1000).parse_stats
+        self.assertEqual(stats.handler_calls, {'handle_startendtag': 1000})
+
+    def test_new_stats_for_each_document(self):
+        first = self.parse('<p>first</p>').parse_stats
+        second = self.parse('<p>second</p><p>').parse_stats
+        self.assertIsNot(first, second)
+        self.assertEqual(first.elements['HTMLTag'], 1)
+        self.assertEqual(second.elements['HTMLTag'], 2)
+        self.assertEqual(second.as_dict()['elements'], second.elements)
+
+
+class TestParserLimits(unittest.TestCase):
+
+    def parse(self, source, **limits):
+        dom_parser = parser.DOMParser(limits=parser.ParserLimits(**limits))
+        dom_parser.feed(source)
+        dom_parser.close()
+        return dom_parser.get_dom()
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            parser.ParserLimits(policy='ignore')
+
+    def test_within_limits(self):
+        doc = self.parse('<div a="1"><p>text</p></div>', max_nodes=3,
+                         max_depth=2, max_attrs=1, max_text=4)
+        self.assertFalse(doc.partial)
+        self.assertEqual(doc.exceeded_limits, ())
+        self.assertEqual(str(doc), 'text')
+
+    def test_raise(self):
+        with self.assertRaises(parser.ParserLimitError) as cm:
+            self.parse('<div><div><div></div></div></div>', max_depth=2)
+        self.assertEqual(cm.exception.limit, 'max_depth')
+        self.assertEqual(cm.exception.value, 2)
+
+    def test_truncate(self):
+        doc = self.parse('<div><p>1</p><p>2</p></div><i>3</i>', max_nodes=4,
+                         policy='truncate')
+        self.assertTrue(doc.partial)
+        self.assertEqual(doc.exceeded_limits, ('max_nodes',))
+        self.assertEqual(str(doc), '1')
+        self.assertEqual(len(doc.p), 2)
+
+    def test_truncate_ignores_following_data(self):
+        dom_parser = parser.DOMParser(
+            limits=parser.ParserLimits(max_depth=1, policy='truncate'))
+        dom_parser.feed('<p>1</p><div><b>')
+        dom_parser.feed('<p>2</p>')
+        dom_parser.close()
+        doc = dom_parser.get_dom()
+        self.assertEqual(str(doc), '1')
+        dom_parser.feed('<p><b>next</b></p>')
+        dom_parser.close()
+        self.assertEqual(dom_parser.get_dom().raw_html, '<p>\n</p>\n')
+
+    def test_truncate_resets_tokenizer(self):
+        dom_parser = parser.DOMParser(
+            keep_source=True,
+            limits=parser.ParserLimits(max_nodes=2, policy='truncate'))
+        dom_parser.feed('<div><script>var a = 1;')
+        dom_parser.feed(' var b;</script><p>x</p>')
+        dom_parser.close()
+        self.assertTrue(dom_parser.get_dom().partial)
+        # the next document is not parsed as the content of the script
+        dom_parser.feed('<p>second</p>')
+        dom_parser.close()
+        doc = dom_parser.get_dom()
+        self.assertFalse(doc.partial)
+        self.assertEqual(str(doc), 'second')
+        self.assertEqual(doc.p[0].outer_source, '<p>second</p>')
+
+    def test_skip_deep_tags(self):
+        doc = self.parse('<div><p>1<b>2<i>3</i></b><br/><p/></p><p>4</p></div>',
+                         max_depth=2, policy='skip')
+        self.assertEqual(doc.exceeded_limits, ('max_depth',))
+        self.assertEqual(str(doc), '14')
+        self.assertEqual([t.tag_name for t in doc.get_all_tags()],
+                         ['div', 'p', 'p'])
+
+    def test_skip_unclosed_tag(self):
+        # the end tag of an opened tag ends the skipped one
+        doc = self.parse('<body><div><p>deep text</div><p>after</p>'
+                         '<div id="x">kept</div></body>',
+                         max_depth=2, policy='skip')
+        self.assertEqual(str(doc), 'afterkept')
+        self.assertEqual(doc.get_element_by_id('x').tag_name, 'div')
+        self.assertEqual(len(doc.body[0].elements), 3)
+
+    def test_nodes_of_chunks(self):
+        limits = parser.ParserLimits(max_nodes=2)
+        # a text with entities is a single node
+        self.assertEqual(str(parser.parse('<p>' + 'a &amp; ' * 10,
+                                          limits=limits)), 'a & ' * 10)
+        dom_parser = parser.DOMParser(limits=limits)
+        for c in '<p>hello world</p>':
+            dom_parser.feed(c)
+        dom_parser.close()
+        doc = dom_parser.get_dom()
+        self.assertFalse(doc.partial)
+        self.assertEqual(str(doc), 'hello world')
+        with self.assertRaises(parser.ParserLimitError):
+            self.parse('<p>hello world</p><br>', max_nodes=2)
+
+    def test_skip_attrs(self):
+        doc = self.parse('<a x="1" y="2" z="3">link</a>', max_attrs=2,
+                         policy='skip')
+        self.assertEqual(doc.exceeded_limits, ('max_attrs',))
+        self.assertEqual(doc.a[0].attrs, {'x': '1', 'y': '2'})
+
+    def test_skip_text(self):
+        doc = self.parse('<p>hello world</p><p>more &amp; text</p><br>',
+                         max_text=8, policy='skip')
+        self.assertEqual(doc.exceeded_limits, ('max_text',))
+        self.assertEqual([str(p) for p in doc.p], ['hello wo', ''])
+        self.assertEqual(len(doc.br), 1)
+
+    def test_time(self):
+        doc = self.parse('<p>1</p>' * 100, max_time=0, policy='skip')
+        self.assertEqual(doc.exceeded_limits, ('max_time',))
+
+    def test_pool(self):
+        limits = parser.ParserLimits(max_depth=1, policy='skip')
+        doc = parser.parse('<p><b>1</b>2</p>', limits=limits)
+        self.assertEqual(str(doc), '2')
+        self.assertFalse(parser.parse('<p><b>1</b>2</p>').partial)
+
+
+class TestRawText(unittest.TestCase):
+
+    SOURCE = ('<head><style>p  { color: red }</style></head><body>'
+              '<script>var total = "<b>";</script><p>Total  due</p></body>')
+
+    def parse(self, source, **options):
+        dom_parser = parser.DOMParser(**options)
+        dom_parser.feed(source)
+        dom_parser.close()
+        return dom_parser.get_dom()
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            parser.DOMParser(raw_text={'script': 'hide'})
+        with self.assertRaises(ValueError):
+            parser.DOMParser(raw_text={'div': 'drop'})
+
+    def test_text(self):
+        doc = self.parse(self.SOURCE)
+        self.assertEqual(str(doc), 'p { color: red }var total = "<b>";Total due')
+
+    def test_opaque(self):
+        doc = self.parse(self.SOURCE, raw_text={'script': 'opaque',
+                                                'style': 'opaque'})
+        self.assertEqual(str(doc), 'Total due')
+        content = doc.script[0].elements
+        self.assertEqual(len(content), 1)
+        self.assertIsInstance(content[0], dom.OpaqueText)
+        self.assertEqual(content[0].text, 'var total = "<b>";')
+        self.assertEqual(doc.style[0].elements[0].text, 'p  { color: red }')
+        self.assertEqual(doc.get_text(opaque=True),
+                         'p  { color: red }var total = "<b>";Total due')
+        self.assertEqual(doc.script[0].raw_html,
+                         '<script>\n    var total = "<b>";\n</script>\n')
+
+    def test_opaque_search(self):
+        doc = self.parse(self.SOURCE, raw_text={'script': 'opaque'},
+                         text_index=True)
+        self.assertEqual([t.tag_name for t in doc.get_tags_containing('total')],
+                         ['body', 'p'])
+        self.assertEqual([t.tag_name for t in
+                          doc.get_tags_containing('total', opaque=True)],
+                         ['body', 'script', 'p'])
+        self.assertIsInstance(doc.find_text('total', opaque=True)[0],
+                              dom.OpaqueText)
+
+    def test_opaque_chunks(self):
+        dom_parser = parser.DOMParser(raw_text={'script': 'opaque'},
+                                      keep_source=True)
+        for c in '<script>a  <\n b</script>':
+            dom_parser.feed(c)
+        dom_parser.close()
+        doc = dom_parser.get_dom()
+        element = doc.script[0].elements[0]
+        self.assertEqual(element.text, 'a  <\n b')
+        self.assertEqual(element.outer_source, 'a  <\n b')
+
+    def test_unterminated(self):
+        # HTMLParser does not pass the content of an unterminated
+        # raw text element, the same as with the text policy
+        doc = self.parse('<script>x = 1', raw_text={'script': 'opaque'})
+        self.assertEqual(doc.raw_html, self.parse('<script>x = 1').raw_html)
+
+    def test_drop(self):
+        doc = self.parse(self.SOURCE, raw_text={'script': 'drop',
+                                                'style': 'drop'})
+        self.assertEqual(doc.script[0].elements, [])
+        self.assertEqual(doc.get_text(opaque=True), 'Total due')
+
+    def test_self_closing(self):
+        doc = self.parse('<script/><p>text</p>', raw_text={'script': 'drop'})
+        self.assertEqual(str(doc), 'text')
+
+    def test_pool(self):
+        doc = parser.parse(self.SOURCE, raw_text={'script': 'drop'})
+        self.assertEqual(doc.script[0].elements, [])
+
+
+class TestParserPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = parser.ParserPool(max_size=2)
+
+    def test_parse(self):
+        doc = self.pool.parse('<p>test</p>')
+        self.assertEqual(str(doc.p[0]), 'test')
+
+    def test_parser_reused(self):
+        with self.pool.parser() as first:
+            pass
+        with self.pool.parser() as second:
+            pass
+        self.assertIs(first, second)
+
+    def test_parser_options(self):
+        with self.pool.parser(keep_source=True) as first:
+            self.assertTrue(first.keep_source)
+        with self.pool.parser() as second:
+            self.assertIsNot(first, second)
+        doc = self.pool.parse('<p>test</p>', keep_source=True)
+        self.assertEqual(doc.p[0].outer_source, '<p>test</p>')
+
+    def test_max_size(self):
+        parsers = [self.pool.acquire() for i in range(3)]
+        for p in parsers:
+            self.pool.release(p)
+        self.assertEqual(len(self.pool._parsers[()]), 2)
+
+    def test_reset_after_error(self):
+        with self.assertRaises(ValueError):
+            with self.pool.parser(keep_source=True) as dom_parser:
+                dom_parser.feed('<div><p>unfinished <b')
+                raise ValueError
+        doc = self.pool.parse('<i>next</i>', keep_source=True)
+        self.assertEqual(doc.raw_html, '<i>\n    next\n</i>\n')
+        self.assertEqual(doc.source, '<i>next</i>')
+        self.assertEqual(doc.i[0].outer_source, '<i>next</i>')
+
+    def test_concurrent_parse(self):
+        from concurrent.futures import ThreadPoolExecutor
+        sources = ['<p id="{0}">{0}</p>'.format(i) for i in range(200)]
+        with ThreadPoolExecutor(8) as executor:
+            docs = list(executor.map(parser.parse, sources))
+        for i, doc in enumerate(docs):
+            self.assertEqual(str(doc.get_element_by_id(str(i))), str(i))
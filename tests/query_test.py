@@ -0,0 +1,56 @@
+import unittest
+
+from easyhtml import parser, query
+
+SOURCE = ('<div class="a b" id="x">Hi <b>there</b></div>'
+          '<div class="b">Two</div><p class="a">para</p>')
+
+
+class TestParseQuery(unittest.TestCase):
+
+    def test_tag_name(self):
+        self.assertEqual(query.parse_query('div'), ('div', None, None))
+
+    def test_tag_with_attrs(self):
+        self.assertEqual(query.parse_query('div(class=a; id=x)'),
+                         ('div', 'class=a; id=x', None))
+
+    def test_attrs(self):
+        self.assertEqual(query.parse_query('(class=a)'),
+                         (None, 'class=a', None))
+
+    def test_id(self):
+        self.assertEqual(query.parse_query('#x'), (None, None, 'x'))
+
+    def test_invalid(self):
+        for spec in ('', 'div(class=a', 'a b', 'div(class)', '(=a)',
+                     'p(class=a; id)', 'p(a=b=c)'):
+            with self.assertRaises(ValueError):
+                query.parse_query(spec)
+
+
+class TestFindTags(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE)
+
+    def check(self, container, spec, expected):
+        self.assertEqual([str(t) for t in query.find_tags(container, spec)],
+                         expected)
+
+    def test_document(self):
+        self.check(self.doc, 'div', ['Hi there', 'Two'])
+        self.check(self.doc, 'div(class=a)', ['Hi there'])
+        self.check(self.doc, '(class=a)', ['Hi there', 'para'])
+        self.check(self.doc, '#x', ['Hi there'])
+        self.check(self.doc, '#y', [])
+
+    def test_tag(self):
+        div = self.doc.div[0]
+        self.check(div, 'b', ['there'])
+        self.check(div, '(class=a)', [])
+        self.check(div, '#x', [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import unittest
+
+from easyhtml import lazy, parser, serializer
+
+SOURCE = '''<!DOCTYPE html>
+<html>
+  <head><title>A  title</title></head>
+  <body class="a&amp;b" data-q='say "hi"'>
+    <p>one   two &amp; <b>three</b>&nbsp;</p>
+    <pre>  keep
+   this </pre><br>
+    <input disabled>
+    <!-- comment -->
+    <script>if (a < b) {}</script>
+  </body>
+</html>
+'''
+
+# white space dropped between elements becomes a single space
+MINIFIED = (
+    '<!DOCTYPE html> <html> <head><title>A title</title></head> '
+    '<body class="a&amp;b" data-q="say &quot;hi&quot;"> '
+    '<p>one two &amp; <b>three</b>&nbsp;</p> <pre>  keep\n   this </pre>'
+    '<br> <input disabled> <!-- comment --> '
+    '<script>if (a < b) {}</script> </body> </html>')
+
+# the compact mode keeps spacing, but quotes attributes the same way
+COMPACT = SOURCE.replace("'say \"hi\"'", '"say &quot;hi&quot;"')
+
+
+class TestSerializer(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE, keep_source=True)
+
+    def test_minified(self):
+        self.assertEqual(serializer.serialize(self.doc), MINIFIED)
+        self.assertEqual(self.doc.serialize(), MINIFIED)
+        self.assertEqual(self.doc.p[0].serialize(),
+                         '<p>one two &amp; <b>three</b>&nbsp;</p>')
+        self.assertEqual(self.doc.br[0].serialize(), '<br>')
+
+    def test_dropped_space(self):
+        doc = parser.parse('<p><b>a</b> <i>b</i>\n</p><p> &nbsp;<br> </p>')
+        self.assertEqual(doc.serialize(),
+                         '<p><b>a</b> <i>b</i> </p><p> &nbsp;<br> </p>')
+        self.assertEqual(doc.i[0].serialize(), '<i>b</i>')
+        self.assertEqual(doc.freeze().serialize(), doc.serialize())
+        doc = parser.parse('<p>a <!--x-->  b</p>')
+        self.assertEqual(doc.serialize(), '<p>a <!--x--> b</p>')
+
+    def test_compact(self):
+        self.assertEqual(self.doc.serialize('compact'), COMPACT)
+        self.assertEqual(self.doc.pre[0].serialize('compact'),
+                         self.doc.pre[0].outer_source)
+        self.assertIn(self.doc.body[0].serialize('compact'), COMPACT)
+        self.assertEqual(parser.parse(COMPACT).raw_html, self.doc.raw_html)
+
+    def test_compact_without_source(self):
+        doc = parser.parse(SOURCE)
+        self.assertEqual(doc.serialize('compact'), MINIFIED.replace(
+            'A title', 'A  title').replace('one two', 'one   two'))
+
+    def test_pretty(self):
+        self.assertEqual(self.doc.serialize('pretty'), self.doc.raw_html)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.doc.serialize('tiny')
+
+    def test_attributes(self):
+        doc = parser.parse('<a href="?a=1&amp;b=2" title=\'x"y\' hidden>')
+        self.assertEqual(doc.serialize(),
+                         '<a href="?a=1&amp;b=2" title="x&quot;y" hidden></a>')
+        self.assertEqual(parser.parse(doc.serialize()).a[0].attrs,
+                         doc.a[0].attrs)
+
+    def test_write(self):
+        for mode in serializer.modes:
+            f = io.StringIO()
+            count = serializer.write(self.doc, f, mode, chunk_size=16)
+            self.assertEqual(f.getvalue(), self.doc.serialize(mode))
+            self.assertEqual(count, len(f.getvalue()))
+        f = io.StringIO()
+        self.assertEqual(self.doc.p[0].write(f), 39)
+        self.assertEqual(f.getvalue(), self.doc.p[0].serialize())
+
+    def test_deep(self):
+        # deeper than raw_html could build with the default recursion limit
+        source = '<div>' * 3000 + 'x' + '</div>' * 3000
+        doc = parser.parse(source)
+        self.assertEqual(doc.serialize(), source)
+
+    def test_other_documents(self):
+        frozen = self.doc.freeze()
+        self.assertEqual(frozen.serialize(), MINIFIED)
+        document = lazy.parse_lazy(SOURCE)
+        self.assertEqual(document.serialize(), MINIFIED)
+
+
+if __name__ == '__main__':
+    unittest.main()
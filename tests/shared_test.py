@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from easyhtml import parser, shared
+
+SOURCE = ('<!DOCTYPE html><html><body><div id="a" class="x y">'
+          '<p>one &amp; two&nbsp;€</p><!-- c --><br><input disabled>'
+          '</div><script>var a;</script><p class="y">three</p></body></html>')
+
+
+def query(name):
+    """
+    Attaches to a shared document and runs queries in it,
+    it's executed by another process.
+    """
+    document = shared.attach(name)
+    try:
+        return (len(document.p), document.get_element_by_id('a').raw_html,
+                str(document))
+    finally:
+        document.close()
+
+
+class TestSharedDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE, raw_text={'script': 'opaque'})
+        self.shared = shared.SharedDocument(shared.export(self.doc))
+
+    def test_same_document(self):
+        self.assertEqual(self.shared.raw_html, self.doc.raw_html)
+        self.assertEqual(str(self.shared), str(self.doc))
+        self.assertEqual(self.shared.doctype, self.doc.doctype.raw_html)
+        for tag, original in zip(self.shared.get_all_tags(),
+                                 self.doc.get_all_tags()):
+            self.assertEqual(tag.tag_name, original.tag_name)
+            self.assertEqual(tag.raw_html, original.raw_html)
+            self.assertEqual(str(tag), str(original))
+
+    def test_structure(self):
+        div = self.shared.div[0]
+        self.assertEqual([e.raw_html for e in div.elements],
+                         [e.raw_html for e in self.doc.div[0].elements])
+        self.assertEqual(div.parent.tag_name, 'body')
+        self.assertEqual(div.p[0].parent, div)
+        self.assertIsNone(self.shared.parent)
+        self.assertEqual(self.shared.script[0].elements[0].text, 'var a;')
+
+    def test_searches(self):
+        self.assertEqual(len(self.shared.get_tags_by_name('p')), 2)
+        self.assertEqual(len(self.shared.get_tags_by_name('span')), 0)
+        self.assertEqual([t.tag_name for t in
+                          self.shared.get_children('class=y')], ['div', 'p'])
+        div = self.shared.get_element_by_id('a')
+        self.assertEqual(div.attrs, {'id': 'a', 'class': 'x y'})
+        self.assertIsNone(self.shared.get_element_by_id('b'))
+        self.assertIsNone(self.shared.input[0].get_attr('disabled'))
+        self.assertEqual(len(self.shared.div.p), 1)
+        self.assertEqual(self.shared.div('class=x')[0], div)
+        # collections check ids of their tags as well
+        self.assertEqual(self.shared.div.get_element_by_id('a'), div)
+        self.assertEqual(self.shared.body.get_element_by_id('a'), div)
+        self.assertIsNone(self.shared.p.get_element_by_id('a'))
+
+    def test_invalid_buffer(self):
+        with self.assertRaises(ValueError):
+            shared.SharedDocument(b'\0' * 64)
+
+    def test_file(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            shared.save(self.doc, path)
+            with shared.load(path) as document:
+                self.assertEqual(document.raw_html, self.doc.raw_html)
+        finally:
+            os.remove(path)
+
+    def test_processes(self):
+        shm = shared.share(self.doc)
+        try:
+            with multiprocessing.Pool(2) as pool:
+                results = pool.map(query, [shm.name] * 2)
+        finally:
+            shm.close()
+            shm.unlink()
+        expected = (2, self.doc.div[0].raw_html, str(self.doc))
+        self.assertEqual(results, [expected, expected])
+
+    def test_independent_processes(self):
+        # processes that are not children of the creator have their own
+        # resource trackers, they should not unlink the block at exit
+        shm = shared.share(self.doc)
+        code = ('from easyhtml import shared\n'
+                'document = shared.attach({!r})\n'
+                'print(len(document.p))\n'
+                'document.close()\n'.format(shm.name))
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        try:
+            for i in range(2):
+                result = subprocess.run([sys.executable, '-c', code],
+                                        cwd=root, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE,
+                                        universal_newlines=True)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertEqual(result.stdout.strip(), '2')
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
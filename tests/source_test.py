@@ -0,0 +1,85 @@
+import codecs
+import os
+import tempfile
+import unittest
+
+from easyhtml import source, parser, dom
+
+HTML = ('<html><head><meta charset="{}"></head>'
+        '<body><p>Привіт, café</p></body></html>')
+
+
+class TestDetectEncoding(unittest.TestCase):
+
+    def test_bom(self):
+        self.assertEqual(source.detect_encoding(codecs.BOM_UTF8 + b'<p>'),
+                         'utf-8-sig')
+        self.assertEqual(source.detect_encoding(codecs.BOM_UTF16_LE + b'<'),
+                         'utf-16')
+        self.assertEqual(
+            source.detect_encoding(codecs.BOM_UTF32_LE + b'<\0\0\0'),
+            'utf-32')
+
+    def test_meta_charset(self):
+        data = b'<html><head><meta charset="windows-1251">'
+        self.assertEqual(source.detect_encoding(data), 'cp1251')
+
+    def test_meta_http_equiv(self):
+        data = (b'<meta http-equiv="Content-Type" '
+                b'content="text/html; charset=ISO-8859-1">')
+        self.assertEqual(source.detect_encoding(data), 'iso8859-1')
+
+    def test_unknown_encoding(self):
+        data = b'<meta charset="foo">'
+        self.assertEqual(source.detect_encoding(data), 'utf-8')
+
+    def test_not_specified(self):
+        self.assertEqual(source.detect_encoding(b'<p>', 'ascii'), 'ascii')
+
+
+class TestIterDecoded(unittest.TestCase):
+
+    def test_split_characters(self):
+        data = 'Привіт'.encode('utf-8')
+        chunks = list(source.iter_decoded(data, 'utf-8', chunk_size=3))
+        self.assertEqual(''.join(chunks), 'Привіт')
+        self.assertTrue(all(len(c) <= 3 for c in chunks))
+
+
+class TestParseFile(unittest.TestCase):
+
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix='.html')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_detected_encoding(self):
+        for encoding in ('utf-8', 'cp1251', 'koi8-u'):
+            html = HTML.format(encoding)
+            path = self.write(html.encode(encoding, errors='replace'))
+            doc = source.parse_file(path, chunk_size=7)
+            self.assertIn('Привіт', str(doc.p[0]))
+
+    def test_specified_encoding(self):
+        path = self.write(HTML.format('utf-8').encode('cp1251', 'replace'))
+        doc = source.parse_file(path, encoding='cp1251')
+        self.assertIn('Привіт', str(doc.p[0]))
+
+    def test_keep_source(self):
+        html = HTML.format('utf-8')
+        path = self.write(codecs.BOM_UTF8 + html.encode('utf-8'))
+        doc = source.parse_file(path, chunk_size=5, keep_source=True)
+        self.assertEqual(doc.source, html)
+
+    def test_parser(self):
+        path = self.write(b'<p>test</p>')
+        dom_parser = parser.DOMParser(index=True)
+        doc = source.parse_file(path, parser=dom_parser)
+        self.assertIsNotNone(doc._index)
+
+    def test_empty_file(self):
+        doc = source.parse_file(self.write(b''))
+        self.assertIsInstance(doc, dom.HTMLDocument)
+        self.assertEqual(doc.elements, [])
@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+from easyhtml import dom, lazy, parser, tracing
+
+SOURCE = ('<div id="a"><p class="x">one two</p><p class="y">two</p></div>'
+          '<div><p class="x">three</p></div>')
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parser.parse(SOURCE)
+
+    def test_no_overhead_when_off(self):
+        original = dom.ElementTagContainer.__dict__['get_children']
+        with tracing.tracing():
+            self.assertIsNot(dom.ElementTagContainer.get_children, original)
+        self.assertIs(dom.ElementTagContainer.get_children, original)
+
+    def test_linear_search(self):
+        with tracing.tracing() as tracer:
+            self.doc.get_children('class=x')
+            self.doc.get_children('class=x')
+            self.doc.get_element_by_id('a')
+        stats = tracer.queries['get_children', 'class=x']
+        self.assertEqual((stats.calls, stats.visited, stats.results), (2, 10, 4))
+        self.assertGreater(stats.time, 0)
+        stats = tracer.queries['get_element_by_id', 'a']
+        self.assertEqual((stats.calls, stats.visited, stats.results), (1, 1, 1))
+
+    def test_indexed_search(self):
+        doc = parser.parse(SOURCE, index=True)
+        with tracing.tracing() as tracer:
+            doc.get_children('class=x')
+        stats = tracer.queries['get_children', 'class=x']
+        self.assertEqual((stats.visited, stats.results), (2, 2))
+
+    def test_text_search(self):
+        with tracing.tracing() as tracer:
+            self.doc.find_text('two')
+            self.doc.get_tags_containing('two')
+        self.assertEqual(tracer.queries['find_text', 'two'].visited, 3)
+        # nested searches are not recorded separately
+        self.assertEqual(tracer.queries['find_text', 'two'].calls, 1)
+        self.assertEqual(tracer.queries['get_tags_containing', 'two'].results,
+                         3)
+
+    def test_lazy_document(self):
+        doc = lazy.parse_lazy(SOURCE)
+        expected = len(list(parser.parse(SOURCE).get_all_tags()))
+        original = lazy._iter_tags
+        with tracing.tracing() as tracer:
+            doc.get_children('class=x')
+            doc.get_element_by_id('a')
+        stats = tracer.queries['get_children', 'class=x']
+        self.assertEqual((stats.calls, stats.results), (1, 2))
+        self.assertTrue(0 < stats.visited <= expected)
+        self.assertEqual(tracer.queries['get_element_by_id', 'a'].results, 1)
+        self.assertIs(lazy._iter_tags, original)
+
+    def test_collection(self):
+        with tracing.tracing() as tracer:
+            self.doc.div.p('class=x')
+        self.assertEqual(sorted(tracer.queries), [
+            ('HTMLCollection.filter_tags_by_attrs', 'class=x'),
+            ('HTMLCollection.get_tags_by_name', 'p'),
+            ('get_tags_by_name', 'div')])
+        stats = tracer.queries['HTMLCollection.get_tags_by_name', 'p']
+        self.assertEqual((stats.visited, stats.results), (3, 3))
+        stats = tracer.queries['HTMLCollection.filter_tags_by_attrs',
+                               'class=x']
+        self.assertEqual((stats.visited, stats.results), (3, 2))
+
+    def test_callback(self):
+        calls = []
+        with tracing.tracing(lambda *args: calls.append(args[:4])):
+            self.doc.p
+        self.assertEqual(calls, [('get_tags_by_name', 'p', 5, 3)])
+
+    def test_report(self):
+        with tracing.tracing() as tracer:
+            self.doc.p
+            self.doc.get_element_by_id('a')
+        self.assertEqual([(m, q) for m, q, s in tracer.report('visited')],
+                         [('get_tags_by_name', 'p'),
+                          ('get_element_by_id', 'a')])
+
+    def test_nested_tracers(self):
+        with tracing.tracing() as outer:
+            with tracing.tracing() as inner:
+                self.doc.p
+            self.doc.div
+        self.assertEqual(len(outer.queries), 2)
+        self.assertEqual(len(inner.queries), 1)
+
+    def test_threads(self):
+        def search():
+            for i in range(50):
+                self.doc.get_children('class=x')
+
+        with tracing.tracing() as tracer:
+            threads = [threading.Thread(target=search) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        stats = tracer.queries['get_children', 'class=x']
+        self.assertEqual((stats.calls, stats.visited), (200, 1000))